@@ -86,7 +86,7 @@ def preprocess(request):
         if record_visit:
             try:
                 profile.last_visit = timezone.now()
-                profile.save()
+                profile.save(update_fields=['last_visit', 'modified_on'])
             except Exception as e:
                 logger.exception(e)
             try:
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""Define the batch avatar rendering pipeline.
+
+Copyright (C) 2020 Gitcoin Core
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from PIL import Image
+
+from .models import BaseAvatar, CustomAvatar
+from .utils import build_random_avatar, svg_to_png_pyvips
+
+logger = logging.getLogger(__name__)
+
+# processes rendering SVGs to PNGs
+AVATAR_RENDER_WORKERS = 4
+# SVGs sent to a rendering process at once
+AVATAR_RENDER_CHUNK_SIZE = 8
+# threads uploading the rendered files to storage
+AVATAR_UPLOAD_WORKERS = 8
+# profiles handled per batch
+AVATAR_BATCH_SIZE = 500
+
+
+def get_avatar_config_key(config):
+    """Get the key identifying an avatar configuration, equal for identical configurations."""
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+def render_avatar_png(svg_content):
+    """Render an avatar SVG to PNG in memory and hash it.
+
+    Runs in the worker processes of the pipeline. Avatars are only rendered with pyvips,
+    from memory; an avatar which can't be rendered is left without a PNG.
+
+    Args:
+        svg_content (bytes): The SVG document.
+
+    Returns:
+        tuple: The PNG data and its hash, or (None, '') if the SVG could not be rendered.
+
+    """
+    try:
+        png = svg_to_png_pyvips(svg_content)
+        if not png:
+            return None, ''
+        png = png.getvalue()
+        return png, BaseAvatar.calculate_hash(Image.open(BytesIO(png)))
+    except Exception as e:
+        logger.warning(f'could not render avatar: {e}')
+        return None, ''
+
+
+def store_avatar_files(key, svg_content, png_content):
+    """Upload the files of a rendered avatar to storage.
+
+    Returns:
+        tuple: The names of the stored SVG and PNG files. The PNG name is None if it was not rendered.
+
+    """
+    avatar = CustomAvatar()
+    avatar.svg.save(f'{key[:16]}.svg', ContentFile(svg_content), save=False)
+    if png_content:
+        avatar.png.save(f'{key[:16]}.png', ContentFile(png_content), save=False)
+    return avatar.svg.name, avatar.png.name if png_content else None
+
+
+def render_avatar_batch(configs, render_pool, upload_pool):
+    """Render and store the avatars of a batch of configurations.
+
+    Identical configurations are composed, rendered and stored only once.
+
+    Args:
+        configs (list of dict): The avatar configurations.
+        render_pool (ProcessPoolExecutor): The pool rendering the PNGs.
+        upload_pool (ThreadPoolExecutor): The pool uploading the files.
+
+    Returns:
+        dict: The stored svg and png names and the hash of each rendered avatar, by configuration key.
+
+    """
+    unique_configs = {get_avatar_config_key(config): config for config in configs}
+    keys = list(unique_configs.keys())
+    svgs = [CustomAvatar.build_svg(unique_configs[key]) for key in keys]
+    pngs = list(render_pool.map(render_avatar_png, svgs, chunksize=AVATAR_RENDER_CHUNK_SIZE))
+    stored = upload_pool.map(store_avatar_files, keys, svgs, [png for png, _ in pngs])
+    return {
+        key: {'svg': svg_name, 'png': png_name, 'hash': png_hash}
+        for key, (svg_name, png_name), (_, png_hash) in zip(keys, stored, pngs)
+    }
+
+
+def make_random_avatars(profiles, workers=AVATAR_RENDER_WORKERS, batch_size=AVATAR_BATCH_SIZE):
+    """Give each profile a new random, active avatar.
+
+    Args:
+        profiles (iterable of dashboard.models.Profile): The profiles.
+        workers (int): The number of processes rendering avatars.
+        batch_size (int): The number of profiles handled per batch.
+
+    Returns:
+        dict: The throughput metrics of the run.
+
+    """
+    stats = {'profiles': 0, 'rendered': 0, 'failed': 0}
+    start = time.time()
+
+    with ProcessPoolExecutor(max_workers=workers) as render_pool, \
+            ThreadPoolExecutor(max_workers=AVATAR_UPLOAD_WORKERS) as upload_pool:
+        profiles = iter(profiles)
+        while True:
+            batch = [profile for _, profile in zip(range(batch_size), profiles)]
+            if not batch:
+                break
+
+            configs = [build_random_avatar('8A2BE2', '000000', False) for profile in batch]
+            rendered = render_avatar_batch(configs, render_pool, upload_pool)
+            stats['rendered'] += len(rendered)
+            stats['failed'] += len([avatar for avatar in rendered.values() if not avatar['png']])
+
+            with transaction.atomic():
+                BaseAvatar.objects.filter(profile__in=batch).update(active=False)
+                for profile, config in zip(batch, configs):
+                    avatar = rendered[get_avatar_config_key(config)]
+                    CustomAvatar.objects.create(
+                        profile=profile,
+                        config=config,
+                        svg=avatar['svg'],
+                        png=avatar['png'],
+                        hash=avatar['hash'],
+                        autogenerated=True,
+                        active=True,
+                    )
+            stats['profiles'] += len(batch)
+            logger.info('made %s avatars, %.1f avatars/sec', stats['profiles'], stats['profiles'] / (time.time() - start))
+
+    stats['seconds'] = time.time() - start
+    stats['avatars_per_second'] = stats['profiles'] / stats['seconds'] if stats['seconds'] else 0
+    return stats
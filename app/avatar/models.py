@@ -36,7 +36,10 @@ from economy.models import SuperModel
 from PIL import Image
 from svgutils.compose import Figure, Line
 
-from .utils import build_avatar_component, convert_img, convert_wand, dhash, get_temp_image_file, get_upload_filename
+from .utils import (
+    avatar_figure_to_svg, build_avatar_component, convert_img, convert_wand, dhash, get_temp_image_file,
+    get_upload_filename,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -195,40 +198,45 @@ class CustomAvatar(BaseAvatar):
             return similar_avatar
         return new_avatar
 
-    def create_from_config(self):
-        """Create an avatar SVG from the configuration.
+    @classmethod
+    def build_svg(cls, config):
+        """Compose the avatar SVG described by a configuration.
 
-        TODO:
-            * Deprecate in favor of request param based view using templates.
+        Args:
+            config (dict): The avatar configuration.
+
+        Returns:
+            bytes: The SVG document.
 
         """
-        payload = self.config
-        icon_width = self.ICON_SIZE[0]
-        icon_height = self.ICON_SIZE[1]
+        icon_width = cls.ICON_SIZE[0]
+        icon_height = cls.ICON_SIZE[1]
 
         components = [
             icon_width, icon_height,
             Line([(0, icon_height / 2), (icon_width, icon_height / 2)],
                  width=f'{icon_height}px',
-                 color=f"#{payload.get('Background')}")
+                 color=f"#{config.get('Background')}")
         ]
 
-        for k, v in payload.items():
+        for k, v in config.items():
             if k not in ['Background', 'ClothingColor', 'HairColor', 'SkinTone']:
                 components.append(
-                    build_avatar_component(f"{v.get('component_type')}/{v.get('svg_asset')}", self.ICON_SIZE)
+                    build_avatar_component(f"{v.get('component_type')}/{v.get('svg_asset')}", cls.ICON_SIZE)
                 )
 
-        with NamedTemporaryFile(mode='w+', suffix='.svg') as tmp:
-            profile = None
-            avatar = Figure(*components)
-            avatar.save(tmp.name)
-            with open(tmp.name) as file:
-                if self.profile:
-                    profile = self.profile
+        return avatar_figure_to_svg(Figure(*components))
 
-                svg_name = profile.handle if profile and profile.handle else token_hex(8)
-                self.svg.save(f"{svg_name}.svg", File(file), save=False)
+    def create_from_config(self):
+        """Create an avatar SVG from the configuration.
+
+        TODO:
+            * Deprecate in favor of request param based view using templates.
+
+        """
+        profile = self.profile if self.profile else None
+        svg_name = profile.handle if profile and profile.handle else token_hex(8)
+        self.svg.save(f"{svg_name}.svg", ContentFile(self.build_svg(self.config)), save=False)
 
     def to_dict(self):
         return self.config
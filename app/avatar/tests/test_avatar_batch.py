@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Handle batch avatar rendering related tests.
+
+Copyright (C) 2020 Gitcoin Core
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from unittest import mock
+
+from avatar.batch import make_random_avatars
+from avatar.models import BaseAvatar, CustomAvatar
+from dashboard.models import Profile
+from PIL import Image
+from test_plus.test import TestCase
+
+
+def svg_to_png_pyvips(svg_content, scale=1):
+    if json.loads(svg_content)['broken']:
+        raise Exception('broken')
+    png = BytesIO()
+    Image.new('RGB', BaseAvatar.ICON_SIZE, 'white').save(png, 'PNG')
+    return png
+
+
+class MakeRandomAvatarsTest(TestCase):
+    """Define tests for the batch avatar rendering pipeline."""
+
+    def setUp(self):
+        """Perform setup for the testcase."""
+        self.profiles = [Profile.objects.create(data={}, handle=f'avatar{i}') for i in range(3)]
+        self.old_avatar = CustomAvatar.objects.create(profile=self.profiles[0], config={}, active=True)
+
+        self.stored = []
+        storage = BaseAvatar._meta.get_field('svg').storage
+
+        def save(name, content, max_length=None):
+            self.stored.append(name)
+            return name
+
+        patchers = [
+            # the two first profiles get identical configurations, the last one fails to render
+            mock.patch('avatar.batch.build_random_avatar', side_effect=[
+                {'broken': False, 'skin': 1}, {'broken': False, 'skin': 1}, {'broken': True, 'skin': 2},
+            ]),
+            mock.patch('avatar.batch.CustomAvatar.build_svg', side_effect=lambda config: json.dumps(config).encode()),
+            mock.patch('avatar.batch.svg_to_png_pyvips', side_effect=svg_to_png_pyvips),
+            mock.patch('avatar.batch.ProcessPoolExecutor', ThreadPoolExecutor),
+            mock.patch.object(storage, 'save', side_effect=save),
+        ]
+        self.mocks = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def test_make_random_avatars(self):
+        """Test identical configurations are rendered once and every profile gets a new active avatar."""
+        stats = make_random_avatars(Profile.objects.filter(pk__in=[profile.pk for profile in self.profiles]))
+
+        assert stats['profiles'] == 3
+        assert stats['rendered'] == 2
+        assert stats['failed'] == 1
+        assert self.mocks[2].call_count == 2
+        # an svg and a png for the rendered configuration, only an svg for the failed one
+        assert len(self.stored) == 3
+
+        self.old_avatar.refresh_from_db()
+        assert not self.old_avatar.active
+        avatars = {avatar.profile_id: avatar for avatar in CustomAvatar.objects.filter(active=True)}
+        assert set(avatars) == {profile.pk for profile in self.profiles}
+        first, second, broken = [avatars[profile.pk] for profile in self.profiles]
+        assert first.autogenerated
+        assert first.png.name == second.png.name
+        assert first.hash and first.hash == second.hash
+        assert broken.svg.name and not broken.png
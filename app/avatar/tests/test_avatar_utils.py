@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Handle avatar utility related tests.
+
+Copyright (C) 2020 Gitcoin Core
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+from avatar.models import BaseAvatar
+from avatar.utils import (
+    _get_avatar_svg, avatar_figure_to_svg, build_avatar_svg, get_avatar_svg, load_avatar_component,
+    load_temporary_avatar_component,
+)
+from lxml import etree
+from test_plus.test import TestCase
+
+PAYLOAD = {
+    'background_color': '#781623',
+    'skin_tone': '#3F2918',
+    'clothing': {'primary_color': '#18C708', 'item_type': 'cardigan'},
+    'eyes': '0',
+    'nose': '0',
+}
+
+
+class AvatarComponentCacheTest(TestCase):
+    """Define tests for the in memory caches of avatar components and composed avatars."""
+
+    def setUp(self):
+        """Perform setup for the testcase."""
+        load_avatar_component.cache_clear()
+        load_temporary_avatar_component.cache_clear()
+        _get_avatar_svg.cache_clear()
+
+    def test_composing_leaves_cached_components_unchanged(self):
+        """Test figures are composed from copies of the cached component trees."""
+        icon_size = tuple(BaseAvatar.ICON_SIZE)
+        eyes = load_avatar_component('Eyes/0.svg', icon_size, None)
+        clothing = load_temporary_avatar_component(icon_size, None, '#18C708', '#FFF', 'cardigan', 'clothing')
+        cached = [etree.tostring(eyes.root), etree.tostring(clothing.root)]
+
+        first = build_avatar_svg(payload=PAYLOAD, temp=True)
+        for component in first.root:
+            component.set('transform', 'translate(10, 10)')
+        second = avatar_figure_to_svg(build_avatar_svg(payload=PAYLOAD, temp=True))
+
+        assert [etree.tostring(eyes.root), etree.tostring(clothing.root)] == cached
+        assert b'translate(10, 10)' not in second
+        assert load_avatar_component.cache_info().hits >= 1
+        assert load_temporary_avatar_component.cache_info().hits >= 1
+
+    def test_get_avatar_svg_cache(self):
+        """Test identical payloads, in any key order, are composed once."""
+        svg = get_avatar_svg(PAYLOAD)
+        assert get_avatar_svg(dict(reversed(list(PAYLOAD.items())))) == svg
+
+        assert _get_avatar_svg.cache_info().misses == 1
+        assert _get_avatar_svg.cache_info().hits == 1
@@ -17,13 +17,15 @@ You should have received a copy of the GNU Affero General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 """
+import copy
+import json
 import logging
 import os
 import random
 import re
+from functools import lru_cache
 from io import BytesIO
 from secrets import token_hex
-from tempfile import NamedTemporaryFile
 
 from django.conf import settings
 from django.http import HttpResponse, JsonResponse
@@ -35,10 +37,14 @@ from git.utils import get_organization, get_user
 from PIL import Image, ImageOps
 from pyvips.error import Error as VipsError
 from svgutils import transform
-from svgutils.compose import SVG, Figure, Line
+from svgutils.compose import SVG, Element, Figure, Line
 
 AVATAR_BASE = 'assets/other/avatars/'
 COMPONENT_BASE = 'assets/v2/images/avatar/'
+# number of parsed and scaled avatar components kept in memory by each process
+AVATAR_COMPONENT_CACHE_SIZE = 2048
+# number of composed avatar SVGs kept in memory by each process
+AVATAR_SVG_CACHE_SIZE = 256
 
 logger = logging.getLogger(__name__)
 
@@ -274,9 +280,24 @@ def get_svg_template(category, item, primary_color, secondary_color=''):
     return component_template.render(context)
 
 
-def build_avatar_component(path, icon_size=None, avatar_size=None):
-    from .models import BaseAvatar
-    icon_size = icon_size or BaseAvatar.ICON_SIZE
+def copy_avatar_component(component):
+    """Copy a cached avatar component, so it can be added to a figure without altering the cache."""
+    return Element(copy.deepcopy(component.root))
+
+
+@lru_cache(maxsize=AVATAR_COMPONENT_CACHE_SIZE)
+def load_avatar_component(path, icon_size, avatar_size):
+    """Load, parse and scale an avatar component SVG from disk, once per process.
+
+    Args:
+        path (str): The path of the component, relative to COMPONENT_BASE.
+        icon_size (tuple): The size of the avatar the component is part of.
+        avatar_size (tuple): The size the component was drawn for, if not the default one.
+
+    Returns:
+        svgutils.compose.SVG: The scaled component, which must not be altered.
+
+    """
     avatar_component_size = avatar_size or (899.2, 1415.7)
     scale_factor = icon_size[1] / avatar_component_size[1]
     x_to_center = (icon_size[0] / 2) - ((avatar_component_size[0] * scale_factor) / 2)
@@ -308,6 +329,36 @@ def build_avatar_component(path, icon_size=None, avatar_size=None):
     return svg
 
 
+def build_avatar_component(path, icon_size=None, avatar_size=None):
+    from .models import BaseAvatar
+    icon_size = tuple(icon_size or BaseAvatar.ICON_SIZE)
+    avatar_size = tuple(avatar_size) if avatar_size else None
+    return copy_avatar_component(load_avatar_component(path, icon_size, avatar_size))
+
+
+@lru_cache(maxsize=AVATAR_COMPONENT_CACHE_SIZE)
+def load_temporary_avatar_component(
+    icon_size, avatar_size, primary_color, secondary_color, component_type, component_category
+):
+    """Render, parse and scale a colored avatar component template, once per process.
+
+    Returns:
+        svgutils.compose.Element: The scaled component, which must not be altered.
+
+    """
+    avatar_component_size = avatar_size or (899.2, 1415.7)
+    scale_factor = icon_size[1] / avatar_component_size[1]
+    x_to_center = (icon_size[0] / 2) - ((avatar_component_size[0] * scale_factor) / 2)
+    svg_data = get_svg_template(
+        category=component_category,
+        item=component_type,
+        primary_color=primary_color,
+        secondary_color=secondary_color,
+    )
+    component = Element(transform.fromstring(str(svg_data)).getroot().root)
+    return component.scale(scale_factor).move(x_to_center, 0)
+
+
 def build_temporary_avatar_component(
     icon_size=None,
     avatar_size=None,
@@ -317,22 +368,11 @@ def build_temporary_avatar_component(
     component_category='clothing'
 ):
     from .models import BaseAvatar
-    icon_size = icon_size or BaseAvatar.ICON_SIZE
-    avatar_component_size = avatar_size or (899.2, 1415.7)
-    scale_factor = icon_size[1] / avatar_component_size[1]
-    x_to_center = (icon_size[0] / 2) - ((avatar_component_size[0] * scale_factor) / 2)
-    payload = {
-        'category': component_category,
-        'item': component_type,
-        'primary_color': primary_color,
-        'secondary_color': secondary_color
-    }
-    with NamedTemporaryFile(mode='w+') as tmp:
-        svg_data = get_svg_template(**payload)
-        tmp.write(str(svg_data))
-        tmp.seek(0)
-        svg = SVG(tmp.name).scale(scale_factor).move(x_to_center, 0)
-    return svg
+    icon_size = tuple(icon_size or BaseAvatar.ICON_SIZE)
+    avatar_size = tuple(avatar_size) if avatar_size else None
+    return copy_avatar_component(load_temporary_avatar_component(
+        icon_size, avatar_size, primary_color, secondary_color, component_type, component_category
+    ))
 
 
 def build_avatar_svg(svg_path='avatar.svg', line_color='#781623', icon_size=None, payload=None, temp=False):
@@ -410,6 +450,42 @@ def build_avatar_svg(svg_path='avatar.svg', line_color='#781623', icon_size=None
     return result_path
 
 
+def avatar_figure_to_svg(figure):
+    """Serialize a composed avatar figure without writing it to disk.
+
+    Args:
+        figure (svgutils.compose.Figure): The avatar figure.
+
+    Returns:
+        bytes: The SVG document.
+
+    """
+    svg = transform.SVGFigure(figure.width, figure.height)
+    svg.append(figure)
+    return svg.to_str()
+
+
+@lru_cache(maxsize=AVATAR_SVG_CACHE_SIZE)
+def _get_avatar_svg(payload_key):
+    return avatar_figure_to_svg(build_avatar_svg(payload=json.loads(payload_key), temp=True))
+
+
+def get_avatar_svg(payload):
+    """Get the SVG document of the avatar described by a payload.
+
+    Composed avatars are cached in memory by their payload, so previewing the same
+    avatar again doesn't compose it again.
+
+    Args:
+        payload (dict): The avatar payload, as accepted by build_avatar_svg.
+
+    Returns:
+        bytes: The SVG document.
+
+    """
+    return _get_avatar_svg(json.dumps(payload, sort_keys=True))
+
+
 def build_random_avatar(override_skin_tone=None, override_hair_color=None, add_facial_hair=True):
     """Build an random avatar payload using context properties"""
     ignore_options = ['eyeliner-blue', 'eyeliner-green', 'eyeliner-pink', 'eyeliner-red', 'eyeliner-teal', 'blush']
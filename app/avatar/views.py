@@ -19,7 +19,6 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 import json
 import logging
-from tempfile import NamedTemporaryFile
 
 from django.db import transaction
 from django.http import HttpResponse, JsonResponse
@@ -32,7 +31,7 @@ from PIL import Image, ImageOps
 
 from .models import BaseAvatar, CustomAvatar, SocialAvatar
 from .utils import (
-    add_gitcoin_logo_blend, build_avatar_svg, get_avatar, get_err_response, get_user_github_avatar_image,
+    add_gitcoin_logo_blend, get_avatar, get_avatar_svg, get_err_response, get_user_github_avatar_image,
     handle_avatar_payload,
 )
 
@@ -42,7 +41,6 @@ logger = logging.getLogger(__name__)
 def avatar(request):
     """Serve an avatar."""
     skin_tone = f"#{request.GET.get('skin_tone', '3F2918')}"
-    preview = request.GET.get('preview', False)
     payload = {
         'background_color': f"#{request.GET.get('background', '781623')}",
         'icon_size': (
@@ -69,19 +67,7 @@ def avatar(request):
         if component in req:
             payload[component] = req.get(component)
 
-    if preview:
-        with NamedTemporaryFile(mode='w+', suffix='.svg') as tmp:
-            avatar_preview = build_avatar_svg(payload=payload, temp=True)
-            avatar_preview.save(tmp.name)
-            with open(tmp.name) as file:
-                response = HttpResponse(file, content_type='image/svg+xml')
-                return response
-    else:
-        result_path = build_avatar_svg(payload=payload)
-
-        with open(result_path) as file:
-            response = HttpResponse(file, content_type='image/svg+xml')
-        return response
+    return HttpResponse(get_avatar_svg(payload), content_type='image/svg+xml')
 
 
 @csrf_exempt
@@ -29,9 +29,9 @@ from .models import (
     Activity, Answer, BlockedURLFilter, BlockedUser, Bounty, BountyEvent, BountyFulfillment, BountyInvites,
     BountySyncRequest, CoinRedemption, CoinRedemptionRequest, Coupon, Earning, FeedbackEntry, FundRequest,
     HackathonEvent, HackathonProject, HackathonRegistration, HackathonSponsor, HackathonWorkshop, Interest,
-    Investigation, LabsResearch, ObjectView, Option, Poll, PollMedia, PortfolioItem, Profile, ProfileVerification,
-    ProfileView, Question, SearchHistory, Sponsor, Tip, TipPayout, TokenApproval, TribeMember, TribesSubscription,
-    UserAction, UserVerificationModel,
+    Investigation, LabsResearch, ObjectView, Option, Poll, PollMedia, PortfolioItem, Profile, ProfileStats,
+    ProfileVerification, ProfileView, Question, SearchHistory, Sponsor, Tip, TipPayout, TokenApproval, TribeMember,
+    TribesSubscription, UserAction, UserVerificationModel,
 )
 
 
@@ -574,6 +574,11 @@ class ProfileVerificationAdmin(admin.ModelAdmin):
     raw_id_fields = ['profile']
 
 
+class ProfileStatsAdmin(admin.ModelAdmin):
+    list_display = ['id', 'profile', 'counted_through', 'current_streak', 'longest_streak']
+    raw_id_fields = ['profile']
+
+
 admin.site.register(BountyEvent, BountyEventAdmin)
 admin.site.register(SearchHistory, SearchHistoryAdmin)
 admin.site.register(Activity, ActivityAdmin)
@@ -615,3 +620,4 @@ admin.site.register(Option, OptionsAdmin)
 admin.site.register(Answer, AnswersAdmin)
 admin.site.register(PollMedia, PollMediaAdmin)
 admin.site.register(ProfileVerification, ProfileVerificationAdmin)
+admin.site.register(ProfileStats, ProfileStatsAdmin)
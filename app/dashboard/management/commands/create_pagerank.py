@@ -16,14 +16,18 @@
 
 '''
 
-import math
-import random
-import time
-
-from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
+import numpy as np
 from dashboard.models import Earning, Profile, ProfileStatHistory
+from django_bulk_update.helper import bulk_update
+from perftools.utils import get_json_store_data, publish_json_stores
+from scipy import sparse
+
+DIRECTIONS = ['funder', 'coder', 'org']
 
 
 def get_exponent(num, base=5):
@@ -33,187 +37,203 @@ def get_exponent(num, base=5):
     return i
 
 
-def choose_edge(edges):
-    entropy = random.random()
-    cursor = 0
-    last_edge = edges[0]
-    for edge in edges:
-        last_edge = edge
-        last_cursor = cursor
-        this_weight = edge[2]
-        cursor += this_weight
-        if entropy >= last_cursor and entropy < cursor:
-            return edge[0]
-    return last_edge[0]
+def get_edges(direction, since=None, until=None):
+    """Get the (from handle, to handle, summed value_usd) edges of the Earning graph, in the direction rank flows.
+
+    Args:
+        direction (str): funder, coder or org.
+        since (datetime): Only include earnings created after this date.
+        until (datetime): Only include earnings created up to this date.
+
+    Returns:
+        list: The (from handle, to handle, value_usd) edges.
+
+    """
+    earnings = Earning.objects.filter(network='mainnet').exclude(to_profile__isnull=True).exclude(from_profile__isnull=True).exclude(value_usd__isnull=True)
+    if since:
+        earnings = earnings.filter(created_on__gt=since)
+    if until:
+        earnings = earnings.filter(created_on__lte=until)
+    fields = ('from_profile__handle', 'to_profile__handle')
+    if direction == 'funder':
+        fields = ('to_profile__handle', 'from_profile__handle')
+    if direction == 'org':
+        earnings = earnings.exclude(org_profile__isnull=True)
+        fields = ('from_profile__handle', 'org_profile__handle')
+    edges = earnings.order_by().values_list(*fields).annotate(value=Sum('value_usd'))
+    return [(from_handle, to_handle, float(value)) for from_handle, to_handle, value in edges]
+
+
+def merge_edges(*edge_lists):
+    """Sum the value of repeated (from, to) edges across edge lists."""
+    merged = {}
+    for edges in edge_lists:
+        for from_node, to_node, value in edges:
+            merged[(from_node, to_node)] = merged.get((from_node, to_node), 0) + float(value)
+    return [(from_node, to_node, value) for (from_node, to_node), value in merged.items()]
+
+
+def get_pagerank_state(direction):
+    """Get the edges, distribution and watermark persisted by the last run for this direction, if any."""
+    state = get_json_store_data('pagerank', direction)
+    if not state:
+        return None
+    return {
+        'watermark': parse_datetime(state['watermark']),
+        'edges': state['edges'],
+        'distribution': state['distribution'],
+    }
+
+
+def save_pagerank_state(direction, watermark, edges, distribution):
+    """Persist the edges and distribution of this run, to warm start the next incremental run from."""
+    publish_json_stores('pagerank', {
+        direction: {
+            'watermark': watermark.isoformat(),
+            'edges': [list(edge) for edge in edges],
+            'distribution': distribution,
+        },
+    })
+
+
+def calculate_pagerank(edges, percent_that_go_to_random_walk=20, tolerance=1e-10, max_iterations=1000, initial_distribution=None):
+    """Calculate the weighted pagerank of the nodes of a graph by power iteration.
+
+    Every node forwards rank along its edges proportionally to their value, and
+    sends `percent_that_go_to_random_walk` percent of its total edge value (or a
+    weight of 1 if it has no edges) to a uniformly random node. The rank of a node
+    is the expected weight a walk of the whole graph credits to it, that is the
+    stationary distribution of the walk weighted by the total weight of the nodes
+    that lead to it, scaled to the total weight of the graph.
+
+    Args:
+        edges (list): (from node, to node, value) tuples. Repeated edges are summed, self links ignored.
+        percent_that_go_to_random_walk (int): The share of each node's weight that goes to a random node.
+        tolerance (float): The L1 change of the distribution under which the iteration stops.
+        max_iterations (int): The maximum number of iterations.
+        initial_distribution (dict): The distribution of a previous run to warm start the iteration from.
+
+    Returns:
+        dict: The pagerank of each node.
+        dict: The stationary distribution of the walk over each node.
+
+    """
+    edges = [edge for edge in edges if edge[0] != edge[1]]
+    nodes = sorted(set(edge[0] for edge in edges) | set(edge[1] for edge in edges))
+    if not nodes:
+        return {}, {}
+    node_index = {node: i for i, node in enumerate(nodes)}
+    num_nodes = len(nodes)
+
+    weights = sparse.coo_matrix(
+        (
+            np.array([float(edge[2]) for edge in edges]),
+            (np.array([node_index[edge[0]] for edge in edges]), np.array([node_index[edge[1]] for edge in edges])),
+        ),
+        shape=(num_nodes, num_nodes),
+    ).tocsr()
+
+    edge_total = np.asarray(weights.sum(axis=1)).ravel()
+    random_walk_weight = np.where(edge_total > 0, edge_total * percent_that_go_to_random_walk * 0.01, 1.0)
+    node_weight = edge_total + random_walk_weight
+    transitions = (sparse.diags(1 / node_weight) @ weights).T.tocsr()
+    random_walk_probability = random_walk_weight / node_weight
+
+    distribution = np.full(num_nodes, 1 / num_nodes)
+    if initial_distribution:
+        # nodes new to the graph start from the uniform distribution
+        distribution = np.array([initial_distribution.get(node, 1 / num_nodes) for node in nodes])
+        distribution = distribution / distribution.sum()
+    for _ in range(max_iterations):
+        next_distribution = transitions @ distribution + distribution @ random_walk_probability / num_nodes
+        converged = np.abs(next_distribution - distribution).sum() < tolerance
+        distribution = next_distribution
+        if converged:
+            break
+
+    flow = weights.T @ distribution + distribution @ random_walk_weight / num_nodes
+    pagerank = node_weight.sum() * flow / flow.sum()
+    return dict(zip(nodes, pagerank.tolist())), dict(zip(nodes, distribution.tolist()))
+
+
+def bucket_pageranks(final_results, top_range_pagerank=10):
+    """Bucket pageranks by their base 5 exponent, offset so the top bucket of all directions is top_range_pagerank.
+
+    Args:
+        final_results (dict): The pagerank of each handle, per direction.
+        top_range_pagerank (int): The bucket of the highest ranked handle.
+
+    Returns:
+        dict: The {'funder': rank, 'coder': rank, 'org': rank} of each handle.
+
+    """
+    exponents = {
+        direction: {handle: get_exponent(rank) for handle, rank in final_results[direction].items()}
+        for direction in DIRECTIONS
+    }
+    max_pagerank = max([max(exponents[direction].values(), default=0) for direction in DIRECTIONS])
+    pagerank_offset = top_range_pagerank - max_pagerank
+
+    all_keys = set()
+    for direction in DIRECTIONS:
+        all_keys |= set(exponents[direction].keys())
+
+    return {
+        handle: {
+            direction: exponents[direction].get(handle, 0) + pagerank_offset for direction in DIRECTIONS
+        } for handle in all_keys
+    }
 
 
 class Command(BaseCommand):
 
     help = 'create pagerank graph and update the pagerank profiles of each'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            default=False,
+            help='only add the earnings created since the last run to the persisted graph, and warm start from its ranks'
+        )
+
     def handle(self, *args, **options):
 
-        # setup
-        top_range_pagerank = 10
-        num_traversals_of_graph = 4 if settings.DEBUG else 500
-        percent_that_go_to_random_walk = 20
+        watermark = timezone.now()
         final_results = {}
-
-        for direction in ['funder', 'coder', 'org']:
-
-            # config
-            random_edge = '**__random__**'
-
-            # pull edges
-            earnings = Earning.objects.filter(network='mainnet').exclude(to_profile__isnull=True).exclude(from_profile__isnull=True).exclude(value_usd__isnull=True)
-            edges = earnings.values_list('from_profile__handle', 'to_profile__handle', 'value_usd')
-            if direction == 'funder':
-                edges = earnings.values_list('to_profile__handle', 'from_profile__handle', 'value_usd')
-            if direction == 'org':
-                earnings = earnings.exclude(org_profile__isnull=True)
-                edges = earnings.values_list('from_profile__handle', 'org_profile__handle', 'value_usd')
-
-            # remove self links
-            edges = [ele for ele in edges if ele[1] != ele[0]]
-
-            # print("*")
-            # setup node map
-            nodes_map = {}
-            for edge in edges:
-                nodes_map[edge[1]] = []
-                nodes_map[edge[0]] = []
-
-            # setup DAG
-            for edge in edges:
-                nodes_map[edge[0]].append((edge[1], edge[2]))
-
-            # add in percent_that_go_to_random_walk to dag
-            weighted_node_map = {}
-            grand_total_weight = 0
-            for key in nodes_map.keys():
-                weighted_node_map[key] = {'weight': 0, 'edges': []}
-            for key, forward_edges in nodes_map.items():
-
-                # calculate random walk edge
-                edge_total = float(sum([ele[1] for ele in forward_edges]))
-                if edge_total:
-                    amount_to_go_to_random_walk = float(edge_total) * float(percent_that_go_to_random_walk) * 0.01
-                else:
-                    amount_to_go_to_random_walk = 1
-
-                # collapse dupe edges (repeat relationships) into one edge
-                inner_edges = {ele[0]: 0 for ele in forward_edges }
-                for ele in forward_edges:
-                    inner_edges[ele[0]] += ele[1]
-
-                # update edges with percentage
-                edge_total += float(amount_to_go_to_random_walk)
-                grand_total_weight += edge_total
-                inner_edges[random_edge] = amount_to_go_to_random_walk
-                for node, value in inner_edges.items():
-                    weight_as_pct = float(value) / edge_total
-                    new_edge = [node, value, weight_as_pct]
-                    weighted_node_map[key]['edges'].append(new_edge)
-                    weighted_node_map[key]['weight'] = edge_total
-
-            # print("****stats****")
-            # print(f"nodes: {len(nodes_map.items())}")
-            # print(f"total_weight: {round(grand_total_weight,2)}")
-            # print(f"avg_weight: {round(grand_total_weight/len(nodes_map.items()), 2)}")
-
-            total_owocki = sum([ele[2] for ele in weighted_node_map['owocki']['edges']])
-
-            # walk the pagerank
-            all_nodes = weighted_node_map.keys()
-            all_nodes_mins_random = [ele for ele in weighted_node_map.keys() if ele != random_edge]
-            pagerank = {ele:0 for ele in all_nodes}
-            for i in range(1, num_traversals_of_graph):
-
-                # print(f"iteration {i}")
-                print(".", end='')
-
-                # gotta start somewhere
-                random.shuffle(all_nodes_mins_random)
-                starter_node = all_nodes_mins_random[0]
-                #print(f"staring with {starter_node}")
-                current_node = starter_node
-                keep_walking = True
-
-                # walk the graph
-                total_weight_this_iteration = 0
-                start_time = time.time()
-                while keep_walking:
-
-                    # setup
-                    this_node = weighted_node_map[current_node]
-                    forward_edges = this_node['edges']
-                    weight = this_node['weight']
-
-                    # find the next edge
-                    next_edge = choose_edge(forward_edges)
-                    if next_edge == random_edge:
-                        random.shuffle(all_nodes_mins_random)
-                        next_edge = all_nodes_mins_random[0]
-
-                    # adjust rank
-                    pagerank[next_edge] += weight
-                    total_weight_this_iteration += weight
-
-                    # continue or dont
-                    keep_walking = total_weight_this_iteration < grand_total_weight
-                    current_node = next_edge
-                    #print(f'({weight},{total_weight_this_iteration},{next_edge})')
-                    #print(".", end='')
-                end_time = time.time()
-                execution_time = end_time - start_time
-
-                # print(f"iteration in {execution_time}s")
-                # print(f"iamonuwa pagerank: {round(pagerank['iamonuwa'])}, avg {round(pagerank['iamonuwa']/i)}")
-                # print(f"gutsal-arsen pagerank: {round(pagerank['gutsal-arsen'])}, avg {round(pagerank['gutsal-arsen']/i)}")
-                # print(f"owocki pagerank: {round(pagerank['owocki'])}, avg {round(pagerank['owocki']/i)}")
-
-            max_pagerank = max([val for key, val in pagerank.items()])
-            bucket_size = max_pagerank / 100
-
-            for key in pagerank.keys():
-                pagerank[key] = get_exponent(pagerank[key]/num_traversals_of_graph)
-
-            print("")
-            print("***************")
-            #print(f"onuwa {direction} pagerank: {round(pagerank['iamonuwa'])}")
-            #print(f"gutsal-arsen {direction} pagerank: {round(pagerank['gutsal-arsen'])}")
-            #print(f"owocki {direction} pagerank: {round(pagerank['owocki'])}")
+        for direction in DIRECTIONS:
+            state = get_pagerank_state(direction) if options['incremental'] else None
+            if state:
+                new_edges = get_edges(direction, since=state['watermark'], until=watermark)
+                print(f"{direction}: adding {len(new_edges)} new edges since {state['watermark']}")
+                edges = merge_edges(state['edges'], new_edges)
+                pagerank, distribution = calculate_pagerank(edges, initial_distribution=state['distribution'])
+            else:
+                edges = get_edges(direction, until=watermark)
+                pagerank, distribution = calculate_pagerank(edges)
+            save_pagerank_state(direction, watermark, edges, distribution)
 
             sorted_pr = [(k, pagerank[k]) for k in sorted(pagerank, key=pagerank.get, reverse=True)]
             print(f"{direction} pagerank:")
-            for i in range(0, 10):
-                print(f"{i} {sorted_pr[i]}")
+            for i, ele in enumerate(sorted_pr[0:10]):
+                print(f"{i} {ele}")
 
             final_results[direction] = pagerank
 
-        # update
-        # print(f"-{len(final_results['funder'])}-")
-        # print(f"-{len(final_results['org'])}-")
-        # print(f"-{len(final_results['funder'])}-")
-        all_keys = []
-        max_pagerank = 0
-        for direction in ['funder', 'coder', 'org']:
-            all_keys = all_keys + list(final_results[direction].keys())
-            max_pagerank = max(max_pagerank, max(final_results[direction].values()))
-        all_keys = set(all_keys)
-
-        pagerank_offset = top_range_pagerank - max_pagerank
-        print(f"offsetting all contributions by {pagerank_offset}")
-        i = 0
-        for handle in all_keys:
-            i += 1
-            profile = Profile.objects.get(handle=handle)
-            profile.rank_funder = final_results['funder'].get(handle, 0) + pagerank_offset
-            profile.rank_org = final_results['org'].get(handle, 0) + pagerank_offset
-            profile.rank_coder = final_results['coder'].get(handle, 0) + pagerank_offset
-            profile.save()
-
-            ProfileStatHistory.objects.create(
+        # update the profiles whose bucket changed
+        ranks = bucket_pageranks(final_results)
+        profiles = Profile.objects.filter(handle__in=ranks.keys()).only('pk', 'handle', 'rank_funder', 'rank_org', 'rank_coder')
+        changed_profiles = []
+        stat_histories = []
+        for profile in profiles:
+            rank = ranks[profile.handle]
+            if (profile.rank_funder, profile.rank_org, profile.rank_coder) == (rank['funder'], rank['org'], rank['coder']):
+                continue
+            profile.rank_funder = rank['funder']
+            profile.rank_org = rank['org']
+            profile.rank_coder = rank['coder']
+            changed_profiles.append(profile)
+            stat_histories.append(ProfileStatHistory(
                 profile=profile,
                 key='pagerank',
                 payload={
@@ -221,5 +241,9 @@ class Command(BaseCommand):
                     'coder': profile.rank_coder,
                     'funder': profile.rank_funder,
                 }
-                )
+            ))
+
+        print(f"{len(changed_profiles)} profiles changed rank")
+        bulk_update(changed_profiles, update_fields=['rank_funder', 'rank_org', 'rank_coder'], batch_size=1000)
+        ProfileStatHistory.objects.bulk_create(stat_histories, batch_size=1000)
         print("fin")
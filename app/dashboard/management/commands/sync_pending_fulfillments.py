@@ -23,30 +23,33 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 
 from dashboard.models import BountyFulfillment
-from dashboard.utils import sync_payout
+from dashboard.utils import PAYOUT_SYNC_WORKERS, sync_payouts
 
 
 class Command(BaseCommand):
 
     help = 'checks if pending fulfillments are confirmed on the tokens explorer'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            default=PAYOUT_SYNC_WORKERS,
+            type=int,
+            help='the number of payouts checked at the same time',
+        )
+
     def handle(self, *args, **options):
         pending_fulfillments = BountyFulfillment.objects.filter(
             payout_status='pending'
         )
 
-        web3_modal_pending_fulfillments = pending_fulfillments.filter(payout_type='web3_modal')
-        if web3_modal_pending_fulfillments:
-            for fulfillment in web3_modal_pending_fulfillments.all():
-                sync_payout(fulfillment)
-
+        # Auto expire pending qr transactions
+        timeout_period = timezone.now() - timedelta(minutes=20)
+        pending_fulfillments.filter(payout_type='qr', created_on__lt=timeout_period).update(payout_status='expired')
 
-        qr_pending_fulfillments = pending_fulfillments.filter(payout_type='qr')
-        if qr_pending_fulfillments:
-            # Auto expire pending transactions
-            timeout_period = timezone.now() - timedelta(minutes=20)
-            qr_pending_fulfillments.filter(created_on__lt=timeout_period).update(payout_status='expired')
-
-            fulfillments = qr_pending_fulfillments.filter(payout_status='pending')
-            for fulfillment in fulfillments.all():
-                sync_payout(fulfillment)
+        stats = sync_payouts(
+            pending_fulfillments.filter(payout_status='pending', payout_type__in=['web3_modal', 'qr']),
+            max_workers=options['workers'],
+        )
+        for chain, chain_stats in stats.items():
+            print(f"{chain}: {chain_stats['checked']} checked, {chain_stats['updated']} updated")
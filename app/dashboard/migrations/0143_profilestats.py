@@ -0,0 +1,37 @@
+# Generated by Django 2.2.4 on 2020-08-20 10:00
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+import economy.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0142_auto_20200818_0807'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(db_index=True, default=economy.models.get_time)),
+                ('modified_on', models.DateTimeField(default=economy.models.get_time)),
+                ('last_action_id', models.IntegerField(default=0)),
+                ('last_earning_id', models.IntegerField(default=0)),
+                ('counted_earning_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, size=None)),
+                ('counted_through', models.DateField(blank=True, null=True)),
+                ('pending_action_days', django.contrib.postgres.fields.ArrayField(base_field=models.DateField(), blank=True, default=list, size=None)),
+                ('last_streak_day', models.DateField(blank=True, null=True)),
+                ('current_streak', models.IntegerField(default=0)),
+                ('longest_streak', models.IntegerField(default=0)),
+                ('relationship_counts', django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=dict)),
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='calc_stats', to='dashboard.Profile')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -37,8 +37,9 @@ from django.contrib.postgres.fields import ArrayField, JSONField
 from django.core.validators import MaxValueValidator, MinValueValidator
 
 
-from django.db import connection, models
-from django.db.models import Count, F, Q, Subquery, Sum
+from django.db import connection, models, transaction
+from django.db.models import Avg, Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.forms.models import model_to_dict
@@ -1726,14 +1727,17 @@ class SendCryptoAsset(SuperModel):
             return False
         return True
 
-    def update_tx_status(self):
+    def update_tx_status(self, tx_status=None):
         """ Updates the tx status according to what infura says about the tx
 
+        Args:
+            tx_status (tuple): The (status, timestamp) of the tx if already fetched, as returned by get_tx_status.
+
         """
         try:
             from dashboard.utils import get_tx_status
             from economy.tx import getReplacedTX
-            self.tx_status, self.tx_time = get_tx_status(self.txid, self.network, self.created_on)
+            self.tx_status, self.tx_time = tx_status or get_tx_status(self.txid, self.network, self.created_on)
 
             #handle scenario in which a txn has been replaced
             if self.tx_status in ['pending', 'dropped', 'unknown', '']:
@@ -1746,12 +1750,17 @@ class SendCryptoAsset(SuperModel):
             self.tx_status = 'error'
             return False
 
-    def update_receive_tx_status(self):
+    def update_receive_tx_status(self, tx_status=None):
         """ Updates the receive tx status according to what infura says about the receive tx
 
+        Args:
+            tx_status (tuple): The (status, timestamp) of the receive tx if already fetched, as returned by get_tx_status.
+
         """
         from dashboard.utils import get_tx_status
-        self.receive_tx_status, self.receive_tx_time = get_tx_status(self.receive_txid, self.network, self.created_on)
+        self.receive_tx_status, self.receive_tx_time = tx_status or get_tx_status(
+            self.receive_txid, self.network, self.created_on
+        )
         return bool(self.receive_tx_status)
 
     @property
@@ -3195,6 +3204,9 @@ class Profile(SuperModel):
     def calculate_all(self):
         # calculates all the info needed to make the profile frontend great
 
+        # reconcile the denormalized counters, in case their related objects were bulk written
+        refresh_profile_counters([self.pk])
+
         # give the user a profile header if they have not yet selected one
         if not self.profile_wallpaper:
             from dashboard.helpers import load_files_in_directory
@@ -3209,8 +3221,9 @@ class Profile(SuperModel):
         self.calculate_and_save_persona()
         self.actions_count = self.get_num_actions
         self.activity_level = self.calc_activity_level()
-        self.longest_streak = self.calc_longest_streak()
-        self.num_repeated_relationships = self.calc_num_repeated_relationships()
+        calc_stats = self.update_calc_stats()
+        self.longest_streak = calc_stats.get_longest_streak()
+        self.num_repeated_relationships = calc_stats.num_repeated_relationships
         self.avg_hourly_rate = self.calc_avg_hourly_rate()
         self.success_rate = self.calc_success_rate()
         self.reliability = self.calc_reliability_ranking() # must be calc'd last
@@ -3410,6 +3423,16 @@ class Profile(SuperModel):
         return "Low"
 
 
+    def update_calc_stats(self):
+        """Update the running aggregates of this user with their activity since the last update
+
+        Returns:
+            ProfileStats: the updated aggregates
+
+        """
+        calc_stats, _ = ProfileStats.objects.get_or_create(profile=self)
+        return calc_stats.update()
+
     def calc_longest_streak(self):
         """ Determines the longest streak, in workdays, of this user
 
@@ -3417,34 +3440,7 @@ class Profile(SuperModel):
             int: a number of weekdays
 
         """
-
-        # setup
-        action_dates = self.actions.all().values_list('created_on', flat=True)
-        action_dates = set([ele.replace(tzinfo=pytz.utc).strftime('%m/%d/%Y') for ele in action_dates])
-        start_date = timezone.datetime(self.created_on.year, self.created_on.month, self.created_on.day).replace(tzinfo=pytz.utc)
-        end_date = timezone.datetime(timezone.now().year, timezone.now().month, timezone.now().day).replace(tzinfo=pytz.utc)
-
-        # loop setup
-        iterdate = start_date
-        max_streak = 0
-        this_streak = 0
-        while iterdate < end_date:
-            # housekeeping
-            last_iterdate = start_date
-            iterdate += timezone.timedelta(days=1)
-
-            is_weekday = iterdate.weekday() < 5
-            if not is_weekday:
-                continue
-
-            has_action_during_window = iterdate.strftime('%m/%d/%Y') in action_dates
-            if has_action_during_window:
-                this_streak += 1
-                max_streak = max(max_streak, this_streak)
-            else:
-                this_streak = 0
-
-        return max_streak
+        return self.update_calc_stats().get_longest_streak()
 
     def calc_num_repeated_relationships(self):
         """ the number of repeat relationships that this user has created
@@ -3454,15 +3450,7 @@ class Profile(SuperModel):
             int: a number of repeat relationships
 
         """
-        relationships = []
-        relationships += list(self.sent_earnings.values_list('to_profile__handle', flat=True))
-        relationships += list(self.earnings.values_list('from_profile__handle', flat=True))
-
-        rel_count = { key: 0 for key in relationships }
-        for rel in relationships:
-            rel_count[rel] += 1
-
-        return len([key for key, val in rel_count.items() if val > 1])
+        return self.update_calc_stats().num_repeated_relationships
 
     def calc_avg_hourly_rate(self):
         """
@@ -4273,7 +4261,6 @@ class Profile(SuperModel):
             counts = {ele['activity_type']: ele['the_count'] for ele in counts}
         params['activities_counts'] = counts
 
-        params['activities'] = list(self.get_various_activities().values_list('pk', flat=True))
         params['tips'] = list(self.tips.filter(**query_kwargs).send_happy_path().values_list('pk', flat=True))
         params['scoreboard_position_contributor'] = self.get_contributor_leaderboard_index()
         params['scoreboard_position_funder'] = self.get_funder_leaderboard_index()
@@ -4374,9 +4361,19 @@ class Profile(SuperModel):
         return False
 
 
+# profile columns which are written on their own on hot paths, like page views
+PROFILE_HOT_FIELDS = frozenset(['last_visit', 'modified_on'])
+
+# profile columns maintained by refresh_profile_counters
+PROFILE_COUNTER_FIELDS = ['average_rating', 'following_count', 'follower_count', 'earnings_count', 'spent_count']
+
+
 # enforce casing / formatting rules for profiles
 @receiver(pre_save, sender=Profile, dispatch_uid="psave_profile")
-def psave_profile(sender, instance, **kwargs):
+def psave_profile(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= PROFILE_HOT_FIELDS:
+        return
+
     instance.handle = instance.handle.replace(' ', '')
     instance.handle = instance.handle.replace('@', '')
     instance.handle = instance.handle.lower()
@@ -4394,15 +4391,13 @@ def psave_profile(sender, instance, **kwargs):
                 instance.organizations += [profile.handle]
 
     instance.is_org = instance.data.get('type') == 'Organization'
-    instance.average_rating = 0
-    if instance.feedbacks_got.count():
-        num = instance.feedbacks_got.count()
-        val = sum(instance.feedbacks_got.values_list('rating', flat=True))
-        instance.average_rating = val/num
-    instance.following_count = instance.follower.count()
-    instance.follower_count = instance.org.count()
-    instance.earnings_count = instance.earnings.count()
-    instance.spent_count = instance.sent_earnings.count()
+
+    # the counters are kept up to date by the related objects, don't overwrite them with stale values
+    if instance.pk and update_fields is None:
+        counters = Profile.objects.filter(pk=instance.pk).values(*PROFILE_COUNTER_FIELDS).first()
+        for field, value in (counters or {}).items():
+            setattr(instance, field, value)
+
     from django.contrib.contenttypes.models import ContentType
     from search.models import SearchResult
     if instance.pk:
@@ -4419,6 +4414,38 @@ def psave_profile(sender, instance, **kwargs):
             }
         )
 
+
+def refresh_profile_counters(profile_ids):
+    """Recalculate the denormalized counters of the given profiles.
+
+    The counters are recalculated in a single UPDATE statement, so they are always
+    consistent with the related objects, whichever way those were written.
+
+    Args:
+        profile_ids (list of int): The primary keys of the profiles to refresh.
+
+    Returns:
+        int: The number of profiles refreshed.
+
+    """
+    profile_ids = set(pk for pk in profile_ids if pk)
+    if not profile_ids:
+        return 0
+
+    def related_count(model, field):
+        related = model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+        return Coalesce(Subquery(related.annotate(count=Count('pk')).values('count')), 0)
+
+    feedbacks = FeedbackEntry.objects.filter(receiver_profile=OuterRef('pk')).order_by().values('receiver_profile')
+    return Profile.objects.filter(pk__in=profile_ids).update(
+        average_rating=Coalesce(Subquery(feedbacks.annotate(avg=Avg('rating')).values('avg')), 0),
+        following_count=related_count(TribeMember, 'profile'),
+        follower_count=related_count(TribeMember, 'org'),
+        earnings_count=related_count(Earning, 'to_profile'),
+        spent_count=related_count(Earning, 'from_profile'),
+    )
+
+
 @receiver(user_logged_in)
 def post_login(sender, request, user, **kwargs):
     """Handle actions to take on user login."""
@@ -4436,6 +4463,148 @@ def post_logout(sender, request, user, **kwargs):
     create_user_action(user, 'Logout', request)
 
 
+def has_weekday_between(start, end):
+    """Determine whether there is a weekday strictly between two dates.
+
+    Args:
+        start (date): The first date.
+        end (date): The last date.
+
+    Returns:
+        bool: Whether or not a weekday falls strictly between start and end.
+
+    """
+    days_between = (end - start).days - 1
+    if days_between > 2:
+        return True
+    return any((start + timedelta(days=i)).weekday() < 5 for i in range(1, days_between + 1))
+
+
+# rows this far below the pk watermarks are read again, to catch transactions which committed late with a lower pk
+PROFILE_STATS_PK_OVERLAP = 1000
+
+
+class ProfileStats(SuperModel):
+    """Define the running aggregates behind the calculated stats of a Profile.
+
+    The aggregates are only ever updated from the UserAction and Earning objects
+    created since the last update, so recalculating a profile no longer rescans its
+    whole history. Days are final once they are over; actions for the current day
+    are kept pending until the next update.
+
+    """
+
+    profile = models.OneToOneField('dashboard.Profile', related_name='calc_stats', on_delete=models.CASCADE)
+    last_action_id = models.IntegerField(default=0)
+    last_earning_id = models.IntegerField(default=0)
+    counted_earning_ids = ArrayField(models.IntegerField(), default=list, blank=True)
+    counted_through = models.DateField(null=True, blank=True)
+    pending_action_days = ArrayField(models.DateField(), default=list, blank=True)
+    last_streak_day = models.DateField(null=True, blank=True)
+    current_streak = models.IntegerField(default=0)
+    longest_streak = models.IntegerField(default=0)
+    relationship_counts = JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return f"stats for {self.profile} through {self.counted_through}"
+
+    def count_streak_day(self, day):
+        """Extend the current streak with a weekday on which the profile took an action.
+
+        Args:
+            day (date): The weekday to count, after every day counted so far.
+
+        Returns:
+            int: The length of the streak ending on that day.
+
+        """
+        if self.last_streak_day and not has_weekday_between(self.last_streak_day, day):
+            return self.current_streak + 1
+        return 1
+
+    def update(self, today=None):
+        """Fold the UserAction and Earning objects created since the last update into the aggregates.
+
+        Args:
+            today (date): The current date. Defaults to today in UTC.
+
+        Returns:
+            ProfileStats: The updated stats.
+
+        """
+        today = today or timezone.now().date()
+        with transaction.atomic():
+            # the row is locked so concurrent updates of a profile don't count the same earnings twice
+            ProfileStats.objects.select_for_update().filter(pk=self.pk).exists()
+            self.refresh_from_db()
+            self.fold(today)
+            self.save()
+        return self
+
+    def fold(self, today):
+        if not self.counted_through:
+            self.counted_through = self.profile.created_on.date()
+
+        # streaks; actions read again are harmless, as their days are either counted or pending
+        actions = self.profile.actions.filter(
+            pk__gt=self.last_action_id - PROFILE_STATS_PK_OVERLAP
+        ).values_list('pk', 'created_on')
+        pending_action_days = set(self.pending_action_days)
+        for pk, created_on in actions:
+            self.last_action_id = max(self.last_action_id, pk)
+            if created_on.date() > self.counted_through:
+                pending_action_days.add(created_on.date())
+
+        counted_through = max(self.counted_through, today - timedelta(days=1))
+        for day in sorted(day for day in pending_action_days if day <= counted_through):
+            pending_action_days.remove(day)
+            if day.weekday() < 5:
+                self.current_streak = self.count_streak_day(day)
+                self.last_streak_day = day
+                self.longest_streak = max(self.longest_streak, self.current_streak)
+        self.counted_through = counted_through
+        self.pending_action_days = sorted(pending_action_days)
+
+        # relationships; the earnings counted within the overlap are remembered so they are counted once
+        earnings = Earning.objects.filter(
+            Q(from_profile=self.profile) | Q(to_profile=self.profile),
+            pk__gt=self.last_earning_id - PROFILE_STATS_PK_OVERLAP,
+        ).exclude(pk__in=self.counted_earning_ids).values_list(
+            'pk', 'from_profile_id', 'from_profile__handle', 'to_profile_id', 'to_profile__handle'
+        )
+        counted_earning_ids = set(self.counted_earning_ids)
+        for pk, from_profile_id, from_handle, to_profile_id, to_handle in earnings:
+            self.last_earning_id = max(self.last_earning_id, pk)
+            counted_earning_ids.add(pk)
+            if from_profile_id == self.profile.pk:
+                self.relationship_counts[to_handle or ''] = self.relationship_counts.get(to_handle or '', 0) + 1
+            if to_profile_id == self.profile.pk:
+                self.relationship_counts[from_handle or ''] = self.relationship_counts.get(from_handle or '', 0) + 1
+        self.counted_earning_ids = sorted(
+            pk for pk in counted_earning_ids if pk > self.last_earning_id - PROFILE_STATS_PK_OVERLAP
+        )
+
+    def get_longest_streak(self, today=None):
+        """Get the longest streak, in workdays, including the current day.
+
+        Args:
+            today (date): The current date. Defaults to today in UTC.
+
+        Returns:
+            int: a number of weekdays
+
+        """
+        today = today or timezone.now().date()
+        if today.weekday() < 5 and today in self.pending_action_days:
+            return max(self.longest_streak, self.count_streak_day(today))
+        return self.longest_streak
+
+    @property
+    def num_repeated_relationships(self):
+        """Get the number of profiles this profile has earned from or sent earnings to more than once."""
+        return len([count for count in self.relationship_counts.values() if count > 1])
+
+
 class ProfileSerializer(serializers.BaseSerializer):
     """Handle serializing the Profile object."""
 
@@ -5237,6 +5406,24 @@ class TribeMember(SuperModel):
         return TribeMember.objects.filter(org__in=tribe_following, profile=self.org).exclude(org=self.org)
 
 
+# the profiles whose counters each related model affects
+PROFILE_COUNTER_SOURCES = {
+    Earning: ['from_profile_id', 'to_profile_id'],
+    FeedbackEntry: ['receiver_profile_id'],
+    TribeMember: ['profile_id', 'org_id'],
+}
+
+
+def refresh_related_profile_counters(sender, instance, **kwargs):
+    """Handle refreshing the counters of the profiles a saved or deleted object relates to."""
+    refresh_profile_counters([getattr(instance, field) for field in PROFILE_COUNTER_SOURCES[sender]])
+
+
+for counter_source in PROFILE_COUNTER_SOURCES:
+    post_save.connect(refresh_related_profile_counters, sender=counter_source, dispatch_uid=f"refresh_profile_counters_{counter_source.__name__}")
+    post_delete.connect(refresh_related_profile_counters, sender=counter_source, dispatch_uid=f"delete_profile_counters_{counter_source.__name__}")
+
+
 class Poll(SuperModel):
     title = models.CharField(max_length=350, blank=True, null=True)
     active = models.BooleanField(default=False)
@@ -1,10 +1,9 @@
 from django.utils import timezone
 
-import requests
-from dashboard.sync.helpers import record_payout_activity, txn_already_used
+from dashboard.sync.helpers import apply_payout_update, get_explorer_json, record_payout_activity, txn_already_used
 
 
-def find_txn_on_etc_explorer(fulfillment, network='mainnet'):
+def find_txn_on_etc_explorer(fulfillment, network='mainnet', used_txns=None):
     token_name = fulfillment.token_name
     if token_name != 'ETC':
         return None
@@ -13,14 +12,14 @@ def find_txn_on_etc_explorer(fulfillment, network='mainnet'):
     payeeAddress = fulfillment.fulfiller_address
 
     blockscout_url = f'https://blockscout.com/etc/{network}/api?module=account&action=txlist&address={funderAddress}'
-    blockscout_response = requests.get(blockscout_url).json()
+    blockscout_response = get_explorer_json('blockscout', blockscout_url)
     if blockscout_response['message'] and blockscout_response['result']:
         for txn in blockscout_response['result']:
             if (
                 txn['from'] == funderAddress.lower() and
                 txn['to'] == payeeAddress.lower() and
                 float(txn['value']) == float(amount) and
-                not txn_already_used(txn['hash'], token_name)
+                not txn_already_used(txn['hash'], token_name, used_txns)
             ):
                 return txn
     return None
@@ -31,7 +30,7 @@ def get_etc_txn_status(txnid, network='mainnet'):
         return None
 
     blockscout_url = f'https://blockscout.com/etc/{network}/api?module=transaction&action=gettxinfo&txhash={txnid}'
-    blockscout_response = requests.get(blockscout_url).json()
+    blockscout_response = get_explorer_json('blockscout', blockscout_url)
 
     if blockscout_response['status'] and blockscout_response['result']:
 
@@ -49,16 +48,27 @@ def get_etc_txn_status(txnid, network='mainnet'):
     return None
 
 
-def sync_etc_payout(fulfillment):
-    if not fulfillment.payout_tx_id:
-        txn = find_txn_on_etc_explorer(fulfillment)
+def get_etc_payout_update(fulfillment, used_txns=None):
+    update = {}
+    payout_tx_id = fulfillment.payout_tx_id
+    if not payout_tx_id:
+        txn = find_txn_on_etc_explorer(fulfillment, used_txns=used_txns)
         if txn:
-            fulfillment.payout_tx_id = txn['hash']
-    if fulfillment.payout_tx_id:
-        txn_status = get_etc_txn_status(fulfillment.payout_tx_id)
+            payout_tx_id = update['payout_tx_id'] = txn['hash']
+
+    if payout_tx_id:
+        txn_status = get_etc_txn_status(payout_tx_id)
+
         if txn_status and txn_status.get('has_mined'):
-            fulfillment.payout_status = 'done'
-            fulfillment.accepted_on = timezone.now()
-            fulfillment.accepted = True
-            record_payout_activity(fulfillment)
+            update['payout_status'] = 'done'
+            update['accepted_on'] = timezone.now()
+            update['accepted'] = True
+    return update
+
+
+def sync_etc_payout(fulfillment):
+    update = get_etc_payout_update(fulfillment)
+    if apply_payout_update(fulfillment, update):
+        record_payout_activity(fulfillment)
+    if fulfillment.payout_tx_id:
         fulfillment.save()
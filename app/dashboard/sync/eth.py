@@ -3,8 +3,7 @@ import logging
 from django.conf import settings
 from django.utils import timezone
 
-import requests
-from dashboard.sync.helpers import record_payout_activity
+from dashboard.sync.helpers import apply_payout_update, get_explorer_json, record_payout_activity
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +24,7 @@ def get_eth_txn_status(txnid, network='mainnet'):
             etherscan_url = f'https://api-rinkeby.etherscan.io/api?module=transaction&action=gettxreceiptstatus&txhash={txnid}&apikey={API_KEY}'
 
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/41.0. 2272.118 Safari/537.36.'}
-        etherscan_response = requests.get(etherscan_url, headers=headers).json()
+        etherscan_response = get_explorer_json('etherscan', etherscan_url, headers=headers)
         result = etherscan_response['result']
 
         response = {
@@ -49,16 +48,24 @@ def get_eth_txn_status(txnid, network='mainnet'):
         return response
 
 
-def sync_eth_payout(fulfillment):
+def get_eth_payout_update(fulfillment, used_txns=None):
+    update = {}
     if fulfillment.payout_tx_id:
         txn_status = get_eth_txn_status(fulfillment.payout_tx_id, fulfillment.bounty.network)
+
         if txn_status:
             if txn_status.get('status') == 'done':
-                fulfillment.payout_status = 'done'
-                fulfillment.accepted_on = timezone.now()
-                fulfillment.accepted = True
-                record_payout_activity(fulfillment)
+                update['payout_status'] = 'done'
+                update['accepted_on'] = timezone.now()
+                update['accepted'] = True
             elif txn_status.get('status') == 'expired':
-                fulfillment.payout_status = 'expired'
+                update['payout_status'] = 'expired'
+    return update
+
 
+def sync_eth_payout(fulfillment):
+    update = get_eth_payout_update(fulfillment)
+    if apply_payout_update(fulfillment, update):
+        record_payout_activity(fulfillment)
+    if fulfillment.payout_tx_id:
         fulfillment.save()
@@ -1,19 +1,91 @@
 
 import logging
+import threading
+import time
 
+import requests
 from dashboard.helpers import bounty_activity_event_adapter, get_bounty_data_for_activity
 from dashboard.models import Activity, BountyEvent, BountyFulfillment
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
+# seconds after which a request to a block explorer is abandoned
+EXPLORER_TIMEOUT = 15
+# maximum number of requests per second sent to each block explorer
+EXPLORER_RATE_LIMITS = {
+    'etherscan': 5,
+    'blockscout': 10,
+    'celo': 10,
+    'viewblock': 5,
+}
 
-def txn_already_used(txn, token_name):
+
+class ExplorerRateLimiter:
+    """Space out the requests sent to a block explorer by all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.next_request_at = 0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            request_at = max(now, self.next_request_at)
+            self.next_request_at = request_at + self.interval
+        time.sleep(request_at - now)
+
+
+explorer_rate_limiters = {
+    explorer: ExplorerRateLimiter(rate) for explorer, rate in EXPLORER_RATE_LIMITS.items()
+}
+explorer_sessions = threading.local()
+
+
+def get_explorer_session():
+    """Get the keep-alive session of the current thread."""
+    session = getattr(explorer_sessions, 'session', None)
+    if not session:
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=len(EXPLORER_RATE_LIMITS), max_retries=2))
+        explorer_sessions.session = session
+    return session
+
+
+def get_explorer_json(explorer, url, headers=None):
+    """Get the JSON response of a block explorer within its rate limit.
+
+    Args:
+        explorer (str): The block explorer, one of EXPLORER_RATE_LIMITS.
+        url (str): The url to get.
+        headers (dict): The headers to send.
+
+    Returns:
+        The decoded JSON response.
+
+    """
+    explorer_rate_limiters[explorer].wait()
+    response = get_explorer_session().get(url, headers=headers, timeout=EXPLORER_TIMEOUT)
+    return response.json()
+
+
+def txn_already_used(txn, token_name, used_txns=None):
+    if used_txns is not None:
+        return (txn, token_name) in used_txns
     return BountyFulfillment.objects.filter(
         payout_tx_id = txn,
         token_name=token_name
     ).exists()
 
 
+def apply_payout_update(fulfillment, update):
+    """Set the fields of a payout update on a fulfillment and return whether it is now paid."""
+    for field, value in update.items():
+        setattr(fulfillment, field, value)
+    return update.get('payout_status') == 'done'
+
+
 def record_payout_activity(fulfillment):
     event_name = 'worker_paid'
     bounty = fulfillment.bounty
@@ -3,14 +3,13 @@ import json
 from django.conf import settings
 from django.utils import timezone
 
-import requests
-from dashboard.sync.helpers import record_payout_activity, txn_already_used
+from dashboard.sync.helpers import apply_payout_update, get_explorer_json, record_payout_activity, txn_already_used
 
 headers = {
     "X-APIKEY" : settings.VIEW_BLOCK_API_KEY
 }
 
-def find_txn_on_zil_explorer(fulfillment, network='mainnet'):
+def find_txn_on_zil_explorer(fulfillment, network='mainnet', used_txns=None):
     token_name = fulfillment.token_name
     if token_name != 'ZIL':
         return None
@@ -20,7 +19,7 @@ def find_txn_on_zil_explorer(fulfillment, network='mainnet'):
     payeeAddress = fulfillment.fulfiller_address
 
     url = f'https://api.viewblock.io/v1/zilliqa/addresses/{funderAddress}/txs?network={network}'
-    response = requests.get(url, headers=headers).json()
+    response = get_explorer_json('viewblock', url, headers=headers)
     if len(response):
         for txn in response:
             if (
@@ -28,7 +27,7 @@ def find_txn_on_zil_explorer(fulfillment, network='mainnet'):
                 txn['to'] == payeeAddress.lower() and
                 txn['direction'] == 'out' and
                 float(txn['value']) == float(amount) and
-                not txn_already_used(txn['hash'], token_name)
+                not txn_already_used(txn['hash'], token_name, used_txns)
             ):
                 return txn
     return None
@@ -39,7 +38,7 @@ def get_zil_txn_status(txnid, network='mainnet'):
         return None
 
     url = f'https://api.viewblock.io/v1/zilliqa/txs/{txnid}?network={network}'
-    view_block_response = requests.get(url, headers=headers).json()
+    view_block_response = get_explorer_json('viewblock', url, headers=headers)
     if view_block_response:
 
         response = {
@@ -56,19 +55,27 @@ def get_zil_txn_status(txnid, network='mainnet'):
     return None
 
 
-def sync_zil_payout(fulfillment):
-    if not fulfillment.payout_tx_id or fulfillment.payout_tx_id == "0x0":
-        txn = find_txn_on_zil_explorer(fulfillment)
+def get_zil_payout_update(fulfillment, used_txns=None):
+    update = {}
+    payout_tx_id = fulfillment.payout_tx_id
+    if not payout_tx_id or payout_tx_id == "0x0":
+        txn = find_txn_on_zil_explorer(fulfillment, used_txns=used_txns)
         if txn:
-            fulfillment.payout_tx_id = txn['hash']
-            fulfillment.save()
+            payout_tx_id = update['payout_tx_id'] = txn['hash']
 
-    if fulfillment.payout_tx_id:
-        txn_status = get_zil_txn_status(fulfillment.payout_tx_id)
+    if payout_tx_id:
+        txn_status = get_zil_txn_status(payout_tx_id)
         if txn_status and txn_status.get('has_mined'):
-            fulfillment.payout_status = 'done'
-            fulfillment.accepted_on = timezone.now()
-            fulfillment.accepted = True
-            fulfillment.save()
+            update['payout_status'] = 'done'
+            update['accepted_on'] = timezone.now()
+            update['accepted'] = True
+    return update
+
 
+def sync_zil_payout(fulfillment):
+    update = get_zil_payout_update(fulfillment)
+    if update:
+        paid = apply_payout_update(fulfillment, update)
+        fulfillment.save()
+        if paid:
             record_payout_activity(fulfillment)
@@ -159,11 +159,12 @@ def increment_view_count(self, pks, content_type, user_id, view_type, retry: boo
     user = None
     if user_id:
         user = User.objects.get(pk=user_id)
-    redis = RedisService().redis
+    pipeline = RedisService().redis.pipeline(transaction=False)
+    for pk in pks:
+        pipeline.incr(f"{content_type}_{pk}")
+    pipeline.execute()
+
     for pk in pks:
-        key = f"{content_type}_{pk}"
-        print(key)
-        result = redis.incr(key)
         if pk and view_type == 'individual' and individual_storage:
             try:
                 ObjectView.objects.create(
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Handle create_pagerank command related tests.
+
+Copyright (C) 2020 Gitcoin Core
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+from dashboard.management.commands.create_pagerank import bucket_pageranks, calculate_pagerank, merge_edges
+from test_plus.test import TestCase
+
+
+class CreatePagerankTest(TestCase):
+    """Define tests for the pagerank calculation."""
+
+    def test_calculate_pagerank_two_nodes(self):
+        """Test the pagerank of a single edge against its closed form solution."""
+        pagerank, _ = calculate_pagerank([('funder', 'coder', 10), ('funder', 'funder', 5)])
+
+        # funder has a weight of 10 + 20% of 10, coder only has its random walk weight of 1.
+        # the stationary distribution of the walk is funder: 6/17, coder: 11/17
+        self.assertAlmostEqual(pagerank['funder'], 13 * 23 / 166)
+        self.assertAlmostEqual(pagerank['coder'], 13 * 143 / 166)
+
+    def test_calculate_pagerank_is_deterministic(self):
+        """Test the pagerank of a symmetric graph is the same for every node and every run."""
+        edges = [('a', 'b', 1), ('b', 'c', 1), ('c', 'a', 1)]
+        pagerank, _ = calculate_pagerank(edges)
+
+        assert pagerank == calculate_pagerank(edges)[0]
+        self.assertAlmostEqual(pagerank['a'], pagerank['b'])
+        self.assertAlmostEqual(pagerank['b'], pagerank['c'])
+        self.assertAlmostEqual(sum(pagerank.values()), 3 * 1.2)
+
+    def test_calculate_pagerank_sums_repeat_edges(self):
+        """Test repeated relationships count as one edge with their summed value."""
+        assert calculate_pagerank([('a', 'b', 1), ('a', 'b', 2), ('b', 'c', 1)])[0] == calculate_pagerank(
+            [('a', 'b', 3), ('b', 'c', 1)]
+        )[0]
+
+    def test_calculate_pagerank_ranks_hub_highest(self):
+        """Test the node every other node sends value to has the highest rank."""
+        pagerank, _ = calculate_pagerank([(f'funder{i}', 'hub', 100) for i in range(10)] + [('hub', 'funder0', 1)])
+
+        assert max(pagerank, key=pagerank.get) == 'hub'
+        assert pagerank['funder0'] > pagerank['funder1']
+
+    def test_calculate_pagerank_warm_start(self):
+        """Test warm starting from a previous distribution converges to the same ranks."""
+        edges = [(f'funder{i}', f'coder{i % 3}', i + 1) for i in range(10)]
+        _, distribution = calculate_pagerank(edges)
+        new_edges = [('funder0', 'coder1', 50), ('newfunder', 'coder0', 5)]
+
+        expected, _ = calculate_pagerank(merge_edges(edges, new_edges))
+        actual, _ = calculate_pagerank(merge_edges(edges, new_edges), initial_distribution=distribution)
+
+        for node, rank in expected.items():
+            self.assertAlmostEqual(actual[node], rank)
+
+    def test_bucket_pageranks(self):
+        """Test pageranks are bucketed by exponent and offset so the top rank is 10."""
+        ranks = bucket_pageranks({
+            'funder': {'alice': 3, 'bob': 700},
+            'coder': {'bob': 20},
+            'org': {},
+        })
+
+        assert ranks['bob'] == {'funder': 10, 'coder': 7, 'org': 5}
+        assert ranks['alice'] == {'funder': 6, 'coder': 5, 'org': 5}
@@ -20,12 +20,16 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 from datetime import date, datetime, timedelta
 
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.contrib.humanize.templatetags.humanize import naturaltime
 from django.utils import timezone
 
 import pytz
 from avatar.models import CustomAvatar, SocialAvatar
-from dashboard.models import Bounty, BountyFulfillment, Interest, Profile, Tip, Tool, ToolVote
+from dashboard.models import (
+    Bounty, BountyFulfillment, Earning, FeedbackEntry, Interest, Profile, ProfileStats, Tip, Tool, ToolVote,
+    TribeMember, UserAction,
+)
 from economy.models import ConversionRate, Token
 from test_plus.test import TestCase
 
@@ -848,3 +852,142 @@ class DashboardModelsTest(TestCase):
         )
 
         assert bounty.total_reserved_length_label == '3 hours'
+
+
+class ProfileStatsTest(TestCase):
+    """Define tests for the incremental profile stats."""
+
+    def setUp(self):
+        """Perform setup for the testcase."""
+        self.profile = Profile.objects.create(
+            data={}, handle='streaker', created_on=datetime(2020, 7, 31, tzinfo=pytz.UTC)
+        )
+        self.stats = ProfileStats.objects.create(profile=self.profile)
+
+    def add_actions(self, *days):
+        for day in days:
+            UserAction.objects.create(
+                profile=self.profile, action='Visit', created_on=datetime(2020, 8, day, 12, tzinfo=pytz.UTC)
+            )
+
+    def add_earning(self, from_profile, to_profile):
+        Earning.objects.create(
+            from_profile=from_profile,
+            to_profile=to_profile,
+            source_type=ContentType.objects.get_for_model(Tip),
+            source_id=1,
+        )
+
+    def test_longest_streak(self):
+        """Test streaks only count weekdays and are extended across updates."""
+        # mon-wed streak, a weekend action, then a streak broken by thu and fri
+        self.add_actions(3, 4, 5, 8, 10, 11)
+        self.stats.update(today=date(2020, 8, 12))
+
+        assert self.stats.longest_streak == 3
+        assert self.stats.current_streak == 2
+        assert self.stats.get_longest_streak(today=date(2020, 8, 12)) == 3
+
+        # today's actions are pending until the day is over
+        self.add_actions(12)
+        self.stats.update(today=date(2020, 8, 12))
+        assert self.stats.pending_action_days == [date(2020, 8, 12)]
+        assert self.stats.longest_streak == 3
+
+        self.add_actions(13, 14)
+        self.stats.update(today=date(2020, 8, 14))
+        assert self.stats.longest_streak == 4
+        assert self.stats.get_longest_streak(today=date(2020, 8, 14)) == 5
+
+        stats = ProfileStats.objects.get(pk=self.stats.pk)
+        assert stats.get_longest_streak(today=date(2020, 8, 14)) == 5
+
+    def test_num_repeated_relationships(self):
+        """Test only the earnings created since the last update are counted."""
+        funder = Profile.objects.create(data={}, handle='funder')
+        hunter = Profile.objects.create(data={}, handle='hunter')
+        self.add_earning(funder, self.profile)
+        self.add_earning(self.profile, hunter)
+        self.stats.update()
+
+        assert self.stats.num_repeated_relationships == 0
+
+        self.add_earning(funder, self.profile)
+        self.add_earning(self.profile, funder)
+        self.add_earning(self.profile, hunter)
+        self.stats.update()
+
+        assert self.stats.relationship_counts == {'funder': 3, 'hunter': 2}
+        assert self.stats.num_repeated_relationships == 2
+        assert self.profile.calc_num_repeated_relationships() == 2
+
+    def test_late_earnings_are_counted_once(self):
+        """Test an earning committed with a pk below the watermark is counted, and only once."""
+        funder = Profile.objects.create(data={}, handle='funder')
+        self.add_earning(funder, self.profile)
+        self.stats.update()
+        late = Earning.objects.create(
+            from_profile=funder,
+            to_profile=self.profile,
+            source_type=ContentType.objects.get_for_model(Tip),
+            source_id=2,
+        )
+        # an earning with a higher pk was counted before the late one committed
+        ProfileStats.objects.filter(pk=self.stats.pk).update(last_earning_id=late.pk + 1)
+
+        self.stats.update()
+        self.stats.update()
+
+        assert self.stats.relationship_counts == {'funder': 2}
+        assert late.pk in self.stats.counted_earning_ids
+
+
+class ProfileCountersTest(TestCase):
+    """Define tests for the denormalized profile counters."""
+
+    def setUp(self):
+        """Perform setup for the testcase."""
+        self.funder = Profile.objects.create(data={}, handle='funder')
+        self.hunter = Profile.objects.create(data={}, handle='hunter')
+
+    def test_counters_follow_related_writes(self):
+        """Test the counters are updated when earnings, follows and feedback are written."""
+        earning = Earning.objects.create(
+            from_profile=self.funder,
+            to_profile=self.hunter,
+            source_type=ContentType.objects.get_for_model(Tip),
+            source_id=1,
+        )
+        FeedbackEntry.objects.create(sender_profile=self.funder, receiver_profile=self.hunter, rating=4)
+        FeedbackEntry.objects.create(sender_profile=self.funder, receiver_profile=self.hunter, rating=5)
+
+        self.hunter.refresh_from_db()
+        assert self.hunter.earnings_count == 1
+        assert self.hunter.spent_count == 0
+        # earnings auto follow both ways
+        assert self.hunter.following_count == 1
+        assert self.hunter.follower_count == 1
+        assert float(self.hunter.average_rating) == 4.5
+
+        earning.delete()
+        TribeMember.objects.filter(profile=self.hunter).delete()
+        self.hunter.refresh_from_db()
+        assert self.hunter.earnings_count == 0
+        assert self.hunter.following_count == 0
+        assert self.hunter.follower_count == 1
+
+    def test_save_keeps_counters(self):
+        """Test saving a stale profile does not overwrite its counters."""
+        stale_hunter = Profile.objects.get(pk=self.hunter.pk)
+        TribeMember.objects.create(profile=self.funder, org=self.hunter)
+
+        stale_hunter.save()
+        stale_hunter.refresh_from_db()
+        assert stale_hunter.follower_count == 1
+
+    def test_hot_field_save(self):
+        """Test saving only the last visit skips the derived fields."""
+        self.hunter.last_visit = timezone.now()
+
+        with self.assertNumQueries(1):
+            self.hunter.save(update_fields=['last_visit', 'modified_on'])
@@ -26,11 +26,11 @@ from django.utils import timezone
 
 import ipfshttpclient
 import pytest
-from dashboard.models import Bounty, Profile
+from dashboard.models import Activity, Bounty, BountyFulfillment, Earning, Profile
 from dashboard.utils import (
-    IPFSCantConnectException, apply_new_bounty_deadline, clean_bounty_url, create_user_action, get_bounty, get_ipfs,
-    get_ordinal_repr, get_token_recipient_senders, get_web3, getBountyContract, humanize_event_name, ipfs_cat_ipfsapi,
-    re_market_bounty, release_bounty_to_the_public,
+    IPFSCantConnectException, apply_new_bounty_deadline, block_timestamps, clean_bounty_url, create_user_action,
+    get_bounty, get_ipfs, get_ordinal_repr, get_token_recipient_senders, get_tx_statuses, get_web3, getBountyContract,
+    humanize_event_name, ipfs_cat_ipfsapi, re_market_bounty, release_bounty_to_the_public, sync_payouts,
 )
 from eth_utils import is_address
 from pytz import UTC
@@ -56,6 +56,48 @@ class DashboardUtilsTest(TestCase):
             else:
                 assert web3_provider.providers[0].endpoint_uri == f'https://{network}.infura.io'
 
+    @staticmethod
+    def test_get_web3_reuses_sessions():
+        """Test the dashboard utility get_web3 returns the same session for a network."""
+        assert get_web3('mainnet') is get_web3('mainnet')
+        assert get_web3('mainnet') is not get_web3('rinkeby')
+
+    @staticmethod
+    @patch('dashboard.utils.batch_web3_requests')
+    def test_get_tx_statuses(mock_batch_web3_requests):
+        """Test the dashboard utility get_tx_statuses reads the statuses from batched receipts."""
+        receipts = {
+            '0x1': {'status': '0x1', 'blockNumber': '0xa', 'blockHash': '0xb'},
+            '0x2': {'status': '0x0', 'blockNumber': '0xa', 'blockHash': '0xb'},
+            '0x3': None,
+            '0x4': None,
+            '0x5': Exception('timeout'),
+        }
+        block_calls = []
+
+        def batch_web3_requests(network, calls):
+            if calls and calls[0][0] == 'eth_getTransactionReceipt':
+                return [receipts[params[0]] for __, params in calls]
+            block_calls.extend(calls)
+            return [{'timestamp': '0x5f000000'} for __ in calls]
+
+        mock_batch_web3_requests.side_effect = batch_web3_requests
+        block_timestamps.clear()
+        now = timezone.now()
+        created_on = {'0x4': now - timezone.timedelta(days=5)}
+        statuses = get_tx_statuses(['0x1', '0x2', '0x3', '0x4', '0x5', 'override'], 'mainnet', created_on)
+
+        assert {txid: status for txid, (status, __) in statuses.items()} == {
+            '0x1': 'success', '0x2': 'error', '0x3': 'pending', '0x4': 'dropped', '0x5': 'unknown', 'override': 'success',
+        }
+        assert statuses['0x1'][1] == timezone.datetime.fromtimestamp(0x5f000000).replace(tzinfo=UTC)
+        assert statuses['0x3'][1] is None
+        assert len(block_calls) == 1
+
+        # block timestamps are memoized
+        get_tx_statuses(['0x1'], 'mainnet')
+        assert len(block_calls) == 1
+
     @staticmethod
     def test_get_bounty_contract():
         assert getBountyContract('mainnet').address == "0x2af47a65da8CD66729b4209C22017d6A5C2d2400"
@@ -317,3 +359,54 @@ class DashboardUtilsTest(TestCase):
             recipient_address="0x57b4Af69127C69ec3248886bBa6deBAB7994695a")
 
         assert len(empty_addresses) == 0
+
+    @staticmethod
+    @patch('dashboard.sync.etc.get_explorer_json')
+    def test_sync_payouts(mock_get_explorer_json):
+        """Test the payouts found on the explorer are saved and a transaction is only matched once."""
+        funder_address = '0x00000000000000000000000000000000000000aa'
+        fulfiller_address = '0x00000000000000000000000000000000000000bb'
+
+        def get_explorer_json(url):
+            if 'action=txlist' in url:
+                return {'message': 'OK', 'result': [
+                    {'hash': '0xpaid', 'from': funder_address, 'to': fulfiller_address, 'value': '1.0'},
+                ]}
+            return {'status': '1', 'result': {'blockNumber': '10', 'confirmations': '3'}}
+
+        mock_get_explorer_json.side_effect = lambda explorer, url: get_explorer_json(url)
+        bounty = Bounty.objects.create(
+            title='SyncPayoutsTest',
+            idx_status=0,
+            is_open=True,
+            web3_created=datetime(2008, 10, 31, tzinfo=UTC),
+            expires_date=datetime(2008, 11, 30, tzinfo=UTC),
+            github_url='https://github.com/gitcoinco/web/issues/12345678',
+            bounty_owner_address=funder_address,
+            raw_data={}
+        )
+        funder = Profile.objects.create(data={}, handle='funder')
+        fulfiller = Profile.objects.create(data={}, handle='fulfiller')
+        for _ in range(2):
+            BountyFulfillment.objects.create(
+                fulfiller_address=fulfiller_address,
+                bounty=bounty,
+                profile=fulfiller,
+                funder_profile=funder,
+                payout_type='qr',
+                payout_status='pending',
+                payout_tx_id='',
+                payout_amount=1,
+                token_name='ETC',
+            )
+
+        stats = sync_payouts(BountyFulfillment.objects.filter(payout_status='pending'), max_workers=2)
+
+        assert stats == {'etc': {'checked': 2, 'updated': 1}}
+        paid = BountyFulfillment.objects.get(payout_tx_id='0xpaid')
+        assert paid.payout_status == 'done'
+        assert paid.accepted
+        assert BountyFulfillment.objects.filter(payout_status='pending', payout_tx_id='').count() == 1
+        assert Activity.objects.filter(activity_type='worker_paid', bounty=bounty).count() == 1
+        earning = Earning.objects.get(source_type__model='bountyfulfillment', source_id=paid.pk)
+        assert earning.to_profile == fulfiller
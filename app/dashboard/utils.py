@@ -21,6 +21,9 @@ import base64
 import json
 import logging
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from json.decoder import JSONDecodeError
 
 from django.conf import settings
@@ -37,10 +40,12 @@ from dashboard.helpers import UnsupportedSchemaException, normalize_url, process
 from dashboard.models import (
     Activity, BlockedUser, Bounty, BountyFulfillment, HackathonRegistration, Profile, UserAction,
 )
-from dashboard.sync.celo import sync_celo_payout
-from dashboard.sync.etc import sync_etc_payout
-from dashboard.sync.eth import sync_eth_payout
-from dashboard.sync.zil import sync_zil_payout
+from dashboard.sync.celo import get_celo_payout_update, sync_celo_payout
+from dashboard.sync.etc import get_etc_payout_update, sync_etc_payout
+from dashboard.sync.eth import get_eth_payout_update, sync_eth_payout
+from dashboard.sync.helpers import apply_payout_update, record_payout_activity
+from dashboard.sync.zil import get_zil_payout_update, sync_zil_payout
+from django_bulk_update.helper import bulk_update
 from eth_abi import decode_single, encode_single
 from eth_utils import keccak, to_checksum_address, to_hex
 from gas.utils import conf_time_spread, eth_usd_conv_rate, gas_advisories, recommend_min_gas_price_to_confirm_in_time
@@ -59,6 +64,28 @@ logger = logging.getLogger(__name__)
 SEMAPHORE_BOUNTY_SALT = '1'
 SEMAPHORE_BOUNTY_NS = 'bounty_processor'
 
+# seconds after which a JSON-RPC request is abandoned
+WEB3_TIMEOUT = 10
+# number of JSON-RPC calls sent in a single batch request
+WEB3_BATCH_SIZE = 100
+web3_instances = {}
+web3_instances_lock = threading.Lock()
+web3_socket_instances = threading.local()
+web3_batch_sessions = threading.local()
+# number of block timestamps memoized by each process
+BLOCK_TIMESTAMP_CACHE_SIZE = 10000
+block_timestamps = OrderedDict()
+block_timestamps_lock = threading.Lock()
+
+# number of payouts whose status is checked on the block explorers at the same time
+PAYOUT_SYNC_WORKERS = 16
+PAYOUT_CHAINS = {
+    'eth': get_eth_payout_update,
+    'etc': get_etc_payout_update,
+    'celo': get_celo_payout_update,
+    'zil': get_zil_payout_update,
+}
+
 
 def all_sendcryptoasset_models():
     from revenue.models import DigitalGoodPurchase
@@ -271,40 +298,138 @@ def ipfs_cat_requests(key):
         return None, 500
 
 
-def get_web3(network, sockets=False):
-    """Get a Web3 session for the provided network.
+def get_web3_endpoint(network, sockets=False):
+    """Get the JSON-RPC endpoint of the provided network.
 
     Attributes:
-        network (str): The network to establish a session with.
-
-    Raises:
-        UnsupportedNetworkException: The exception is raised if the method
-            is passed an invalid network.
+        network (str): The network to get the endpoint of.
+        sockets (bool): Whether to get the websocket endpoint.
 
     Returns:
-        web3.main.Web3: A web3 instance for the provided network.
+        str: The endpoint uri.
 
     """
     if network in ['mainnet', 'rinkeby', 'ropsten']:
         if sockets:
             if settings.INFURA_USE_V3:
-                provider = WebsocketProvider(f'wss://{network}.infura.io/ws/v3/{settings.INFURA_V3_PROJECT_ID}')
-            else:
-                provider = WebsocketProvider(f'wss://{network}.infura.io/ws')
+                return f'wss://{network}.infura.io/ws/v3/{settings.INFURA_V3_PROJECT_ID}'
+            return f'wss://{network}.infura.io/ws'
+        if settings.INFURA_USE_V3:
+            return f'https://{network}.infura.io/v3/{settings.INFURA_V3_PROJECT_ID}'
+        return f'https://{network}.infura.io'
+    return "http://testrpc:8545"
+
+
+def create_web3(network, sockets=False):
+    """Create a new Web3 session for the provided network."""
+    endpoint_uri = get_web3_endpoint(network, sockets)
+    if network in ['mainnet', 'rinkeby', 'ropsten']:
+        if sockets:
+            provider = WebsocketProvider(endpoint_uri)
         else:
-            if settings.INFURA_USE_V3:
-                provider = HTTPProvider(f'https://{network}.infura.io/v3/{settings.INFURA_V3_PROJECT_ID}')
-            else:
-                provider = HTTPProvider(f'https://{network}.infura.io')
+            provider = HTTPProvider(endpoint_uri, request_kwargs={'timeout': WEB3_TIMEOUT})
 
         w3 = Web3(provider)
         if network == 'rinkeby':
             w3.middleware_stack.inject(geth_poa_middleware, layer=0)
         return w3
-    elif network == 'localhost' or 'custom network':
-        return Web3(Web3.HTTPProvider("http://testrpc:8545", request_kwargs={'timeout': 60}))
+    return Web3(Web3.HTTPProvider(endpoint_uri, request_kwargs={'timeout': 60}))
 
-    raise UnsupportedNetworkException(network)
+
+def get_web3(network, sockets=False):
+    """Get a Web3 session for the provided network.
+
+    The sessions are created on first use and then reused: HTTP sessions are
+    shared by the whole process and keep their connections alive, websocket
+    sessions are reused within a thread since their connection can't be shared.
+
+    Attributes:
+        network (str): The network to establish a session with.
+        sockets (bool): Whether to use a websocket provider.
+
+    Raises:
+        UnsupportedNetworkException: The exception is raised if the method
+            is passed an invalid network.
+
+    Returns:
+        web3.main.Web3: A web3 instance for the provided network.
+
+    """
+    if sockets:
+        instances = getattr(web3_socket_instances, 'instances', None)
+        if instances is None:
+            instances = web3_socket_instances.instances = {}
+        if network not in instances:
+            instances[network] = create_web3(network, sockets=True)
+        return instances[network]
+
+    if network not in web3_instances:
+        with web3_instances_lock:
+            if network not in web3_instances:
+                web3_instances[network] = create_web3(network)
+    return web3_instances[network]
+
+
+def get_web3_for_endpoint(endpoint_uri, sockets=False):
+    """Get the Web3 session of a JSON-RPC endpoint, reused like the sessions of get_web3.
+
+    Attributes:
+        endpoint_uri (str): The endpoint to establish a session with.
+        sockets (bool): Whether the endpoint is a websocket endpoint.
+
+    Returns:
+        web3.main.Web3: A web3 instance for the provided endpoint.
+
+    """
+    if sockets:
+        instances = getattr(web3_socket_instances, 'instances', None)
+        if instances is None:
+            instances = web3_socket_instances.instances = {}
+        if endpoint_uri not in instances:
+            instances[endpoint_uri] = Web3(WebsocketProvider(endpoint_uri))
+        return instances[endpoint_uri]
+
+    if endpoint_uri not in web3_instances:
+        with web3_instances_lock:
+            if endpoint_uri not in web3_instances:
+                web3_instances[endpoint_uri] = Web3(HTTPProvider(endpoint_uri, request_kwargs={'timeout': WEB3_TIMEOUT}))
+    return web3_instances[endpoint_uri]
+
+
+def batch_web3_requests(network, calls):
+    """Send JSON-RPC calls to the provided network in batches.
+
+    Attributes:
+        network (str): The network to send the calls to.
+        calls (list): The (method, params) of each call.
+
+    Returns:
+        list: The result of each call, or the exception raised by the calls which failed.
+
+    """
+    session = getattr(web3_batch_sessions, 'session', None)
+    if not session:
+        session = web3_batch_sessions.session = requests.Session()
+
+    results = [Exception('no response')] * len(calls)
+    for start in range(0, len(calls), WEB3_BATCH_SIZE):
+        payload = [
+            {'jsonrpc': '2.0', 'id': start + index, 'method': method, 'params': params}
+            for index, (method, params) in enumerate(calls[start:start + WEB3_BATCH_SIZE])
+        ]
+        try:
+            response = session.post(get_web3_endpoint(network), json=payload, timeout=WEB3_TIMEOUT).json()
+        except Exception as e:
+            logger.warning(f'batch_web3_requests: {len(payload)} calls to {network} failed - {e}')
+            results[start:start + len(payload)] = [e] * len(payload)
+            continue
+        for item in response if isinstance(response, list) else []:
+            if isinstance(item.get('id'), int) and 0 <= item['id'] < len(calls):
+                if 'error' in item:
+                    results[item['id']] = Exception(item['error'])
+                else:
+                    results[item['id']] = item.get('result')
+    return results
 
 
 def get_profile_from_referral_code(code):
@@ -504,6 +629,97 @@ def sync_payout(fulfillment):
             sync_zil_payout(fulfillment)
 
 
+def get_payout_chain(fulfillment):
+    """Get the chain on which the payout of a fulfillment is checked, as used by sync_payout."""
+    token_name = fulfillment.token_name
+    if not token_name:
+        token_name = fulfillment.bounty.token_name
+
+    if fulfillment.payout_type == 'web3_modal':
+        return 'eth'
+    elif fulfillment.payout_type == 'qr':
+        if token_name == 'ETC':
+            return 'etc'
+        elif token_name == 'CELO' or token_name == 'cUSD':
+            return 'celo'
+        elif token_name == 'ZIL':
+            return 'zil'
+    return None
+
+
+def sync_payouts(fulfillments, max_workers=PAYOUT_SYNC_WORKERS):
+    """Reconcile the payouts of many fulfillments at once.
+
+    The fulfillments are grouped by chain and their payouts are checked concurrently,
+    within the rate limit of each block explorer. A payout which can't be checked is
+    left as is for the next run. The updates are then saved in bulk, except for the
+    payouts found done, which are saved one by one to record their Earning.
+
+    Args:
+        fulfillments (QuerySet): The BountyFulfillment objects to reconcile.
+        max_workers (int): The number of payouts checked at the same time.
+
+    Returns:
+        dict: The number of fulfillments checked and updated, by chain.
+
+    """
+    fulfillments_by_chain = {}
+    for fulfillment in fulfillments.select_related('bounty', 'profile', 'funder_profile'):
+        chain = get_payout_chain(fulfillment)
+        if chain:
+            fulfillments_by_chain.setdefault(chain, []).append(fulfillment)
+
+    used_txns = set(BountyFulfillment.objects.filter(
+        token_name__in=['ETC', 'CELO', 'cUSD', 'ZIL'],
+    ).values_list('payout_tx_id', 'token_name'))
+
+    def get_update(chain, fulfillment):
+        try:
+            return PAYOUT_CHAINS[chain](fulfillment, used_txns=used_txns)
+        except Exception as e:
+            logger.warning(f'sync_payouts: could not check {chain} payout of fulfillment {fulfillment.pk}: {e}')
+            return {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            (chain, fulfillment, executor.submit(get_update, chain, fulfillment))
+            for chain, chain_fulfillments in fulfillments_by_chain.items()
+            for fulfillment in chain_fulfillments
+        ]
+
+    stats = {chain: {'checked': len(chain_fulfillments), 'updated': 0} for chain, chain_fulfillments in fulfillments_by_chain.items()}
+    updated_fulfillments = []
+    paid_fulfillments = []
+    for chain, fulfillment, future in futures:
+        update = future.result()
+        if update.get('payout_tx_id'):
+            # two fulfillments may have matched the same transaction, only the first one gets it
+            txn = (update['payout_tx_id'], fulfillment.token_name)
+            if txn in used_txns:
+                continue
+            used_txns.add(txn)
+        if not update:
+            continue
+
+        if apply_payout_update(fulfillment, update):
+            paid_fulfillments.append(fulfillment)
+        else:
+            fulfillment.modified_on = timezone.now()
+            updated_fulfillments.append(fulfillment)
+        stats[chain]['updated'] += 1
+
+    bulk_update(
+        updated_fulfillments,
+        update_fields=['payout_tx_id', 'payout_status', 'accepted_on', 'accepted', 'modified_on'],
+        batch_size=500,
+    )
+    for fulfillment in paid_fulfillments:
+        # saved one by one so psave_bounty_fulfill records the Earning of the payout
+        fulfillment.save()
+        record_payout_activity(fulfillment)
+    return stats
+
+
 def get_bounty_id(issue_url, network):
     issue_url = normalize_url(issue_url)
     bounty_id = get_bounty_id_from_db(issue_url, network)
@@ -800,13 +1016,37 @@ def profile_helper(handle, suppress_profile_hidden_exception=False, current_user
 def is_valid_eth_address(eth_address):
     return (bool(re.match(r"^0x[a-zA-Z0-9]{40}$", eth_address)) or eth_address == "0x0")
 
+def get_tx_status_from_receipt(tx, created_on):
+    """Get the status of a transaction from its receipt, as returned by web3 or a JSON-RPC batch."""
+    from django.utils import timezone
+
+    DROPPED_DAYS = 4
+
+    if not tx:
+        drop_dead_date = created_on + timezone.timedelta(days=DROPPED_DAYS)
+        if timezone.now() > drop_dead_date:
+            return 'dropped'
+        return 'pending'
+    elif tx and 'status' not in tx.keys():
+        if bool(tx['blockNumber']) and bool(tx['blockHash']):
+            return 'success'
+        raise Exception("got a tx but no blockNumber or blockHash")
+
+    tx_status = tx['status']
+    if isinstance(tx_status, str):
+        tx_status = int(tx_status, 16)
+    if tx_status == 1:
+        return 'success'
+    elif tx_status == 0:
+        return 'error'
+    return 'unknown'
+
+
 def get_tx_status(txid, network, created_on):
     from django.utils import timezone
     from dashboard.utils import get_web3
     import pytz
 
-    DROPPED_DAYS = 4
-
     # get status
     status = None
     if txid == 'override':
@@ -814,23 +1054,7 @@ def get_tx_status(txid, network, created_on):
     try:
         web3 = get_web3(network)
         tx = web3.eth.getTransactionReceipt(txid)
-        if not tx:
-            drop_dead_date = created_on + timezone.timedelta(days=DROPPED_DAYS)
-            if timezone.now() > drop_dead_date:
-                status = 'dropped'
-            else:
-                status = 'pending'
-        elif tx and 'status' not in tx.keys():
-            if bool(tx['blockNumber']) and bool(tx['blockHash']):
-                status = 'success'
-            else:
-                raise Exception("got a tx but no blockNumber or blockHash")
-        elif tx.status == 1:
-            status = 'success'
-        elif tx.status == 0:
-            status = 'error'
-        else:
-            status = 'unknown'
+        status = get_tx_status_from_receipt(tx, created_on)
     except Exception as e:
         logger.debug(f'Failure in get_tx_status for {txid} - ({e})')
         status = 'unknown'
@@ -839,14 +1063,120 @@ def get_tx_status(txid, network, created_on):
     timestamp = None
     try:
         if tx:
-            block = web3.eth.getBlock(tx['blockNumber'])
-            timestamp = block.timestamp
-            timestamp = timezone.datetime.fromtimestamp(timestamp).replace(tzinfo=pytz.UTC)
+            block_number = tx['blockNumber']
+            timestamp = get_cached_block_timestamp(network, block_number)
+            if not timestamp:
+                block = web3.eth.getBlock(block_number)
+                timestamp = block.timestamp
+                timestamp = timezone.datetime.fromtimestamp(timestamp).replace(tzinfo=pytz.UTC)
+                cache_block_timestamp(network, block_number, timestamp)
     except:
         pass
     return status, timestamp
 
 
+def get_cached_block_timestamp(network, block_number):
+    """Get the memoized timestamp of a block, or None if it isn't known yet."""
+    if isinstance(block_number, str):
+        block_number = int(block_number, 16)
+    with block_timestamps_lock:
+        timestamp = block_timestamps.get((network, block_number))
+        if timestamp:
+            block_timestamps.move_to_end((network, block_number))
+        return timestamp
+
+
+def cache_block_timestamp(network, block_number, timestamp):
+    """Memoize the timestamp of a block, blocks being immutable once mined."""
+    if isinstance(block_number, str):
+        block_number = int(block_number, 16)
+    with block_timestamps_lock:
+        block_timestamps[(network, block_number)] = timestamp
+        if len(block_timestamps) > BLOCK_TIMESTAMP_CACHE_SIZE:
+            block_timestamps.popitem(last=False)
+
+
+def get_block_timestamps(network, block_numbers):
+    """Get the timestamps of blocks of a network, fetching the unknown ones with batched JSON-RPC calls.
+
+    Attributes:
+        network (str): The network of the blocks.
+        block_numbers (list): The hex encoded numbers of the blocks.
+
+    Returns:
+        dict: The timestamp of each block which could be fetched, by block number.
+
+    """
+    import pytz
+
+    timestamps = {}
+    for block_number in set(block_numbers):
+        timestamp = get_cached_block_timestamp(network, block_number)
+        if timestamp:
+            timestamps[block_number] = timestamp
+
+    missing_block_numbers = [block_number for block_number in set(block_numbers) if block_number not in timestamps]
+    blocks = batch_web3_requests(
+        network, [('eth_getBlockByNumber', [block_number, False]) for block_number in missing_block_numbers]
+    )
+    for block_number, block in zip(missing_block_numbers, blocks):
+        if block and not isinstance(block, Exception):
+            timestamp = timezone.datetime.fromtimestamp(int(block['timestamp'], 16)).replace(tzinfo=pytz.UTC)
+            cache_block_timestamp(network, block_number, timestamp)
+            timestamps[block_number] = timestamp
+    return timestamps
+
+
+def get_tx_statuses(txids, network, created_on=None):
+    """Get the status of many transactions of a network with batched JSON-RPC calls.
+
+    Attributes:
+        txids (list): The ids of the transactions.
+        network (str): The network of the transactions.
+        created_on (datetime or dict): When the transactions were created, or
+            the creation date of each transaction by txid. Defaults to now.
+
+    Returns:
+        dict: The (status, timestamp) of each transaction by txid, as returned by get_tx_status.
+
+    """
+    if not isinstance(created_on, dict):
+        created_on = {txid: created_on or timezone.now() for txid in txids}
+
+    txids = list(dict.fromkeys(txids))
+    lookup_txids = [txid for txid in txids if txid != 'override']
+    receipts = {
+        txid: receipt
+        for txid, receipt in zip(lookup_txids, batch_web3_requests(
+            network, [('eth_getTransactionReceipt', [txid]) for txid in lookup_txids]
+        ))
+        if not isinstance(receipt, Exception)
+    }
+    timestamps = get_block_timestamps(
+        network, [receipt['blockNumber'] for receipt in receipts.values() if receipt and receipt.get('blockNumber')]
+    )
+
+    statuses = {}
+    for txid in txids:
+        if txid == 'override':
+            statuses[txid] = ('success', None)  # overridden by admin
+            continue
+
+        if txid not in receipts:
+            statuses[txid] = ('unknown', None)
+            continue
+
+        tx = receipts[txid]
+        try:
+            status = get_tx_status_from_receipt(tx, created_on.get(txid) or timezone.now())
+        except Exception as e:
+            logger.debug(f'Failure in get_tx_statuses for {txid} - ({e})')
+            status = 'unknown'
+        timestamp = timestamps.get(tx['blockNumber']) if tx and tx.get('blockNumber') else None
+        statuses[txid] = (status, timestamp)
+    return statuses
+
+
 def is_blocked(handle):
     # check admin block list
     is_on_blocked_list = BlockedUser.objects.filter(handle__icontains=handle, active=True).exists()
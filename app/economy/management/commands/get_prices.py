@@ -19,16 +19,17 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.utils import timezone
 
 import ccxt
 import cryptocompare as cc
 import requests
 from dashboard.models import Bounty, Tip
-from economy.models import ConversionRate
+from economy.models import ConversionRate, get_time
+from economy.utils import store_conversion_rates
 from grants.models import Contribution
 from kudos.models import KudosTransfer
 from perftools.models import JSONStore
@@ -36,6 +37,9 @@ from websocket import create_connection
 
 logger = logging.getLogger(__name__)
 
+# timestamps checked per query for existing historical rates
+HISTORICAL_RATE_CHUNK_SIZE = 1000
+
 
 def get_config(view, key):
     try:
@@ -45,23 +49,26 @@ def get_config(view, key):
         return []
 
 
-def stablecoins():
+def stablecoins(now):
+    rates = []
     for to_currency in settings.STABLE_COINS:
         if to_currency == 'to_currency':
             continue
         from_amount = 1
         to_amount = 1
         from_currency = 'USDT'
-        ConversionRate.objects.create(
+        rates.append(ConversionRate(
             from_amount=from_amount,
             to_amount=to_amount,
             source='stablecoin',
             from_currency=from_currency,
-            to_currency=to_currency)
+            to_currency=to_currency,
+            timestamp=now))
         print(f'stablecoin: {from_currency}=>{to_currency}:{to_amount}')
+    return rates
 
 
-def etherdelta():
+def etherdelta(now):
     """Handle pulling market data from Etherdelta."""
     count = 0
     result = ''
@@ -89,6 +96,7 @@ def etherdelta():
         print('Failed to retrieve etherdelta ticker data!')
 
     # etherdelta
+    rates = []
     for pair, result in tickers.items():
         from_currency = pair.split('_')[1]
         to_currency = pair.split('_')[0]
@@ -96,44 +104,46 @@ def etherdelta():
         from_amount = 1
         to_amount = (result['bid'] + result['ask']) / 2
         try:
-            ConversionRate.objects.create(
+            rates.append(ConversionRate(
                 from_amount=from_amount,
                 to_amount=to_amount,
                 source='etherdelta',
                 from_currency=from_currency,
-                to_currency=to_currency)
+                to_currency=to_currency,
+                timestamp=now))
             print(f'Etherdelta: {from_currency}=>{to_currency}:{to_amount}')
         except Exception as e:
             logger.exception(e)
+    return rates
 
 
-def polo():
-
-    polo_blacklist = get_config('polo', 'blacklist')
-
+def polo(now, polo_blacklist):
     """Handle pulling market data from Poloneix."""
+    rates = []
     tickers = ccxt.poloniex().load_markets()
     for pair, result in tickers.items():
         from_currency = pair.split('/')[0]
         to_currency = pair.split('/')[1]
 
         if from_currency in polo_blacklist:
-            return
+            continue
         if to_currency in polo_blacklist:
-            return
+            continue
 
         from_amount = 1
         try:
             to_amount = (float(result['info']['highestBid']) + float(result['info']['lowestAsk'])) / 2
-            ConversionRate.objects.create(
+            rates.append(ConversionRate(
                 from_amount=from_amount,
                 to_amount=to_amount,
                 source='poloniex',
                 from_currency=from_currency,
-                to_currency=to_currency)
+                to_currency=to_currency,
+                timestamp=now))
             print(f'Poloniex: {from_currency}=>{to_currency}:{to_amount}')
         except Exception as e:
             print(e)
+    return rates
 
 
 def refresh_bounties():
@@ -150,71 +160,70 @@ def refresh_bounties():
             bounty.save()
 
 
-def refresh_conv_rate(when, token_name):
-    to_currency = 'USDT'
-    conversion_rate = ConversionRate.objects.filter(
-        from_currency=token_name,
-        to_currency=to_currency,
-        timestamp=when
-    )
+def get_stored_usdt_timestamps(token_names, whens):
+    """Get the (token, timestamp) pairs which already have a USDT conversion rate, in chunked queries."""
+    whens = list(whens)
+    stored = set()
+    for offset in range(0, len(whens), HISTORICAL_RATE_CHUNK_SIZE):
+        stored.update(ConversionRate.objects.filter(
+            from_currency__in=token_names,
+            to_currency='USDT',
+            timestamp__in=whens[offset:offset + HISTORICAL_RATE_CHUNK_SIZE],
+        ).values_list('from_currency', 'timestamp'))
+    return stored
 
-    if not conversion_rate:  # historical ConversionRate for the given bounty does not exist yet
-        try:
-            price = cc.get_historical_price(token_name, to_currency, when)
 
-            to_amount = price[token_name][to_currency]
-            ConversionRate.objects.create(
-                from_amount=1,
-                to_amount=to_amount,
-                source='cryptocompare',
-                from_currency=token_name,
-                to_currency=to_currency,
-                timestamp=when,
-            )
-            print(f'Cryptocompare: {token_name}=>{to_currency}:{to_amount}')
-        except Exception as e:
-            logger.exception(e)
+def get_historical_conv_rate(when, token_name):
+    to_currency = 'USDT'
+    try:
+        price = cc.get_historical_price(token_name, to_currency, when)
+
+        to_amount = price[token_name][to_currency]
+        print(f'Cryptocompare: {token_name}=>{to_currency}:{to_amount}')
+        return ConversionRate(
+            from_amount=1,
+            to_amount=to_amount,
+            source='cryptocompare',
+            from_currency=token_name,
+            to_currency=to_currency,
+            timestamp=when,
+        )
+    except Exception as e:
+        logger.exception(e)
 
 
-def cryptocompare():
+def cryptocompare(now, cryptocompare_pulllist, cryptocompare_blacklist):
     """Handle pulling market data from CryptoCompare.
 
-    Updates ConversionRates only if data not available.
+    Gets ConversionRates only if data not available.
 
     """
-
-    cryptocompare_pulllist = get_config('cryptocompare', 'always_pull_list')
-    cryptocompare_blacklist = get_config('cryptocompare', 'blacklist')
-
-    pull_cryptocompare_tokens_only = cryptocompare_pulllist
-    for token_name in pull_cryptocompare_tokens_only:
-        refresh_conv_rate(timezone.now(), token_name)
-
-    for bounty in Bounty.objects.current():
-        print(f'CryptoCompare Bounty {bounty.pk}')
-        if bounty.token_name not in cryptocompare_blacklist:
-            refresh_conv_rate(bounty.web3_created, bounty.token_name)
-
-    for tip in Tip.objects.all():
-        print(f'CryptoCompare Tip {tip.pk}')
-        if tip.tokenName not in cryptocompare_blacklist:
-            refresh_conv_rate(tip.created_on, tip.tokenName)
-
-    for obj in KudosTransfer.objects.all():
-        print(f'CryptoCompare KT {obj.pk}')
-        if obj.tokenName not in cryptocompare_blacklist:
-            refresh_conv_rate(obj.created_on, obj.tokenName)
-
-    for obj in Contribution.objects.all():
-        print(f'CryptoCompare GrantContrib {obj.pk}')
-        if obj.subscription.token_symbol not in cryptocompare_blacklist:
-            refresh_conv_rate(obj.created_on, obj.subscription.token_symbol)
-
-
-def uniswap():
+    wanted = [(token_name, now) for token_name in cryptocompare_pulllist]
+    wanted += [(token_name, when) for when, token_name in Bounty.objects.current().values_list('web3_created', 'token_name')]
+    wanted += [(token_name, when) for when, token_name in Tip.objects.values_list('created_on', 'tokenName')]
+    wanted += [(token_name, when) for when, token_name in KudosTransfer.objects.values_list('created_on', 'tokenName')]
+    wanted += [
+        (token_name, when)
+        for when, token_name in Contribution.objects.values_list('created_on', 'subscription__token_symbol')
+    ]
+    wanted = {
+        (token_name, when) for token_name, when in wanted
+        if token_name and when and token_name not in cryptocompare_blacklist
+    }
+
+    # historical ConversionRates which already exist are not pulled again
+    stored = get_stored_usdt_timestamps({token_name for token_name, _ in wanted}, {when for _, when in wanted})
+    rates = []
+    for token_name, when in sorted(wanted - stored, key=lambda item: item[1]):
+        rate = get_historical_conv_rate(when, token_name)
+        if rate:
+            rates.append(rate)
+    return rates
+
+
+def uniswap(now, uniswap_whitelist, uniswap_blacklist):
     """Hangle pulling market data from Uniswap using its subgraph node on mainnet."""
-    uniswap_whitelist = get_config('uniswap', 'whitelist')
-    uniswap_blacklist = get_config('uniswap', 'blacklist')
+    rates = []
     endpoint = 'https://api.thegraph.com/subgraphs/name/graphprotocol/uniswap'
     query_limit = 100
     skip = 0
@@ -255,21 +264,23 @@ def uniswap():
                         if token_name == 'ETH':
                             continue # dont pull ETH/ETH and ETH/USD pricing
                         to_amount = (float(exchange['price']) + float(exchange['lastPrice'])) / 2.
-                        ConversionRate.objects.create(
+                        to_amount_usd = (float(exchange['priceUSD']) + float(exchange['lastPriceUSD'])) / 2.
+                        rates.append(ConversionRate(
                             from_amount=1,
                             to_amount=to_amount,
                             source='uniswap',
                             from_currency='ETH',
-                            to_currency=token_name)
+                            to_currency=token_name,
+                            timestamp=now))
                         print(f'Uniswap: ETH=>{token_name}:{to_amount}')
 
-                        to_amount_usd = (float(exchange['priceUSD']) + float(exchange['lastPriceUSD'])) / 2.
-                        ConversionRate.objects.create(
+                        rates.append(ConversionRate(
                             from_amount=1,
                             to_amount=to_amount_usd,
                             source='uniswap',
                             from_currency=token_name,
-                            to_currency='USDT')
+                            to_currency='USDT',
+                            timestamp=now))
                         print(f'Uniswap: {token_name}=>USDT:{to_amount_usd}')
                     except Exception as e:
                         print(f'Error when storing Uniswap exchange data for token ${token_name}: ${str(e)}')
@@ -278,6 +289,18 @@ def uniswap():
                 raise Exception(f'Error when requesting Exchange data from Uniswap Graph node: {rs.reason}')
         except Exception as e:
             print(e)
+            break
+    return rates
+
+
+def fetch_rates(name, source, *args):
+    """Run a source in a worker thread, returning no rates if it fails."""
+    try:
+        print(name)
+        return source(*args)
+    except Exception as e:
+        print(e)
+        return []
 
 
 class Command(BaseCommand):
@@ -290,35 +313,34 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         """Get the latest currency rates."""
-        stablecoins()
-
-        try:
-            print('ED')
-            etherdelta()
-        except Exception as e:
-            print(e)
-
-        try:
-            print('polo')
-            polo()
-        except Exception as e:
-            print(e)
-
-
-        try:
-            print('uniswap')
-            uniswap()
-        except Exception as e:
-            print(e)
+        now = get_time()
+        # configurations are read here, as the sources run in threads without database access
+        sources = [
+            ('stablecoin', stablecoins, now),
+            ('ED', etherdelta, now),
+            ('polo', polo, now, get_config('polo', 'blacklist')),
+            ('uniswap', uniswap, now, get_config('uniswap', 'whitelist'), get_config('uniswap', 'blacklist')),
+        ]
+        with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+            # rates are collected in source order, so later sources win when pairs are quoted twice
+            rates = [rate for source_rates in executor.map(lambda source: fetch_rates(*source), sources) for rate in source_rates]
+
+        # the current prices are stored before the long pass over the historical prices
+        stored = store_conversion_rates(rates)
+        print(f'stored {len(stored)} of {len(rates)} conversion rates and their reverse rates')
 
         if not options['perform_obj_updates']:
             return
 
-        try:
-            print('cryptocompare')
-            cryptocompare()
-        except Exception as e:
-            print(e)
+        rates = fetch_rates(
+            'cryptocompare',
+            cryptocompare,
+            now,
+            get_config('cryptocompare', 'always_pull_list'),
+            get_config('cryptocompare', 'blacklist'),
+        )
+        stored = store_conversion_rates(rates)
+        print(f'stored {len(stored)} of {len(rates)} cryptocompare conversion rates and their reverse rates')
 
         try:
             print('refresh')
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.4 on 2020-07-20 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('economy', '0003_auto_20200630_1304'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversionrate',
+            index=models.Index(fields=['from_currency', 'to_currency', 'timestamp'], name='conversionrate_pair_time'),
+        ),
+    ]
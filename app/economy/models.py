@@ -180,12 +180,29 @@ class ConversionRate(SuperModel):
     from_currency = models.CharField(max_length=30, db_index=True)
     to_currency = models.CharField(max_length=30, db_index=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['from_currency', 'to_currency', 'timestamp'], name='conversionrate_pair_time'),
+        ]
+
     def __str__(self):
         """Define the string representation of a conversion rate."""
         decimals = 3
         return f"{round(self.from_amount, decimals)} {self.from_currency} => {round(self.to_amount, decimals)} " \
                f"{self.to_currency} ({self.timestamp.strftime('%m/%d/%Y')} {naturaltime(self.timestamp)}, from {self.source})"
 
+    def get_reverse(self):
+        """Get the unsaved conversion rate of the inverse pair."""
+        # 1 / # 0.000979
+        return ConversionRate(
+            from_amount=float(self.to_amount) / float(self.from_amount),
+            to_amount=1,
+            timestamp=self.timestamp,
+            source=self.source,
+            from_currency=self.to_currency,
+            to_currency=self.from_currency,
+        )
+
 
 # method for updating
 @receiver(post_save, sender=ConversionRate, dispatch_uid="ReverseConversionRate")
@@ -193,18 +210,14 @@ def reverse_conversion_rate(sender, instance, **kwargs):
     """Handle the reverse conversion rate signal during post-save."""
     # If this is a fixture, don't create reverse CR.
     if not kwargs.get('raw', False):
-        # 1 / # 0.000979
-        from_amount = float(instance.to_amount) / float(instance.from_amount)
-        to_amount = 1
-
-        # reverse transaction
+        reverse = instance.get_reverse()
         ConversionRate.objects.get_or_create(
-            from_amount=from_amount,
-            to_amount=to_amount,
-            timestamp=instance.timestamp,
-            source=instance.source,
-            from_currency=instance.to_currency,
-            to_currency=instance.from_currency
+            from_amount=reverse.from_amount,
+            to_amount=reverse.to_amount,
+            timestamp=reverse.timestamp,
+            source=reverse.source,
+            from_currency=reverse.from_currency,
+            to_currency=reverse.to_currency
         )
 
 
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""Define the in memory index of the ConversionRate history.
+
+Copyright (C) 2020 Gitcoin Core
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+import numpy as np
+from economy.models import ConversionRate
+
+# rows written by other processes are picked up after at most this many seconds
+RATE_SERIES_TTL = 60
+RATE_SERIES_READ_CHUNK_SIZE = 5000
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_microseconds(timestamp):
+    """Get the number of microseconds between the epoch and a timestamp.
+
+    Naive timestamps are read in the default timezone, the way the ORM reads them in filters.
+
+    Args:
+        timestamp (datetime): The timestamp.
+
+    Returns:
+        int: The microseconds since the epoch.
+
+    """
+    if not isinstance(timestamp, datetime) and isinstance(timestamp, date):
+        timestamp = datetime(timestamp.year, timestamp.month, timestamp.day)
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp, timezone.get_default_timezone())
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+
+class RateSeries:
+    """Define the history of the conversion rates of a currency pair, sorted by timestamp."""
+
+    def __init__(self, from_currency, to_currency):
+        self.from_currency = from_currency
+        self.to_currency = to_currency
+        self.lock = threading.Lock()
+        self.times = np.empty(0, dtype=np.int64)
+        self.rates = np.empty(0, dtype=np.float64)
+        self.count = 0
+        self.last_pk = 0
+        self.loaded_on = None
+        self.stale = True
+        self.reload = True
+
+    def get_queryset(self):
+        return ConversionRate.objects.filter(from_currency=self.from_currency, to_currency=self.to_currency)
+
+    def read_rows(self, rows):
+        """Read (pk, timestamp, from_amount, to_amount) rows into arrays of times and rates."""
+        rows = list(rows.values_list('pk', 'timestamp', 'from_amount', 'to_amount').iterator(
+            chunk_size=RATE_SERIES_READ_CHUNK_SIZE
+        ))
+        pks = np.array([row[0] for row in rows], dtype=np.int64)
+        times = np.array([to_microseconds(row[1]) for row in rows], dtype=np.int64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = np.array([row[3] for row in rows], dtype=np.float64) / np.array(
+                [row[2] for row in rows], dtype=np.float64
+            )
+        return pks, times, rates
+
+    def refresh(self):
+        """Load the rows written since the last refresh, or the whole history if rows were changed or removed."""
+        # rows written while refreshing mark the series stale again
+        self.stale = False
+        reload, self.reload = self.reload, False
+        count = self.get_queryset().count()
+        if not reload:
+            pks, times, rates = self.read_rows(self.get_queryset().filter(pk__gt=self.last_pk))
+            # rows committed late with a lower pk, or removed by a rollback, go unnoticed by the pk watermark
+            if self.count + len(pks) != count:
+                reload = True
+            elif len(pks):
+                all_pks = np.concatenate([np.full(len(self.times), self.last_pk, dtype=np.int64), pks])
+                all_times = np.concatenate([self.times, times])
+                order = np.lexsort((all_pks, all_times))
+                self.times, self.rates = all_times[order], np.concatenate([self.rates, rates])[order]
+                self.last_pk = int(pks.max())
+                self.count = count
+        if reload:
+            pks, times, rates = self.read_rows(self.get_queryset())
+            order = np.lexsort((pks, times))
+            self.times, self.rates = times[order], rates[order]
+            self.last_pk = int(pks.max()) if len(pks) else 0
+            self.count = len(pks)
+        self.loaded_on = time.monotonic()
+
+    def ensure_fresh(self):
+        with self.lock:
+            if self.stale or self.loaded_on is None or time.monotonic() - self.loaded_on > RATE_SERIES_TTL:
+                self.refresh()
+            return self.times, self.rates
+
+    def rates_at(self, timestamps):
+        """Get the rates at or before each timestamp.
+
+        Args:
+            timestamps (list of datetime): The timestamps. The latest rate is used for None, or when
+                the series starts after the timestamp.
+
+        Returns:
+            numpy.ndarray: The rates, nan if the pair has no rate at all.
+
+        """
+        times, rates = self.ensure_fresh()
+        if not len(times):
+            return np.full(len(timestamps), np.nan)
+
+        latest = len(times) - 1
+        positions = np.full(len(timestamps), latest, dtype=np.int64)
+        dated = [i for i, timestamp in enumerate(timestamps) if timestamp]
+        if dated:
+            targets = np.array([to_microseconds(timestamps[i]) for i in dated], dtype=np.int64)
+            found = np.searchsorted(times, targets, side='right') - 1
+            positions[dated] = np.where(found >= 0, found, latest)
+        return rates[positions]
+
+    def rate_at(self, timestamp=None):
+        return float(self.rates_at([timestamp])[0])
+
+
+rate_series = {}
+rate_series_lock = threading.Lock()
+
+
+def get_rate_series(from_currency, to_currency):
+    """Get the series of a currency pair, loaded on first use."""
+    key = (from_currency, to_currency)
+    series = rate_series.get(key)
+    if series is None:
+        with rate_series_lock:
+            series = rate_series.setdefault(key, RateSeries(from_currency, to_currency))
+    return series
+
+
+def clear_rate_series():
+    """Drop every loaded series, so the next lookups read the database again."""
+    with rate_series_lock:
+        rate_series.clear()
+
+
+@receiver(post_save, sender=ConversionRate, dispatch_uid="ConversionRateSeriesSave")
+@receiver(post_delete, sender=ConversionRate, dispatch_uid="ConversionRateSeriesDelete")
+def mark_rate_series_stale(sender, instance, created=False, **kwargs):
+    """Refresh the series of a pair on its next lookup after one of its rates is written in this process."""
+    series = rate_series.get((instance.from_currency, instance.to_currency))
+    if series is not None:
+        series.stale = True
+        # rows updated in place or deleted are only picked up by a full reload
+        series.reload = series.reload or not created
@@ -17,12 +17,15 @@ You should have received a copy of the GNU Affero General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 """
+import math
 from datetime import datetime
 
 from django.test.client import RequestFactory
+from django.utils import timezone
 
 from economy.models import ConversionRate
-from economy.utils import convert_amount, etherscan_link
+from economy.rate_series import clear_rate_series
+from economy.utils import convert_amount, convert_amounts, etherscan_link, store_conversion_rates
 from test_plus.test import TestCase
 
 
@@ -32,6 +35,7 @@ class EconomyUtilsTest(TestCase):
     def setUp(self):
         """Perform setup for the testcase."""
         self.factory = RequestFactory()
+        clear_rate_series()
         ConversionRate.objects.create(
             from_amount=1,
             to_amount=5,
@@ -65,7 +69,92 @@ class EconomyUtilsTest(TestCase):
         result = convert_amount(2, 'ETH', 'USDT', datetime(2018, 1, 1))
         assert round(result, 1) == 10
 
+    def test_convert_amount_new_rate(self):
+        """Test the economy util convert_amount method picks up ConversionRates created after the first lookup."""
+        assert round(convert_amount(2, 'ETH', 'USDT'), 1) == 6
+        ConversionRate.objects.create(
+            from_amount=1,
+            to_amount=4,
+            source='etherdelta',
+            from_currency='ETH',
+            to_currency='USDT',
+        )
+        assert round(convert_amount(2, 'ETH', 'USDT'), 1) == 8
+        assert round(convert_amount(2, 'ETH', 'USDT', datetime(2018, 1, 1)), 1) == 10
+
+    def test_convert_amounts(self):
+        """Test the economy util convert_amounts method."""
+        result = convert_amounts(
+            [2, 2, 3, 4, 5],
+            ['ETH', 'WETH', 'DAI', 'ETH', 'FOO'],
+            [datetime(2018, 1, 1), None, None, datetime(2017, 1, 1), None],
+        )
+        assert [round(amount, 1) for amount in result[:4]] == [10, 6, 3, 12]
+        assert math.isnan(result[4])
+
     def test_etherscan_link(self):
         """Test the economy util etherscan_link method."""
         txid = '0xcb39900d98fa00de2936d2770ef3bfef2cc289328b068e580dc68b7ac1e2055b'
         assert etherscan_link(txid) == 'https://etherscan.io/tx/0xcb39900d98fa00de2936d2770ef3bfef2cc289328b068e580dc68b7ac1e2055b'
+
+
+class StoreConversionRatesTest(TestCase):
+    """Define tests for storing conversion rates in bulk."""
+
+    def setUp(self):
+        """Perform setup for the testcase."""
+        clear_rate_series()
+        self.now = timezone.now()
+        ConversionRate.objects.create(
+            from_amount=1,
+            to_amount=2,
+            source='etherdelta',
+            from_currency='ETH',
+            to_currency='USDT',
+            timestamp=self.now - timezone.timedelta(hours=1),
+        )
+
+    def rate(self, from_currency, to_currency, to_amount, timestamp):
+        return ConversionRate(
+            from_amount=1,
+            to_amount=to_amount,
+            source='uniswap',
+            from_currency=from_currency,
+            to_currency=to_currency,
+            timestamp=timestamp,
+        )
+
+    def test_store_conversion_rates(self):
+        """Test new rates are stored with their reverse rates, and unchanged rates are skipped."""
+        stored = store_conversion_rates([
+            self.rate('ETH', 'USDT', 2, self.now),
+            self.rate('ETH', 'OMG', 3, self.now),
+            self.rate('ETH', 'OMG', 4, self.now),
+        ])
+
+        assert sorted((rate.from_currency, rate.to_currency) for rate in stored) == [('ETH', 'OMG'), ('OMG', 'ETH')]
+        assert ConversionRate.objects.filter(from_currency='ETH', to_currency='OMG').get().to_amount == 4
+        assert round(convert_amount(1, 'OMG', 'ETH'), 2) == 0.25
+
+    def test_store_conversion_rates_skips_zero_quotes(self):
+        """Test zero quotes, and stored rows with a zero amount, don't stop the other rates from being stored."""
+        # the reverse rate saved by the signal has a zero from_amount
+        ConversionRate.objects.create(
+            from_amount=1,
+            to_amount=0,
+            source='uniswap',
+            from_currency='ETH',
+            to_currency='OMG',
+            timestamp=self.now - timezone.timedelta(hours=1),
+        )
+        stored = store_conversion_rates([
+            self.rate('ETH', 'BAT', 0, self.now),
+            self.rate('ETH', 'OMG', 4, self.now),
+        ])
+
+        assert sorted((rate.from_currency, rate.to_currency) for rate in stored) == [('ETH', 'OMG'), ('OMG', 'ETH')]
+
+    def test_store_conversion_rates_refreshes_old_rates(self):
+        """Test an unchanged rate is stored again once the stored one is old."""
+        stored = store_conversion_rates([self.rate('ETH', 'USDT', 2, self.now + timezone.timedelta(days=2))])
+        assert len(stored) == 2
@@ -10,7 +10,7 @@ from django.utils import timezone
 import requests
 from bs4 import BeautifulSoup
 from dashboard.abi import erc20_abi
-from dashboard.utils import get_tx_status, get_web3
+from dashboard.utils import get_tx_status, get_web3_for_endpoint
 from hexbytes import HexBytes
 from web3 import HTTPProvider, Web3
 from web3.exceptions import BadFunctionCallOutput
@@ -42,12 +42,12 @@ SEARCH_METHOD_DEPOSIT = '0xaef05ca429cf234724843763035496132d10808feeac94ee79441
 SEARCH_METHOD_APPROVAL = '0x7c3bc83eb61feb549a19180bb8de62c55c110922b2a80e511547cf8deda5b25a'
 
 PROVIDER = "wss://mainnet.infura.io/ws/v3/" + settings.INFURA_V3_PROJECT_ID
-w3 = Web3(Web3.WebsocketProvider(PROVIDER))
-check_transaction = lambda txid: w3.eth.getTransaction(txid)
+get_w3 = lambda: get_web3_for_endpoint(PROVIDER, sockets=True)
+check_transaction = lambda txid: get_w3().eth.getTransaction(txid)
 check_amount = lambda amount: int(amount[75:], 16) if len(amount) == 138 else print (f"{bcolors.FAIL}{bcolors.UNDERLINE} {index_transaction} txid: {transaction_tax[:10]} -> status: 0 False - amount was off by 0.001 {bcolors.ENDC}")
 check_token = lambda token_address: len(token_address) == 42
-check_contract = lambda token_address, abi : w3.eth.contract(token_address, abi=abi)
-check_event_transfer =  lambda contract_address, search, txid : w3.eth.filter({ "address": contract_address, "topics": [search, txid]})
+check_contract = lambda token_address, abi : get_w3().eth.contract(token_address, abi=abi)
+check_event_transfer =  lambda contract_address, search, txid : get_w3().eth.filter({ "address": contract_address, "topics": [search, txid]})
 get_decimals = lambda contract : int(contract.functions.decimals().call())
 
 
@@ -102,7 +102,8 @@ def check_transaction_contract(transaction_tax):
             return transaction_status(transaction, transaction_tax)
 
 
-def grants_transaction_validator(contribution):
+def grants_transaction_validator(contribution, tx_statuses=None):
+    tx_statuses = tx_statuses or {}
     tx_list = [contribution.tx_id, contribution.split_tx_id]
     network = contribution.subscription.network
 
@@ -121,7 +122,7 @@ def grants_transaction_validator(contribution):
             continue
 
         # check for dropped and replaced txn
-        status, timestamp = get_tx_status(tx, network, timezone.now())
+        status, timestamp = tx_statuses.get(tx) or get_tx_status(tx, network, timezone.now())
         maybeprint(120, round(time.time(),2))
         if status in ['pending', 'dropped', 'unknown', '']:
             new_tx = getReplacedTX(tx)
@@ -135,7 +136,7 @@ def grants_transaction_validator(contribution):
 
             # check if it was an ETH transaction
             maybeprint(132, round(time.time(),2))
-            transaction_receipt = w3.eth.getTransactionReceipt(tx)
+            transaction_receipt = get_w3().eth.getTransactionReceipt(tx)
             from_address = transaction_receipt['from']
             # todo save back to the txn if needed?
             if (transaction_receipt != None and transaction_receipt.cumulativeGasUsed >= 2100):
@@ -231,9 +232,7 @@ def trim_null_address(address):
 
 
 def get_token_recipient_senders(recipient_address, token_address):
-    PROVIDER = "wss://mainnet.infura.io/ws/v3/" + settings.INFURA_V3_PROJECT_ID
-    w3 = Web3(Web3.WebsocketProvider(PROVIDER))
-    contract = w3.eth.contract(
+    contract = get_w3().eth.contract(
         address=token_address,
         abi=erc20_abi,
     )
@@ -17,8 +17,21 @@ You should have received a copy of the GNU Affero General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 """
+import logging
+import math
+
+from django.utils import timezone
+
+import numpy as np
 from cacheops import cached_as
 from economy.models import ConversionRate
+from economy.rate_series import get_rate_series, mark_rate_series_stale
+
+logger = logging.getLogger(__name__)
+
+# an unchanged rate is stored again once the latest stored one is this old, so recent rates always exist
+CONVERSION_RATE_MAX_AGE = timezone.timedelta(days=1)
+CONVERSION_RATE_BATCH_SIZE = 1000
 
 
 # All Units in native currency
@@ -42,7 +55,7 @@ def convert_amount(from_amount, from_currency, to_currency, timestamp=None):
         from_amount (float): The amount to be converted.
         from_currency (str): The currency identifier to convert from.
         to_currency (str): The currency identifier to convert to.
-        timestamp (datetime): First available conversion rate after timestamp. Latest if None.
+        timestamp (datetime): Last available conversion rate at or before timestamp. Latest if None.
 
     Returns:
         float: The amount in to_currency.
@@ -64,24 +77,54 @@ def convert_amount(from_amount, from_currency, to_currency, timestamp=None):
     if from_currency == to_currency:
         return float(from_amount)
 
-    if timestamp:
-        conversion_rate = ConversionRate.objects.filter(
-            from_currency=from_currency,
-            to_currency=to_currency,
-            timestamp__lte=timestamp
-        ).order_by('-timestamp').first()
-        if not conversion_rate:
-            return convert_amount(from_amount, from_currency, to_currency)
-    else:
-        conversion_rate = ConversionRate.objects.filter(
-            from_currency=from_currency,
-            to_currency=to_currency,
-        ).order_by('-timestamp').first()
-
-    if not conversion_rate:
+    rate = get_rate_series(from_currency, to_currency).rate_at(timestamp)
+    if math.isnan(rate):
         raise ConversionRateNotFoundError(f"ConversionRate {from_currency}/{to_currency} @ {timestamp} not found")
 
-    return (float(conversion_rate.to_amount) / float(conversion_rate.from_amount)) * float(from_amount)
+    return rate * float(from_amount)
+
+
+def normalize_currency(currency):
+    from django.conf import settings
+    if currency == 'WETH':
+        return 'ETH'
+    if currency in settings.STABLE_COINS:
+        return 'USDT'
+    return currency
+
+
+def convert_amounts(amounts, currencies, timestamps=None, to_currency='USDT'):
+    """Convert many amounts to a currency at once.
+
+    Each currency pair is looked up with a single binary search over its rate history, the same way
+    convert_amount looks up a single amount.
+
+    Args:
+        amounts (list of float): The amounts to be converted.
+        currencies (list of str): The currency of each amount.
+        timestamps (list of datetime): The time of each conversion, None for the latest rate. Latest for all if None.
+        to_currency (str): The currency identifier to convert to.
+
+    Returns:
+        numpy.ndarray: The amounts in to_currency, nan where no conversion rate was found.
+
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    if timestamps is None:
+        timestamps = [None] * len(amounts)
+    to_currency = normalize_currency(to_currency)
+
+    indexes_by_currency = {}
+    for i, currency in enumerate(currencies):
+        indexes_by_currency.setdefault(normalize_currency(currency), []).append(i)
+
+    rates = np.empty(len(amounts), dtype=np.float64)
+    for currency, indexes in indexes_by_currency.items():
+        if currency == to_currency:
+            rates[indexes] = 1
+        else:
+            rates[indexes] = get_rate_series(currency, to_currency).rates_at([timestamps[i] for i in indexes])
+    return rates * amounts
 
 
 def convert_token_to_usdt(from_token, timestamp=None):
@@ -101,6 +144,68 @@ def convert_token_to_usdt(from_token, timestamp=None):
         return convert_amount(in_eth, 'ETH', "USDT", timestamp)
 
 
+def get_latest_conversion_rates(pairs):
+    """Get the latest stored conversion rate of each currency pair.
+
+    Args:
+        pairs (set of tuple): The (from_currency, to_currency) pairs.
+
+    Returns:
+        dict: The latest ConversionRate by pair.
+
+    """
+    if not pairs:
+        return {}
+    latest = ConversionRate.objects.filter(
+        from_currency__in={pair[0] for pair in pairs},
+        to_currency__in={pair[1] for pair in pairs},
+    ).order_by('from_currency', 'to_currency', '-timestamp').distinct('from_currency', 'to_currency')
+    return {
+        (rate.from_currency, rate.to_currency): rate for rate in latest
+        if (rate.from_currency, rate.to_currency) in pairs
+    }
+
+
+def store_conversion_rates(rates):
+    """Store conversion rates along with the rates of their inverse pairs, in bulk.
+
+    A rate equal to the latest stored rate of its pair, and less than CONVERSION_RATE_MAX_AGE newer,
+    is skipped: lookups at any time already find that rate. When a pair is quoted more than once
+    at the same time, the last quote wins. Quotes with a zero amount are skipped.
+
+    Args:
+        rates (list of ConversionRate): The unsaved conversion rates.
+
+    Returns:
+        list of ConversionRate: The conversion rates created.
+
+    """
+    candidates = {}
+    for rate in rates:
+        if not rate.from_amount or not rate.to_amount:
+            # a zero quote has no meaningful reverse rate
+            logger.warning(f'store_conversion_rates: skipped zero quote {rate.from_currency}=>{rate.to_currency}')
+            continue
+        for candidate in [rate, rate.get_reverse()]:
+            candidates[(candidate.from_currency, candidate.to_currency, candidate.timestamp)] = candidate
+
+    latest = get_latest_conversion_rates({(key[0], key[1]) for key in candidates})
+    new_rates = []
+    for (from_currency, to_currency, timestamp), rate in candidates.items():
+        stored = latest.get((from_currency, to_currency))
+        # rows stored with a zero amount by older runs are never equal to a new rate
+        if stored and stored.from_amount and stored.timestamp <= timestamp < stored.timestamp + CONVERSION_RATE_MAX_AGE \
+                and math.isclose(rate.to_amount / rate.from_amount, stored.to_amount / stored.from_amount, rel_tol=1e-12):
+            continue
+        new_rates.append(rate)
+
+    # bulk_create skips post_save, so neither the reverse rates nor the rate series are updated by signals
+    ConversionRate.objects.bulk_create(new_rates, batch_size=CONVERSION_RATE_BATCH_SIZE)
+    for rate in new_rates:
+        mark_rate_series_stale(ConversionRate, rate, created=True)
+    return new_rates
+
+
 def etherscan_link(txid):
     """Build the Etherscan URL.
 
@@ -21,18 +21,32 @@ import copy
 import datetime as dt
 import json
 import math
+import multiprocessing
 import time
 from itertools import combinations
 
 from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Sum
 from django.utils import timezone
 
+import numpy as np
 import pytz
-from grants.models import Contribution, Grant, PhantomFunding
+from dashboard.models import Profile
+from django_bulk_update.helper import bulk_update
+from grants.models import Contribution, Grant, GrantCLR, PhantomFunding
 from marketing.models import Stat
 from perftools.models import JSONStore
+from scipy import sparse
 
-CLR_PERCENTAGE_DISTRIBUTED = 0
+# profile id of the hypothetical contributor used to predict the clr match of a donation
+PREDICTION_PROFILE_ID = '999999999999'
+
+# five potential additional donations plus the base case of 0
+POTENTIAL_DONATIONS = [0, 1, 10, 100, 1000, 10000]
+
+# max number of pairwise cells materialized at once per grant by the vectorized engine
+CLR_PAIRWISE_BLOCK_SIZE = 2 ** 22
 
 '''
     translates django grant data structure to a list of lists
@@ -176,8 +190,8 @@ def get_totals_by_pair(contrib_dict):
     returns:
         total clr award by grant, normalized by the normalization factor
             [{'id': proj, 'clr_amount': tot}]
-        saturation point
-            boolean
+        percentage of the total pot distributed
+            float
 '''
 def calculate_clr(aggregated_contributions, pair_totals, verified_list, v_threshold, uv_threshold, total_pot):
     bigtot = 0
@@ -198,17 +212,158 @@ def calculate_clr(aggregated_contributions, pair_totals, verified_list, v_thresh
         bigtot += tot
         totals.append({'id': proj, 'clr_amount': tot})
 
-    global CLR_PERCENTAGE_DISTRIBUTED
-
     if bigtot >= total_pot: # saturation reached
         # print(f'saturation reached. Total Pot: ${total_pot} | Total Allocated ${bigtot}. Normalizing')
-        CLR_PERCENTAGE_DISTRIBUTED = 100
+        clr_percentage_distributed = 100
+        for t in totals:
+            t['clr_amount'] = ((t['clr_amount'] / bigtot) * total_pot)
+    else:
+        clr_percentage_distributed = (bigtot / total_pot) * 100
+
+    return totals, clr_percentage_distributed
+
+
+
+'''
+    builds the sparse contribution matrix used by the vectorized clr engine
+
+    args:
+        grant_contribs_curr
+            {
+                'id': (string) ,
+                'contibutions' : [
+                    {
+                        contributor_profile (str) : contribution_amount (int)
+                    }
+                ]
+            }
+
+    returns:
+        grant_ids           :   [grant_id] in order of first appearance
+        profile_ids         :   [user_id] sorted, one per matrix column
+        contrib_matrix      :   scipy.sparse.csr_matrix (grants x profiles) of aggregated amounts
+        verified            :   numpy bool array, per profile
+
+        profile columns are ordered by sorted user_id so that column order
+        matches the `k2 > k1` comparison made by calculate_clr
+'''
+def build_contribution_matrix(grant_contribs_curr):
+    grant_index = {}
+    profile_ids = set()
+    rows = []
+    for g in grant_contribs_curr:
+        grant_id = g.get('id')
+        for c in g.get('contributions'):
+            profile_id = c.get('id')
+            if profile_id:
+                if grant_id not in grant_index:
+                    grant_index[grant_id] = len(grant_index)
+                profile_ids.add(profile_id)
+                rows.append((grant_index[grant_id], profile_id, c.get('is_verified'), c.get('sum_of_each_profiles_contributions')))
+
+    profile_ids = sorted(profile_ids)
+    profile_index = {profile_id: i for i, profile_id in enumerate(profile_ids)}
+    verified = np.zeros(len(profile_ids), dtype=bool)
+    grant_idx = np.empty(len(rows), dtype=np.int64)
+    profile_idx = np.empty(len(rows), dtype=np.int64)
+    amounts = np.empty(len(rows), dtype=np.float64)
+    for i, (g_idx, profile_id, is_verified, amount) in enumerate(rows):
+        grant_idx[i] = g_idx
+        profile_idx[i] = profile_index[profile_id]
+        amounts[i] = amount
+        if is_verified:
+            verified[profile_idx[i]] = True
+
+    # duplicate (grant, profile) entries are summed on conversion to csr
+    contrib_matrix = sparse.coo_matrix(
+        (amounts, (grant_idx, profile_idx)),
+        shape=(len(grant_index), len(profile_ids))
+    ).tocsr()
+    contrib_matrix.sort_indices()
+
+    return list(grant_index.keys()), profile_ids, contrib_matrix, verified
+
+
+
+'''
+    vectorized equivalent of get_totals_by_pair + the pairwise sum of calculate_clr
+
+    the pair totals are the gram matrix of the sqrt contribution matrix
+    (sqrt(C).T @ sqrt(C)), which is only ever evaluated for pairs of
+    contributors of the same grant, in blocks of CLR_PAIRWISE_BLOCK_SIZE cells
+
+    args:
+        contrib_matrix  :   scipy.sparse.csr_matrix (grants x profiles)
+        verified        :   numpy bool array, per profile
+        v_threshold     :   float
+        uv_threshold    :   float
+
+    returns:
+        numpy array of un-normalized clr totals, per grant row
+'''
+def calculate_raw_clr_totals(contrib_matrix, verified, v_threshold, uv_threshold):
+    sqrt_matrix = contrib_matrix.sqrt().tocsr()
+    sqrt_matrix.sort_indices()
+    sqrt_matrix_csc = sqrt_matrix.tocsc()
+
+    raw_totals = np.zeros(sqrt_matrix.shape[0])
+    for g_idx in range(sqrt_matrix.shape[0]):
+        start, end = sqrt_matrix.indptr[g_idx], sqrt_matrix.indptr[g_idx + 1]
+        cols = sqrt_matrix.indices[start:end]
+        sqrt_amounts = sqrt_matrix.data[start:end]
+        n = len(cols)
+
+        # only this grant's contributors, and the grants they contributed to, are needed
+        # to get their pair totals
+        grant_sqrt = sqrt_matrix_csc[:, cols]
+        grant_sqrt = grant_sqrt[np.unique(grant_sqrt.indices)].toarray()
+        grant_verified = verified[cols]
+        step = max(1, CLR_PAIRWISE_BLOCK_SIZE // max(n, 1))
+
+        tot = 0
+        for i in range(0, n, step):
+            pair_totals = grant_sqrt[:, i:i + step].T @ grant_sqrt
+            rows = np.arange(i, min(i + step, n))
+            use_v_threshold = (
+                (np.arange(n)[None, :] > rows[:, None]) & grant_verified[rows][:, None] & grant_verified[None, :]
+            )
+            thresholds = np.where(use_v_threshold, v_threshold, uv_threshold)
+            tot += float(
+                (np.outer(sqrt_amounts[rows], sqrt_amounts) / (pair_totals / thresholds + 1)).sum()
+            )
+
+        raw_totals[g_idx] = tot
+
+    return raw_totals
+
+
+
+'''
+    normalizes raw clr totals against the total pot
+
+    args:
+        grant_ids       :   [grant_id]
+        raw_totals      :   [float], per grant
+        total_pot       :   float
+
+    returns:
+        total clr award by grant, normalized by the normalization factor
+            [{'id': proj, 'clr_amount': tot}]
+        percentage of the total pot distributed
+            float
+'''
+def normalize_clr_totals(grant_ids, raw_totals, total_pot):
+    totals = [{'id': proj, 'clr_amount': float(tot)} for proj, tot in zip(grant_ids, raw_totals)]
+    bigtot = float(sum(raw_totals))
+
+    if bigtot >= total_pot: # saturation reached
+        clr_percentage_distributed = 100
         for t in totals:
             t['clr_amount'] = ((t['clr_amount'] / bigtot) * total_pot)
     else:
-        CLR_PERCENTAGE_DISTRIBUTED =  (bigtot / total_pot) * 100
+        clr_percentage_distributed = (bigtot / total_pot) * 100
 
-    return totals
+    return totals, clr_percentage_distributed
 
 
 
@@ -230,9 +385,30 @@ def calculate_clr(aggregated_contributions, pair_totals, verified_list, v_thresh
 
     returns:
         grants clr award amounts
+        percentage of the total pot distributed
 '''
 def run_clr_calcs(grant_contribs_curr, v_threshold, uv_threshold, total_pot):
 
+    # get data
+    grant_ids, _, contrib_matrix, verified = build_contribution_matrix(grant_contribs_curr)
+
+    # clr calcluation
+    raw_totals = calculate_raw_clr_totals(contrib_matrix, verified, v_threshold, uv_threshold)
+    totals, clr_percentage_distributed = normalize_clr_totals(grant_ids, raw_totals, total_pot)
+
+    return totals, clr_percentage_distributed
+
+
+
+'''
+    pure python reference implementation of run_clr_calcs, kept to
+    validate the vectorized engine against
+
+    args / returns:
+        see run_clr_calcs
+'''
+def run_clr_calcs_reference(grant_contribs_curr, v_threshold, uv_threshold, total_pot):
+
     # get data
     curr_round = translate_data(grant_contribs_curr)
 
@@ -246,9 +422,9 @@ def run_clr_calcs(grant_contribs_curr, v_threshold, uv_threshold, total_pot):
     ptots = get_totals_by_pair(combinedagg)
 
     # clr calcluation
-    totals = calculate_clr(combinedagg, ptots, vlist, v_threshold, uv_threshold, total_pot)
+    totals, clr_percentage_distributed = calculate_clr(combinedagg, ptots, vlist, v_threshold, uv_threshold, total_pot)
 
-    return totals
+    return totals, clr_percentage_distributed
 
 
 
@@ -262,12 +438,12 @@ def calculate_clr_for_donation(grant, amount, grant_contributions_curr, total_po
             if grant_contribution['id'] == grant.id:
                 # add this donation with a new profile (id 99999999999) to get impact
                 grant_contribution['contributions'].append({
-                    'id': '999999999999',
+                    'id': PREDICTION_PROFILE_ID,
                     'sum_of_each_profiles_contributions': amount,
                     'is_verified': True
                 })
 
-    grants_clr = run_clr_calcs(_grant_contributions_curr, v_threshold, uv_threshold, total_pot)
+    grants_clr, _ = run_clr_calcs(_grant_contributions_curr, v_threshold, uv_threshold, total_pot)
 
     # find grant we added the contribution to and get the new clr amount
     for grant_clr in grants_clr:
@@ -279,6 +455,123 @@ def calculate_clr_for_donation(grant, amount, grant_contributions_curr, total_po
 
 
 
+'''
+    caches the per grant aggregates needed to predict the match of a
+    hypothetical new contributor without rerunning the whole round
+
+    a new contributor only ever shares the grant it donates to, so adding it
+    only changes the pairs between it and that grant's contributors. every
+    other pair total, and every other grant's raw total, is unchanged.
+
+    args:
+        grant_contribs_curr :   see run_clr_calcs
+        v_threshold         :   float
+        uv_threshold        :   float
+        total_pot           :   float
+
+    returns:
+        {
+            'grants': {
+                grant_id: {
+                    'raw_total': float, None if the grant has no contributions
+                    'occurrences': int,
+                    'sqrt_amounts': numpy array,
+                    'is_verified': numpy bool array,
+                    'after_prediction_profile': numpy bool array,
+                }
+            },
+            'bigtot': float,
+            'v_threshold': float,
+            'uv_threshold': float,
+            'total_pot': float,
+        }
+'''
+def build_clr_prediction_cache(grant_contribs_curr, v_threshold, uv_threshold, total_pot):
+    grant_ids, profile_ids, contrib_matrix, verified = build_contribution_matrix(grant_contribs_curr)
+    raw_totals = calculate_raw_clr_totals(contrib_matrix, verified, v_threshold, uv_threshold)
+
+    # calculate_clr_for_donation adds the donation to every entry of the grant
+    occurrences = {}
+    for g in grant_contribs_curr:
+        occurrences[g.get('id')] = occurrences.get(g.get('id'), 0) + 1
+
+    after_prediction_profile = np.array([profile_id > PREDICTION_PROFILE_ID for profile_id in profile_ids], dtype=bool)
+
+    # grants without any contributions only get a match once a donation is added
+    grants = {
+        grant_id: {
+            'raw_total': None,
+            'occurrences': occurrences[grant_id],
+            'sqrt_amounts': np.zeros(0),
+            'is_verified': np.zeros(0, dtype=bool),
+            'after_prediction_profile': np.zeros(0, dtype=bool),
+        } for grant_id in occurrences
+    }
+    for g_idx, grant_id in enumerate(grant_ids):
+        start, end = contrib_matrix.indptr[g_idx], contrib_matrix.indptr[g_idx + 1]
+        cols = contrib_matrix.indices[start:end]
+        grants[grant_id] = {
+            'raw_total': float(raw_totals[g_idx]),
+            'occurrences': occurrences[grant_id],
+            'sqrt_amounts': np.sqrt(contrib_matrix.data[start:end]),
+            'is_verified': verified[cols],
+            'after_prediction_profile': after_prediction_profile[cols],
+        }
+
+    return {
+        'grants': grants,
+        'bigtot': float(raw_totals.sum()),
+        'v_threshold': v_threshold,
+        'uv_threshold': uv_threshold,
+        'total_pot': total_pot,
+    }
+
+
+
+'''
+    incremental equivalent of calculate_clr_for_donation
+
+    args:
+        prediction_cache    :   built by build_clr_prediction_cache
+        grant_id            :   int
+        amount              :   float
+
+    returns:
+        predicted clr amount of the grant, normalized against the total pot,
+        or None if the grant has no contributions this round
+'''
+def predict_clr_for_donation(prediction_cache, grant_id, amount):
+    grant = prediction_cache['grants'].get(grant_id)
+    if not grant or (grant['raw_total'] is None and amount == 0):
+        return None
+
+    v_threshold = prediction_cache['v_threshold']
+    uv_threshold = prediction_cache['uv_threshold']
+    total_pot = prediction_cache['total_pot']
+
+    delta = 0
+    if amount != 0:
+        amount = amount * grant['occurrences']
+        sqrt_amount = amount ** 0.5
+
+        # the new contributor with itself, and with each existing contributor in both directions.
+        # the new contributor is verified, so the pair is matched at v_threshold in the
+        # direction where the other verified profile sorts after it
+        cross = sqrt_amount * grant['sqrt_amounts']
+        is_verified = grant['is_verified']
+        after = grant['after_prediction_profile']
+        delta = amount / (amount / uv_threshold + 1)
+        delta += float((cross / (cross / np.where(is_verified & after, v_threshold, uv_threshold) + 1)).sum())
+        delta += float((cross / (cross / np.where(is_verified & ~after, v_threshold, uv_threshold) + 1)).sum())
+
+    tot = (grant['raw_total'] or 0) + delta
+    bigtot = prediction_cache['bigtot'] + delta
+    if bigtot >= total_pot: # saturation reached
+        return (tot / bigtot) * total_pot
+    return tot
+
+
+
 '''
     Populate Data needed to calculate CLR
 
@@ -384,11 +677,151 @@ def populate_data_for_clr(grants, contributions, phantom_funding_profiles, clr_r
 
 
 
-def predict_clr(save_to_db=False, from_date=None, clr_round=None, network='mainnet'):
-    # setup
-    clr_calc_start_time = timezone.now()
-    debug_output = []
+'''
+    Populate Data needed to calculate CLR, in a handful of aggregate queries
+    rather than a few queries per contributing profile of each grant
+
+    Args:
+        grants                  : grants list
+        contributions           : contributions list for thoe grants
+        phantom_funding_profiles: phantom funding for those grants
+        clr_round               : GrantCLR
+
+    Returns:
+        contrib_data_list: {
+            'id': grant_id,
+            'contributions': summed_contributions
+        }
+
+'''
+def populate_data_for_clr_bulk(grants, contributions, phantom_funding_profiles, clr_round):
+
+    contrib_data_list = []
+
+    if not clr_round:
+        print('Error: populate_data_for_clr_bulk - missing clr_round')
+        return contrib_data_list
+
+    clr_start_date = clr_round.start_date
+    clr_end_date = clr_round.end_date
+
+    grant_ids = list(grants.values_list('pk', 'defer_clr_to_id'))
+    grant_pks = [pk for pk, _ in grant_ids]
+
+    # contributions, summed per grant and profile
+    summed_contributions_by_grant = {}
+    contribution_sums = contributions.prefetch_related(None).filter(
+        subscription__grant_id__in=grant_pks,
+        subscription__is_postive_vote=True,
+        created_on__gte=clr_start_date,
+        created_on__lte=clr_end_date,
+        profile_for_clr__isnull=False
+    ).order_by().values('subscription__grant_id', 'profile_for_clr_id').annotate(
+        amount=Sum('subscription__amount_per_period_usdt')
+    )
+    for row in contribution_sums:
+        grant_contributions = summed_contributions_by_grant.setdefault(row['subscription__grant_id'], {})
+        grant_contributions[row['profile_for_clr_id']] = float(row['amount'] or 0)
+
+    # phantom funding, first one per grant and profile
+    phantom_funding_by_grant = {}
+    grant_phantom_funding = phantom_funding_profiles.filter(
+        grant_id__in=grant_pks,
+        created_on__gte=clr_start_date,
+        created_on__lte=clr_end_date
+    ).order_by('pk').values_list('grant_id', 'profile_id', 'round_number')
+    for grant_pk, profile_id, round_number in grant_phantom_funding:
+        phantom_funding_by_grant.setdefault(grant_pk, {}).setdefault(profile_id, round_number)
+
+    # PhantomFunding.value splits 5 across every phantom funding of the profile in that round
+    phantom_funding_profile_ids = set(
+        profile_id for phantom_funding in phantom_funding_by_grant.values() for profile_id in phantom_funding
+    )
+    competing_phantom_funds = {}
+    if phantom_funding_profile_ids:
+        competing_phantom_funds = {
+            (row['profile_id'], row['round_number']): row['count']
+            for row in PhantomFunding.objects.filter(profile_id__in=phantom_funding_profile_ids).order_by().values(
+                'profile_id', 'round_number'
+            ).annotate(count=Count('pk'))
+        }
+
+    # verified profiles
+    contributing_profile_ids = phantom_funding_profile_ids.union(
+        *[grant_contributions.keys() for grant_contributions in summed_contributions_by_grant.values()]
+    )
+    verified_profile = set(
+        Profile.objects.filter(pk__in=contributing_profile_ids, sms_verification=True).values_list('pk', flat=True)
+    )
+
+    for grant_pk, defer_clr_to_id in grant_ids:
+        grant_id = defer_clr_to_id if defer_clr_to_id else grant_pk
+        grant_contributions = summed_contributions_by_grant.get(grant_pk, {})
+        grant_phantom_funding = phantom_funding_by_grant.get(grant_pk, {})
+
+        summed_contributions = []
+        for profile_id in sorted(set(grant_contributions) | set(grant_phantom_funding)):
+            sum_of_each_profiles_contributions = grant_contributions.get(profile_id, 0.0)
+            if profile_id in grant_phantom_funding:
+                round_number = grant_phantom_funding[profile_id]
+                sum_of_each_profiles_contributions += 5 / competing_phantom_funds[(profile_id, round_number)]
+
+            summed_contributions.append({
+                'id': str(profile_id),
+                'sum_of_each_profiles_contributions': sum_of_each_profiles_contributions,
+                'is_verified': profile_id in verified_profile
+            })
+
+        if summed_contributions:
+            contrib_data_list.append({
+                'id': grant_id,
+                'contributions': summed_contributions
+            })
+
+    return contrib_data_list
+
+
+
+'''
+    formats the predicted clr of each potential donation into the curve
+    stored on Grant.clr_prediction_curve
+
+    Args:
+        potential_clr   : [predicted clr], one per POTENTIAL_DONATIONS
+
+    Returns:
+        [[donation, predicted clr, predicted clr - base clr]]
+'''
+def format_clr_prediction_curve(potential_clr):
+    clr_prediction_curve = list(zip(POTENTIAL_DONATIONS, potential_clr))
+    base = clr_prediction_curve[0][1]
+
+    can_estimate = True if base or clr_prediction_curve[1][1] or clr_prediction_curve[2][1] or clr_prediction_curve[3][1] else False
+
+    if can_estimate :
+        return [[ele[0], ele[1], ele[1] - base] for ele in clr_prediction_curve]
+    return [[0.0, 0.0, 0.0] for x in range(0, 6)]
+
+
+
+'''
+    Calculate the clr prediction curve of every grant of a round.
+    Does not write to the db, see save_clr_predictions
+
+    Args:
+        clr_round   : GrantCLR
+        network     : mainnet | rinkeby
 
+    Returns:
+        {
+            'clr_round': clr_round.pk,
+            'network': network,
+            'clr_percentage_distributed': float,
+            'grants_clr': [{'id': grant_id, 'clr_amount': float}],
+            'clr_prediction_curves': {grant_id: [[donation, clr, clr - base_clr]]},
+        }
+'''
+def calculate_clr_predictions(clr_round, network='mainnet'):
     # one-time data call
     total_pot = float(clr_round.total_pot)
     v_threshold = float(clr_round.verified_threshold)
@@ -396,87 +829,171 @@ def predict_clr(save_to_db=False, from_date=None, clr_round=None, network='mainn
 
     grants, contributions, phantom_funding_profiles = fetch_data(clr_round, network)
 
-    grant_contributions_curr = populate_data_for_clr(grants, contributions, phantom_funding_profiles, clr_round)
+    grant_contributions_curr = populate_data_for_clr_bulk(grants, contributions, phantom_funding_profiles, clr_round)
+
+    # aggregate the round once, every prediction below only computes its delta
+    prediction_cache = build_clr_prediction_cache(grant_contributions_curr, v_threshold, uv_threshold, total_pot)
+    grants_clr, clr_percentage_distributed = normalize_clr_totals(
+        [grant_id for grant_id, grant in prediction_cache['grants'].items() if grant['raw_total'] is not None],
+        [grant['raw_total'] for grant in prediction_cache['grants'].values() if grant['raw_total'] is not None],
+        total_pot
+    )
 
     # calculate clr given additional donations
-    for grant in grants:
-        # five potential additional donations plus the base case of 0
-        potential_donations = [0, 1, 10, 100, 1000, 10000]
-        potential_clr = []
-
-        for amount in potential_donations:
-            # calculate clr with each additional donation and save to grants model
-            predicted_clr, grants_clr = calculate_clr_for_donation(
-                grant,
-                amount,
-                grant_contributions_curr,
-                total_pot,
-                v_threshold,
-                uv_threshold
-            )
-            potential_clr.append(predicted_clr)
+    clr_prediction_curves = {}
+    for grant_id in grants.values_list('pk', flat=True):
+        potential_clr = [
+            predict_clr_for_donation(prediction_cache, grant_id, amount) for amount in POTENTIAL_DONATIONS
+        ]
+        clr_prediction_curves[grant_id] = format_clr_prediction_curve(potential_clr)
+
+    return {
+        'clr_round': clr_round.pk,
+        'network': network,
+        'clr_percentage_distributed': clr_percentage_distributed,
+        'grants_clr': grants_clr,
+        'clr_prediction_curves': clr_prediction_curves,
+    }
+
 
-        if save_to_db:
-            _grant = Grant.objects.get(pk=grant.pk)
-            _grant.clr_prediction_curve = list(zip(potential_donations, potential_clr))
-            base = _grant.clr_prediction_curve[0][1]
-            _grant.last_clr_calc_date = timezone.now()
-            _grant.next_clr_calc_date = timezone.now() + timezone.timedelta(minutes=20)
 
-            can_estimate = True if base or _grant.clr_prediction_curve[1][1] or _grant.clr_prediction_curve[2][1] or _grant.clr_prediction_curve[3][1] else False
+def calculate_clr_predictions_for_round_pk(args):
+    # runs in a pool worker, so only picklable args and results cross the process boundary
+    clr_round_pk, network = args
+    return calculate_clr_predictions(GrantCLR.objects.get(pk=clr_round_pk), network)
 
-            if can_estimate :
-                _grant.clr_prediction_curve  = [[ele[0], ele[1], ele[1] - base] for ele in _grant.clr_prediction_curve ]
-            else:
-                _grant.clr_prediction_curve = [[0.0, 0.0, 0.0] for x in range(0, 6)]
 
-            JSONStore.objects.create(
+
+'''
+    Write the output of calculate_clr_predictions for one or many rounds
+    in bulk: the JSONStore and Stat history rows, and each grant's
+    clr_prediction_curve
+
+    Args:
+        clr_predictions : [calculate_clr_predictions output]
+        from_date       : datetime the predictions are stored at
+'''
+def save_clr_predictions(clr_predictions, from_date):
+    from grants.tasks import update_grant_metadata
+
+    clr_calc_start_time = timezone.now()
+    grant_ids = set(grant_id for prediction in clr_predictions for grant_id in prediction['clr_prediction_curves'])
+    grants = Grant.objects.in_bulk(grant_ids)
+    clr_rounds = GrantCLR.objects.in_bulk([prediction['clr_round'] for prediction in clr_predictions])
+
+    json_stores = []
+    stats = []
+    for prediction in clr_predictions:
+        for grant_id, clr_prediction_curve in prediction['clr_prediction_curves'].items():
+            _grant = grants[grant_id]
+            _grant.clr_prediction_curve = clr_prediction_curve
+            _grant.last_clr_calc_date = timezone.now()
+            _grant.next_clr_calc_date = timezone.now() + timezone.timedelta(minutes=5)
+
+            json_stores.append(JSONStore(
                 created_on=from_date,
                 view='clr_contribution',
-                key=f'{grant.id}',
-                data=_grant.clr_prediction_curve,
-            )
+                key=f'{grant_id}',
+                data=clr_prediction_curve,
+            ))
             try:
-                if _grant.clr_prediction_curve[0][1]:
-                    Stat.objects.create(
+                grant_stats = []
+                if clr_prediction_curve[0][1]:
+                    grant_stats.append(Stat(
                         created_on=from_date,
                         key=_grant.title[0:43] + "_match",
-                        val=_grant.clr_prediction_curve[0][1],
-                        )
+                        val=clr_prediction_curve[0][1],
+                    ))
                     max_twitter_followers = max(_grant.twitter_handle_1_follower_count, _grant.twitter_handle_2_follower_count)
                     if max_twitter_followers:
-                        Stat.objects.create(
+                        grant_stats.append(Stat(
                             created_on=from_date,
                             key=_grant.title[0:43] + "_admt1",
-                            val=int(100 * _grant.clr_prediction_curve[0][1]/max_twitter_followers),
-                            )
+                            val=int(100 * clr_prediction_curve[0][1]/max_twitter_followers),
+                        ))
 
                 if _grant.positive_round_contributor_count:
-                    Stat.objects.create(
+                    grant_stats.append(Stat(
                         created_on=from_date,
                         key=_grant.title[0:43] + "_pctrbs",
                         val=_grant.positive_round_contributor_count,
-                        )
+                    ))
                 if _grant.amount_received_in_round:
-                    Stat.objects.create(
+                    grant_stats.append(Stat(
                         created_on=from_date,
                         key=_grant.title[0:43] + "_amt",
                         val=_grant.amount_received_in_round,
-                        )
+                    ))
+                stats += grant_stats
             except:
                 pass
 
-            if from_date > (clr_calc_start_time - timezone.timedelta(hours=1)):
-                _grant.save()
+        clr_round = clr_rounds[prediction['clr_round']]
+        stats.append(Stat(
+            created_on=from_date,
+            key=f'{clr_round.round_num}_{prediction["network"]}_clr_saturation'[0:50],
+            val=int(prediction['clr_percentage_distributed']),
+        ))
+
+    JSONStore.objects.bulk_create(json_stores, batch_size=1000)
+    Stat.objects.bulk_create(stats, batch_size=1000)
+
+    if from_date > (clr_calc_start_time - timezone.timedelta(hours=1)):
+        # bulk_update skips psave_grant, so queue the metadata refresh a Grant.save() would have
+        stale_grant_ids = [
+            grant.pk for grant in grants.values()
+            if grant.modified_on < (clr_calc_start_time - timezone.timedelta(minutes=5))
+        ]
+        for grant in grants.values():
+            grant.modified_on = clr_calc_start_time
+        bulk_update(
+            list(grants.values()),
+            update_fields=['clr_prediction_curve', 'last_clr_calc_date', 'next_clr_calc_date', 'modified_on'],
+            batch_size=1000
+        )
+        for grant_id in stale_grant_ids:
+            update_grant_metadata.delay(grant_id)
 
-        debug_output.append({'grant': grant.id, "clr_prediction_curve": (potential_donations, potential_clr), "grants_clr": grants_clr})
 
-    try :
-        Stat.objects.create(
-            key= clr_type + '_grants_round_6_saturation',
-            val=int(CLR_PERCENTAGE_DISTRIBUTED),
-        )
-    except:
-        pass
 
-    return debug_output
+'''
+    Calculate the clr predictions of several rounds and networks concurrently,
+    one round / network per pool process, then save them all in bulk
+
+    Args:
+        clr_rounds  : [GrantCLR]
+        networks    : [mainnet | rinkeby]
+        save_to_db  : bool
+        from_date   : datetime the predictions are stored at
+        processes   : max pool size, defaults to the number of cpus
+
+    Returns:
+        [calculate_clr_predictions output], one per round and network
+'''
+def predict_clr_rounds(clr_rounds, networks=('mainnet', ), save_to_db=False, from_date=None, processes=None):
+    jobs = [(clr_round.pk, network) for clr_round in clr_rounds for network in networks]
+    processes = min(processes or multiprocessing.cpu_count(), len(jobs))
+
+    if processes <= 1:
+        clr_predictions = [calculate_clr_predictions_for_round_pk(job) for job in jobs]
+    else:
+        # forked workers must not share the parent's db connections
+        connections.close_all()
+        with multiprocessing.Pool(processes=processes) as pool:
+            clr_predictions = pool.map(calculate_clr_predictions_for_round_pk, jobs)
+
+    if save_to_db:
+        save_clr_predictions(clr_predictions, from_date)
+
+    return clr_predictions
+
+
+
+def predict_clr(save_to_db=False, from_date=None, clr_round=None, network='mainnet'):
+    return predict_clr_rounds(
+        [clr_round],
+        networks=[network],
+        save_to_db=save_to_db,
+        from_date=from_date,
+        processes=1
+    )[0]
@@ -23,7 +23,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 
 from dashboard.utils import get_tx_status, has_tx_mined
-from grants.clr import predict_clr
+from grants.clr import predict_clr_rounds
 from grants.models import Contribution, Grant, GrantCLR
 from marketing.mails import warn_subscription_failed
 
@@ -33,14 +33,17 @@ class Command(BaseCommand):
     help = 'calculate CLR estimates for all grants'
 
     def add_arguments(self, parser):
-        parser.add_argument('network', type=str, default='mainnet', choices=['rinkeby', 'mainnet'])
+        parser.add_argument('network', type=str, default='mainnet', choices=['rinkeby', 'mainnet', 'all'])
         parser.add_argument('clr_pk', type=str, default="all")
+        parser.add_argument('--processes', type=int, default=None,
+            help="max number of rounds calculated concurrently, defaults to the number of cpus")
 
 
     def handle(self, *args, **options):
 
         network = options['network']
         clr_pk = options['clr_pk']
+        networks = ['mainnet', 'rinkeby'] if network == 'all' else [network]
 
         if clr_pk == "all":
             active_clr_rounds = GrantCLR.objects.filter(is_active=True)
@@ -48,25 +51,18 @@ class Command(BaseCommand):
             active_clr_rounds = GrantCLR.objects.filter(pk=clr_pk)
 
         if active_clr_rounds:
-            for clr_round in active_clr_rounds:
-                print(f"CALCULATING CLR estimates for ROUND: {clr_round.round_num}")
-                predict_clr(
-                    save_to_db=True,
-                    from_date=timezone.now(),
-                    clr_round=clr_round,
-                    network=network
-                )
-                print(f"finished CLR estimates for {clr_round.round_num}")
-
-                # TOTAL GRANT
-                # grants = Grant.objects.filter(network=network, hidden=False, active=True, link_to_new_grant=None)
-                # grants = grants.filter(**clr_round.grant_filters)
-
-                # total_clr_distributed = 0
-                # for grant in grants:
-                #     total_clr_distributed += grant.clr_prediction_curve[0][1]
-
-                # print(f'Total CLR allocated for {clr_round.round_num} - {total_clr_distributed}')
+            print(f"CALCULATING CLR estimates for ROUNDS: {', '.join(r.round_num for r in active_clr_rounds)}")
+            clr_predictions = predict_clr_rounds(
+                active_clr_rounds,
+                networks=networks,
+                save_to_db=True,
+                from_date=timezone.now(),
+                processes=options['processes']
+            )
+            for clr_prediction in clr_predictions:
+                clr_round = clr_prediction['clr_round']
+                saturation = round(clr_prediction['clr_percentage_distributed'], 2)
+                print(f"finished CLR estimates for {clr_round} on {clr_prediction['network']} - {saturation}% distributed")
 
         else:
             print("No active CLRs found")
@@ -1229,8 +1229,14 @@ class Contribution(SuperModel):
         else:
             return self.subscription.contributor_profile.id
 
-    def update_tx_status(self):
-        """Updates tx status."""
+    def update_tx_status(self, tx_statuses=None):
+        """Updates tx status.
+
+        Args:
+            tx_statuses (dict): The (status, timestamp) of the txs already fetched with get_tx_statuses, by txid.
+
+        """
+        tx_statuses = tx_statuses or {}
         try:
             from economy.tx import grants_transaction_validator
             from dashboard.utils import get_tx_status
@@ -1240,7 +1246,7 @@ class Contribution(SuperModel):
 
             # handle replace of tx_id
             if self.tx_id:
-                tx_status, _ = get_tx_status(self.tx_id, self.subscription.network, self.created_on)
+                tx_status, _ = tx_statuses.get(self.tx_id) or get_tx_status(self.tx_id, self.subscription.network, self.created_on)
                 if tx_status in ['pending', 'dropped', 'unknown', '']:
                     new_tx = getReplacedTX(self.tx_id)
                     if new_tx:
@@ -1250,7 +1256,9 @@ class Contribution(SuperModel):
                     return
             # handle replace of split_tx_id
             if self.split_tx_id:
-                split_tx_status, _ = get_tx_status(self.split_tx_id, self.subscription.network, self.created_on)
+                split_tx_status, _ = tx_statuses.get(self.split_tx_id) or get_tx_status(
+                    self.split_tx_id, self.subscription.network, self.created_on
+                )
                 if split_tx_status in ['pending', 'dropped', 'unknown', '']:
                     new_tx = getReplacedTX(self.split_tx_id)
                     if new_tx:
@@ -1260,7 +1268,7 @@ class Contribution(SuperModel):
                     return
 
             # actually validate token transfers
-            response = grants_transaction_validator(self)
+            response = grants_transaction_validator(self, tx_statuses)
             if len(response['originator']):
                 self.originated_address = response['originator'][0]
             self.validator_passed = response['validation']['passed']
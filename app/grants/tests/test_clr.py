@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Handle grants CLR calculation related tests.
+
+Copyright (C) 2020 Gitcoin Core
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+from dashboard.models import Profile
+from grants import clr
+from grants.models import Contribution, Grant, GrantCLR, PhantomFunding, Subscription
+from perftools.models import JSONStore
+from test_plus.test import TestCase
+
+
+def contribution(profile_id, amount, is_verified):
+    return {'id': profile_id, 'sum_of_each_profiles_contributions': amount, 'is_verified': is_verified}
+
+
+class CLRCalcsTest(TestCase):
+    """Define tests for the vectorized CLR engine."""
+
+    def setUp(self):
+        """Perform setup for the testcase."""
+        self.grants_data = [
+            {'id': 1, 'contributions': [
+                contribution('10', 5.0, True),
+                contribution('2', 20.0, True),
+                contribution('3', 1.0, False),
+            ]},
+            {'id': 2, 'contributions': [
+                contribution('10', 7.0, True),
+                contribution('3', 2.5, False),
+                contribution(None, 100.0, True),
+            ]},
+            {'id': 3, 'contributions': [
+                contribution('44', 50.0, False),
+            ]},
+            {'id': 4, 'contributions': []},
+            # a grant deferring its clr to grant 1 shows up under the same id
+            {'id': 1, 'contributions': [
+                contribution('2', 3.0, False),
+            ]},
+        ]
+
+    def assert_totals_equal(self, expected, actual):
+        assert [t['id'] for t in expected] == [t['id'] for t in actual]
+        for e, a in zip(expected, actual):
+            assert abs(e['clr_amount'] - a['clr_amount']) <= 1e-9 * max(1, abs(e['clr_amount']))
+
+    def test_run_clr_calcs_matches_reference(self):
+        """Test the vectorized engine against the pure python implementation."""
+        for total_pot in [10.0, 100000.0]:
+            expected, expected_percentage = clr.run_clr_calcs_reference(self.grants_data, 25.0, 5.0, total_pot)
+            actual, actual_percentage = clr.run_clr_calcs(self.grants_data, 25.0, 5.0, total_pot)
+
+            self.assert_totals_equal(expected, actual)
+            assert round(actual_percentage, 6) == round(expected_percentage, 6)
+
+    def test_run_clr_calcs_blocked(self):
+        """Test the vectorized engine gives the same totals when pairs are evaluated in small blocks."""
+        random.seed(0)
+        grants_data = [
+            {'id': grant_id, 'contributions': [
+                contribution(str(random.randint(1, 40)), random.random() * 100, random.random() > 0.5)
+                for _ in range(random.randint(1, 25))
+            ]}
+            for grant_id in range(10)
+        ]
+        expected, _ = clr.run_clr_calcs_reference(grants_data, 25.0, 5.0, 1000.0)
+
+        block_size = clr.CLR_PAIRWISE_BLOCK_SIZE
+        try:
+            clr.CLR_PAIRWISE_BLOCK_SIZE = 7
+            actual, _ = clr.run_clr_calcs(grants_data, 25.0, 5.0, 1000.0)
+        finally:
+            clr.CLR_PAIRWISE_BLOCK_SIZE = block_size
+
+        self.assert_totals_equal(expected, actual)
+
+    def test_predict_clr_for_donation_matches_full_recompute(self):
+        """Test the incremental prediction against rerunning the round with the donation added."""
+        for total_pot in [10.0, 100000.0]:
+            prediction_cache = clr.build_clr_prediction_cache(self.grants_data, 25.0, 5.0, total_pot)
+            for grant_id in [1, 2, 3, 4, 5]:
+                for amount in [0, 1, 10, 100, 1000, 10000]:
+                    expected, _ = clr.calculate_clr_for_donation(
+                        Grant(id=grant_id), amount, self.grants_data, total_pot, 25.0, 5.0
+                    )
+                    actual = clr.predict_clr_for_donation(prediction_cache, grant_id, amount)
+
+                    if expected is None:
+                        assert actual is None
+                    else:
+                        assert abs(expected - actual) <= 1e-9 * max(1, abs(expected))
+
+
+class PopulateDataForCLRBulkTest(TestCase):
+    """Define tests for the bulk CLR data loader."""
+
+    def setUp(self):
+        """Perform setup for the testcase."""
+        now = timezone.now()
+        self.clr_round = GrantCLR.objects.create(
+            round_num='1',
+            start_date=now - timedelta(days=1),
+            end_date=now + timedelta(days=1),
+            total_pot=100,
+        )
+        self.verified_profile = Profile.objects.create(data={}, handle='verified', sms_verification=True)
+        self.profile = Profile.objects.create(data={}, handle='unverified')
+        self.grants = [Grant.objects.create(title=f'grant {i}', admin_profile=self.profile) for i in range(3)]
+
+        for grant in self.grants:
+            for profile, amount in [(self.verified_profile, 10), (self.profile, 2), (self.profile, 3)]:
+                subscription = Subscription.objects.create(
+                    grant=grant,
+                    contributor_profile=profile,
+                    amount_per_period=amount,
+                    amount_per_period_usdt=amount,
+                )
+                Contribution.objects.create(subscription=subscription, profile_for_clr=profile)
+
+        self.phantom_profile = Profile.objects.create(data={}, handle='phantom')
+        for grant in self.grants[:2]:
+            PhantomFunding.objects.create(grant=grant, profile=self.phantom_profile, round_number=1)
+
+    def test_populate_data_for_clr_bulk(self):
+        """Test the bulk loader sums contributions and phantom funding per profile."""
+        grants, contributions, phantom_funding_profiles = clr.fetch_data(self.clr_round)
+        contrib_data_list = clr.populate_data_for_clr_bulk(grants, contributions, phantom_funding_profiles, self.clr_round)
+
+        assert len(contrib_data_list) == 3
+        first_grant = [ele for ele in contrib_data_list if ele['id'] == self.grants[0].pk][0]
+        contributions_by_profile = {c['id']: c for c in first_grant['contributions']}
+        assert contributions_by_profile[str(self.verified_profile.pk)]['sum_of_each_profiles_contributions'] == 10
+        assert contributions_by_profile[str(self.verified_profile.pk)]['is_verified']
+        assert contributions_by_profile[str(self.profile.pk)]['sum_of_each_profiles_contributions'] == 5
+        assert not contributions_by_profile[str(self.profile.pk)]['is_verified']
+        # phantom funding is split across the two grants the profile phantom funded
+        assert contributions_by_profile[str(self.phantom_profile.pk)]['sum_of_each_profiles_contributions'] == 2.5
+
+    def test_populate_data_for_clr_bulk_query_count(self):
+        """Test the number of queries does not grow with the number of grants and contributors."""
+        grants, contributions, phantom_funding_profiles = clr.fetch_data(self.clr_round)
+
+        with self.assertNumQueries(5):
+            clr.populate_data_for_clr_bulk(grants, contributions, phantom_funding_profiles, self.clr_round)
+
+    def test_predict_clr_rounds(self):
+        """Test the round runner returns the saturation per round and saves every grant's curve."""
+        clr_predictions = clr.predict_clr_rounds(
+            [self.clr_round], save_to_db=True, from_date=timezone.now(), processes=1
+        )
+
+        assert len(clr_predictions) == 1
+        assert clr_predictions[0]['clr_round'] == self.clr_round.pk
+        assert 0 < clr_predictions[0]['clr_percentage_distributed'] <= 100
+        for grant in Grant.objects.filter(pk__in=[grant.pk for grant in self.grants]):
+            assert len(grant.clr_prediction_curve) == 6
+            assert grant.clr_prediction_curve[0][1] > 0
+        assert JSONStore.objects.filter(view='clr_contribution').count() == 3
@@ -24,7 +24,7 @@ from secrets import token_hex
 
 from economy.utils import ConversionRateNotFoundError, convert_amount
 from gas.utils import eth_usd_conv_rate
-from perftools.models import JSONStore
+from perftools.utils import get_json_store_data
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +35,7 @@ def get_upload_filename(instance, filename):
 
 
 def get_leaderboard():
-    return JSONStore.objects.filter(view='grants', key='leaderboard').order_by('-pk').first().data
+    return get_json_store_data('grants', 'leaderboard', [])
 
 
 def generate_leaderboard(max_items=100):
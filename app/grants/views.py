@@ -71,10 +71,8 @@ from ratelimit.decorators import ratelimit
 from retail.helpers import get_ip
 from townsquare.models import Comment, PinnedPost
 from townsquare.utils import can_pin
-from web3 import HTTPProvider, Web3
 
 logger = logging.getLogger(__name__)
-w3 = Web3(HTTPProvider(settings.WEB3_HTTP_PROVIDER))
 
 # Round Schedule
 # from canonical source of truth https://gitcoin.co/blog/gitcoin-grants-round-4/
@@ -23,7 +23,7 @@ import warnings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
-from dashboard.utils import all_sendcryptoasset_models
+from dashboard.utils import all_sendcryptoasset_models, get_tx_statuses
 
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 logging.getLogger("web3").setLevel(logging.WARNING)
@@ -34,21 +34,37 @@ class Command(BaseCommand):
 
     help = 'gets the tx status of all SendCryptoAssets'
 
+    def get_contribution_tx_statuses(self, contributions):
+        """Fetch the statuses of the txs of the contributions of each network in batches."""
+        created_on_by_network = {}
+        for contrib in contributions:
+            created_on = created_on_by_network.setdefault(contrib.subscription.network, {})
+            for txid in [contrib.tx_id, contrib.split_tx_id]:
+                if txid:
+                    created_on[txid] = contrib.created_on
+        return {
+            network: get_tx_statuses(list(created_on.keys()), network, created_on)
+            for network, created_on in created_on_by_network.items()
+        }
+
     def process_grants_contribs(self):
         from grants.models import Contribution
-        contributions = Contribution.objects.filter(tx_cleared=False)
+        contributions = list(Contribution.objects.filter(tx_cleared=False).select_related('subscription'))
+        tx_statuses = self.get_contribution_tx_statuses(contributions)
         for contrib in contributions:
-            contrib.tx_id
-            contrib.update_tx_status()
+            contrib.update_tx_status(tx_statuses[contrib.subscription.network])
             print(f"syncing contrib / {contrib.pk} / {contrib.subscription.network}")
             contrib.save()
 
         # retry contributions that failed
         created_before = timezone.now()-timezone.timedelta(hours=12)
         created_after = timezone.now()-timezone.timedelta(hours=1)
-        contributions = Contribution.objects.filter(created_on__gt=created_before, created_on__lt=created_after, tx_cleared=True, success=False)
+        contributions = list(Contribution.objects.filter(
+            created_on__gt=created_before, created_on__lt=created_after, tx_cleared=True, success=False
+        ).select_related('subscription'))
+        tx_statuses = self.get_contribution_tx_statuses(contributions)
         for contrib in contributions:
-            contrib.update_tx_status()
+            contrib.update_tx_status(tx_statuses[contrib.subscription.network])
             contrib.save()
 
 
@@ -57,14 +73,28 @@ class Command(BaseCommand):
         for obj_type in all_sendcryptoasset_models():
             sent_txs = obj_type.objects.filter(tx_status__in=non_terminal_states).exclude(txid='').exclude(txid='pending_celery')
             receive_txs = obj_type.objects.filter(receive_tx_status__in=non_terminal_states).exclude(txid='').exclude(receive_txid='').exclude(receive_txid='pending_celery')
-            objects = (sent_txs | receive_txs).distinct('id')
+            objects = list((sent_txs | receive_txs).distinct('id'))
+
+            # fetch the statuses of each network in batches
+            created_on_by_network = {}
+            for obj in objects:
+                created_on = created_on_by_network.setdefault(obj.network, {})
+                if obj.tx_status in non_terminal_states:
+                    created_on[obj.txid] = obj.created_on
+                if obj.receive_tx_status in non_terminal_states:
+                    created_on[obj.receive_txid] = obj.created_on
+            tx_statuses = {
+                network: get_tx_statuses(list(created_on.keys()), network, created_on)
+                for network, created_on in created_on_by_network.items()
+            }
+
             for obj in objects:
                 print(f"syncing {obj_type} / {obj.pk} / {obj.network}")
                 if obj.tx_status in non_terminal_states:
-                    obj.update_tx_status()
+                    obj.update_tx_status(tx_statuses[obj.network].get(obj.txid))
                     print(f" - updated {obj.txid} to {obj.tx_status}")
                 if obj.receive_tx_status in non_terminal_states:
-                    obj.update_receive_tx_status()
+                    obj.update_receive_tx_status(tx_statuses[obj.network].get(obj.receive_txid))
                     print(f" - updated {obj.receive_txid} to {obj.receive_tx_status}")
                 obj.save()
 
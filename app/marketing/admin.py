@@ -23,8 +23,8 @@ from django.utils.safestring import mark_safe
 
 from .models import (
     AccountDeletionRequest, Alumni, EmailEvent, EmailSubscriber, EmailSupressionList, GithubEvent,
-    GithubOrgToTwitterHandleMapping, Job, Keyword, LeaderboardRank, ManualStat, MarketingCallback, Match, RoundupEmail,
-    SlackPresence, SlackUser, Stat, UpcomingDate,
+    GithubOrgToTwitterHandleMapping, Job, Keyword, LeaderboardGeneration, LeaderboardRank, ManualStat,
+    MarketingCallback, Match, RoundupEmail, SlackPresence, SlackUser, Stat, UpcomingDate,
 )
 
 
@@ -129,6 +129,7 @@ admin.site.register(Keyword, GeneralAdmin)
 admin.site.register(EmailEvent, EmailEventAdmin)
 admin.site.register(EmailSubscriber, EmailSubscriberAdmin)
 admin.site.register(LeaderboardRank, LeaderboardRankAdmin)
+admin.site.register(LeaderboardGeneration, GeneralAdmin)
 admin.site.register(SlackUser, SlackUserAdmin)
 admin.site.register(SlackPresence, SlackPresenceAdmin)
 admin.site.register(GithubOrgToTwitterHandleMapping, GeneralAdmin)
@@ -20,6 +20,8 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 import base64
 import datetime
 import logging
+from functools import lru_cache
+from types import SimpleNamespace
 
 from django.conf import settings
 from django.http import Http404, HttpResponse
@@ -29,30 +31,56 @@ from django.utils.translation import gettext_lazy as _
 
 import sendgrid
 from app.utils import get_profiles_from_text
-from marketing.utils import func_name, get_or_save_email_subscriber, should_suppress_notification_email
+from marketing.utils import (
+    func_name, get_email_subscribers, get_or_save_email_subscriber, should_suppress_notification_email,
+)
 from python_http_client.exceptions import HTTPError, UnauthorizedError
 from retail.emails import (
-    email_to_profile, get_notification_count, render_admin_contact_funder, render_bounty_changed,
-    render_bounty_expire_warning, render_bounty_feedback, render_bounty_request, render_bounty_startwork_expire_warning,
-    render_bounty_unintersted, render_comment, render_faucet_rejected, render_faucet_request,
-    render_featured_funded_bounty, render_funder_payout_reminder, render_funder_stale, render_gdpr_reconsent,
-    render_gdpr_update, render_grant_cancellation_email, render_grant_recontribute, render_grant_txn_failed,
-    render_grant_update, render_kudos_email, render_match_distribution, render_match_email, render_mention,
-    render_new_bounty, render_new_bounty_acceptance, render_new_bounty_rejection, render_new_bounty_roundup,
-    render_new_grant_email, render_new_supporter_email, render_new_work_submission, render_no_applicant_reminder,
-    render_nth_day_email_campaign, render_quarterly_stats, render_remember_your_cart, render_request_amount_email,
-    render_reserved_issue, render_share_bounty, render_start_work_applicant_about_to_expire,
-    render_start_work_applicant_expired, render_start_work_approved, render_start_work_new_applicant,
-    render_start_work_rejected, render_subscription_terminated_email, render_successful_contribution_email,
-    render_support_cancellation_email, render_tax_report, render_thank_you_for_supporting_email, render_tip_email,
-    render_unread_notification_email_weekly_roundup, render_wallpost, render_weekly_recap, render_bounty_hypercharged,
+    email_to_profile, get_email_shared_context, get_notification_count, render_admin_contact_funder,
+    render_bounty_changed, render_bounty_expire_warning, render_bounty_feedback, render_bounty_hypercharged,
+    render_bounty_request, render_bounty_startwork_expire_warning, render_bounty_unintersted, render_comment,
+    render_faucet_rejected, render_faucet_request, render_featured_funded_bounty, render_funder_payout_reminder,
+    render_funder_stale, render_gdpr_reconsent, render_gdpr_update, render_grant_cancellation_email,
+    render_grant_recontribute, render_grant_txn_failed, render_grant_update, render_kudos_email,
+    render_match_distribution, render_match_email, render_mention, render_new_bounty_acceptance,
+    render_new_bounty_digest, render_new_bounty_rejection, render_new_bounty_roundup, render_new_grant_email,
+    render_new_supporter_email, render_new_work_submission, render_no_applicant_reminder, render_nth_day_email_campaign,
+    render_quarterly_stats, render_remember_your_cart, render_request_amount_email, render_reserved_issue,
+    render_share_bounty, render_start_work_applicant_about_to_expire, render_start_work_applicant_expired,
+    render_start_work_approved, render_start_work_new_applicant, render_start_work_rejected,
+    render_subscription_terminated_email, render_successful_contribution_email, render_support_cancellation_email,
+    render_tax_report, render_thank_you_for_supporting_email, render_tip_email,
+    render_unread_notification_email_weekly_roundup, render_wallpost, render_weekly_recap,
 )
-from sendgrid.helpers.mail import Attachment, Content, Email, Mail, Personalization
+from sendgrid.helpers.mail import Attachment, Content, Email, Mail, Personalization, Substitution
 from sendgrid.helpers.stats import Category
 from townsquare.utils import is_email_townsquare_enabled, is_there_an_action_available
 
 logger = logging.getLogger(__name__)
 
+# recipients per request, the maximum accepted by SendGrid
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+# placeholders replaced by SendGrid in emails rendered once for many recipients
+SUBSCRIBER_PRIV_PLACEHOLDER = '-subscriber_priv-'
+PAYOUT_ADDRESS_PLACEHOLDER = '-payout_address-'
+
+
+@lru_cache(maxsize=1)
+def get_sendgrid_client():
+    """Get the SendGrid client shared by every email sent by this process."""
+    return sendgrid.SendGridAPIClient(apikey=settings.SENDGRID_API_KEY)
+
+
+def post_mail(mail, to_emails, categories):
+    try:
+        return get_sendgrid_client().client.mail.send.post(request_body=mail.get())
+    except UnauthorizedError as e:
+        logger.debug(
+            f'-- Sendgrid Mail failure - {to_emails} / {categories} - Unauthorized - Check sendgrid credentials')
+        logger.debug(e)
+    except HTTPError as e:
+        logger.debug(f'-- Sendgrid Mail failure - {to_emails} / {categories} - {e}')
+
 
 def send_mail(from_email, _to_email, subject, body, html=False,
               from_name="Gitcoin.co", cc_emails=None, categories=None, debug_mode=False, zip_path=None):
@@ -71,7 +99,6 @@ def send_mail(from_email, _to_email, subject, body, html=False,
     # setup
     from_name = str(from_name)
     subject = str(subject)
-    sg = sendgrid.SendGridAPIClient(apikey=settings.SENDGRID_API_KEY)
     from_email = Email(from_email, from_name)
     to_email = Email(to_email)
     contenttype = "text/plain" if not html else "text/html"
@@ -86,7 +113,6 @@ def send_mail(from_email, _to_email, subject, body, html=False,
         subject = _("[DEBUG] ") + subject
 
     mail = Mail(from_email, subject, to_email, content)
-    response = None
 
     # build personalization
     if cc_emails:
@@ -119,16 +145,91 @@ def send_mail(from_email, _to_email, subject, body, html=False,
 
     # debug logs
     logger.info(f"-- Sending Mail '{subject}' to {to_email}")
-    try:
-        response = sg.client.mail.send.post(request_body=mail.get())
-    except UnauthorizedError as e:
-        logger.debug(
-            f'-- Sendgrid Mail failure - {_to_email} / {categories} - Unauthorized - Check sendgrid credentials')
-        logger.debug(e)
-    except HTTPError as e:
-        logger.debug(f'-- Sendgrid Mail failure - {_to_email} / {categories} - {e}')
+    return post_mail(mail, _to_email, categories)
+
+
+def send_mail_batch(from_email, to_emails, subject, body, html=False, from_name="Gitcoin.co", categories=None,
+                    substitutions=None):
+    """Send the same email to many recipients via SendGrid, with one personalization per recipient.
+
+    Unlike send_mail, the recipients' subscribers are not saved: see get_sendable_subscribers.
+
+    Args:
+        from_email (str): The sender.
+        to_emails (list of str): The recipients.
+        subject (str): The subject.
+        body (str): The text body.
+        html (str): The html body, sent instead of the text body if set.
+        from_name (str): The name of the sender.
+        categories (list of str): The categories of the email.
+        substitutions (dict): The placeholders replaced in the subject and body of each recipient, by recipient.
+
+    Returns:
+        list: The responses of the requests sent.
+
+    """
+    if not settings.SENDGRID_API_KEY:
+        logger.warning('No SendGrid API Key set. Not attempting to send email.')
+        return []
+
+    if categories is None:
+        categories = ['default']
+    if substitutions is None:
+        substitutions = {}
+
+    subject = str(subject)
+    if settings.IS_DEBUG_ENV:
+        # just to be double secret sure of what were doing in dev
+        substitutions = {settings.CONTACT_EMAIL: substitutions.get(to_emails[0], {})} if to_emails else {}
+        to_emails = [settings.CONTACT_EMAIL] if to_emails else []
+        subject = _("[DEBUG] ") + subject
+
+    responses = []
+    for offset in range(0, len(to_emails), SENDGRID_MAX_PERSONALIZATIONS):
+        batch = to_emails[offset:offset + SENDGRID_MAX_PERSONALIZATIONS]
+        mail = Mail()
+        mail.from_email = Email(from_email, str(from_name))
+        mail.subject = subject
+        mail.add_content(Content("text/html", html) if html else Content("text/plain", body))
+        for to_email in batch:
+            p = Personalization()
+            p.add_to(Email(to_email))
+            for key, value in substitutions.get(to_email, {}).items():
+                p.add_substitution(Substitution(key, str(value)))
+            mail.add_personalization(p)
+        for category in categories:
+            mail.add_category(Category(category))
+
+        logger.info(f"-- Sending Mail '{subject}' to {len(batch)} recipients")
+        responses.append(post_mail(mail, batch, categories))
+    return responses
+
+
+def get_sendable_subscribers(to_emails, email_type):
+    """Get the subscribers of the recipients of a campaign who accept its emails, in a constant number of queries.
+
+    Args:
+        to_emails (list of str): The recipients.
+        email_type (str): The type of the emails, as in EmailSubscriber.should_send_email_type_to.
+
+    Returns:
+        dict: The EmailSubscriber of each recipient who accepts the emails.
+
+    """
+    return {
+        to_email: es for to_email, es in get_email_subscribers(to_emails, 'internal').items()
+        if es and es.should_send_email_type_to(email_type)
+    }
+
 
-    return response
+def get_preferred_languages(to_emails):
+    """Get the language of each recipient, as activated by setup_lang."""
+    from django.contrib.auth.models import User
+    languages = {}
+    for user in User.objects.select_related('profile').filter(email__in=to_emails).order_by('pk'):
+        if hasattr(user, 'profile'):
+            languages.setdefault(user.email, user.profile.get_profile_preferred_language())
+    return languages
 
 
 def nth_day_email_campaign(nth, subscriber):
@@ -1218,12 +1319,14 @@ def new_bounty_daily(bounties, old_bounties, to_emails=None, featured_bounties=[
     if to_emails is None:
         to_emails = []
 
-    from marketing.views import quest_of_the_day, upcoming_grant, upcoming_hackathon, latest_activities, upcoming_dates, upcoming_dates, email_announcements
-    quest = quest_of_the_day()
-    grant = upcoming_grant()
-    dates = list(upcoming_hackathon()) + list(upcoming_dates())
-    announcements = email_announcements()
+    from marketing.views import latest_activities
+    shared_context = get_email_shared_context()
+    quest = shared_context['quest_of_the_day']
+    dates = shared_context['upcoming_hackathon'] + shared_context['upcoming_dates']
+    announcements = shared_context['email_announcements']
     chats_count = 0
+    notifications_count = 0
+    has_offer = False
 
     offers = f""
     if to_emails:
@@ -1240,7 +1343,8 @@ def new_bounty_daily(bounties, old_bounties, to_emails=None, featured_bounties=[
                 plural = 's' if chats_count > 1 else ''
                 chat = f"💬 {chats_count} Chat{plural}"
 
-        notifications = get_notification_count(profile, 7, timezone.now())
+        notifications_count = get_notification_count(profile, 7, timezone.now())
+        notifications = notifications_count
         if notifications:
             plural = 's' if notifications > 1 else ''
             notifications = f"🔵 {notifications} Notification{plural}"
@@ -1279,7 +1383,11 @@ def new_bounty_daily(bounties, old_bounties, to_emails=None, featured_bounties=[
 
         subject = f"{chat}{comma(chat)}{notifications}{comma(notifications)}{new_announcements}{comma(new_announcements)}{new_bounties}{comma(new_bounties)}{new_dates}{comma(new_dates)}{new_quests}{comma(new_quests)}{offers}{comma(True)}👤1 Trending Avatar"
 
+    subscribers = get_sendable_subscribers(to_emails, 'new_bounty_notifications')
     for to_email in to_emails:
+        if to_email not in subscribers:
+            continue
+
         cur_language = translation.get_language()
         try:
             setup_lang(to_email)
@@ -1289,40 +1397,68 @@ def new_bounty_daily(bounties, old_bounties, to_emails=None, featured_bounties=[
             user = User.objects.filter(email__iexact=to_email).first()
             activities = latest_activities(user)
 
-            html, text = render_new_bounty(to_email, bounties, old_bounties='', quest_of_the_day=quest, upcoming_grant=grant, upcoming_hackathon=upcoming_hackathon(), latest_activities=activities, chats_count=chats_count, featured_bounties=featured_bounties)
-
-            if not should_suppress_notification_email(to_email, 'new_bounty_notifications'):
-                send_mail(from_email, to_email, subject, text, html, categories=['marketing', func_name()])
+            html, text = render_new_bounty_digest(
+                subscribers[to_email],
+                bounties,
+                old_bounties='',
+                latest_activities=activities,
+                notifications_count=notifications_count,
+                chats_count=chats_count,
+                show_action=has_offer,
+                featured_bounties=featured_bounties,
+            )
+            send_mail_batch(from_email, [to_email], subject, text, html, categories=['marketing', func_name()])
         finally:
             translation.activate(cur_language)
 
 
 def weekly_roundup(to_emails=None):
+    """Send the weekly roundup to a batch of recipients.
+
+    The roundup is rendered once per language and payout address presence, with placeholders for the
+    parts specific to each subscriber, and sent with one request per SENDGRID_MAX_PERSONALIZATIONS recipients.
+
+    """
     if to_emails is None:
         to_emails = []
 
-    for to_email in to_emails:
-        cur_language = translation.get_language()
+    subscribers = get_sendable_subscribers(to_emails, 'roundup')
+    for to_email in set(to_emails) - set(subscribers):
+        print(f'supressed {to_email}')
+    languages = get_preferred_languages(list(subscribers))
+
+    groups = {}
+    cur_language = translation.get_language()
+    for to_email, es in subscribers.items():
+        payout_address = es.profile.preferred_payout_address if es.profile else ''
+        groups.setdefault((languages.get(to_email, cur_language), bool(payout_address)), {})[to_email] = {
+            SUBSCRIBER_PRIV_PLACEHOLDER: es.priv,
+            PAYOUT_ADDRESS_PLACEHOLDER: payout_address or '',
+        }
+
+    for (language, has_payout_address), substitutions in groups.items():
         try:
-            setup_lang(to_email)
-            html, text, subject, from_email, from_name = render_new_bounty_roundup(to_email)
+            translation.activate(language)
+            subscriber = SimpleNamespace(
+                priv=SUBSCRIBER_PRIV_PLACEHOLDER,
+                profile=SimpleNamespace(preferred_payout_address=PAYOUT_ADDRESS_PLACEHOLDER) if has_payout_address else None,
+            )
+            html, text, subject, from_email, from_name = render_new_bounty_roundup(None, subscriber=subscriber)
 
             if not html:
                 print("no content")
                 return
 
-            if not should_suppress_notification_email(to_email, 'roundup'):
-                send_mail(
-                    from_email,
-                    to_email,
-                    subject,
-                    text,
-                    html,
-                    from_name=from_name,
-                    categories=['marketing', func_name()],
-                )
-            else:
-                print('supressed')
+            send_mail_batch(
+                from_email,
+                list(substitutions),
+                subject,
+                text,
+                html,
+                from_name=from_name,
+                categories=['marketing', func_name()],
+                substitutions=substitutions,
+            )
         finally:
             translation.activate(cur_language)
 
@@ -1331,25 +1467,27 @@ def weekly_recap(to_emails=None):
     if to_emails is None:
         to_emails = []
 
+    subscribers = get_sendable_subscribers(to_emails, 'weeklyrecap')
     for to_email in to_emails:
+        if to_email not in subscribers:
+            print('supressed')
+            continue
+
         cur_language = translation.get_language()
         try:
             setup_lang(to_email)
-            html, text, subject = render_weekly_recap(to_email)
+            html, text, subject = render_weekly_recap(to_email, subscriber=subscribers[to_email])
             from_email = settings.PERSONAL_CONTACT_EMAIL
 
-            if not should_suppress_notification_email(to_email, 'weeklyrecap'):
-                send_mail(
-                    from_email,
-                    to_email,
-                    subject,
-                    text,
-                    html,
-                    from_name="Kevin Owocki (Gitcoin.co)",
-                    categories=['marketing', func_name()],
-                )
-            else:
-                print('supressed')
+            send_mail_batch(
+                from_email,
+                [to_email],
+                subject,
+                text,
+                html,
+                from_name="Kevin Owocki (Gitcoin.co)",
+                categories=['marketing', func_name()],
+            )
         finally:
             translation.activate(cur_language)
 
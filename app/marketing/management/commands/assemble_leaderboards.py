@@ -20,13 +20,17 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.db.models import Max
 from django.utils import timezone
 
+from app.utils import get_location_from_ip
 from cacheops import CacheMiss, cache
-from dashboard.models import Bounty, Profile, Tip
+from dashboard.models import Bounty, BountyFulfillment, Profile, Tip, UserAction
+from economy.utils import ConversionRateNotFoundError, convert_amount
+from git.utils import org_name
 from grants.models import Contribution
-from kudos.models import KudosTransfer
-from marketing.models import LeaderboardRank
+from kudos.models import KudosTransfer, Token
+from marketing.models import LeaderboardGeneration, LeaderboardRank
 
 # Constants
 IGNORE_PAYERS = []
@@ -52,6 +56,12 @@ CONTINENTS = 'continents'
 
 TIMES = [ALL, WEEKLY, QUARTERLY, YEARLY, MONTHLY]
 BREAKDOWNS = [FULFILLED, ALL, PAYERS, EARNERS, ORGS, KEYWORDS, KUDOS, TOKENS, COUNTRIES, CITIES, CONTINENTS]
+PRODUCTS = ['kudos', 'grants', 'bounties', 'tips', 'all']
+
+# number of rows whose profiles are loaded together by the LeaderboardAggregator
+CHUNK_SIZE = 2000
+# number of stale LeaderboardRank rows deleted per query when pruning old generations
+PRUNE_BATCH_SIZE = 5000
 
 WEEKLY_CUTOFF = timezone.now() - timezone.timedelta(days=(30 if settings.DEBUG else 7))
 MONTHLY_CUTOFF = timezone.now() - timezone.timedelta(days=30)
@@ -421,95 +431,407 @@ def do_leaderboard_feed():
 
 
 
-def do_leaderboard():
-    global ranks
-    global counts
+def chunks(iterable, size):
+    chunk = []
+    for ele in iterable:
+        chunk.append(ele)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
-    products = ['kudos', 'grants', 'bounties', 'tips', 'all']
-    for product in products:
 
-        ranks = default_ranks()
-        counts = default_ranks()
-        index_terms = []
+def keywords_list(metadata):
+    """Get the keywords of a bounty from its metadata, see Bounty.keywords_list."""
+    try:
+        keywords = metadata.get('issueKeywords', False)
+    except Exception:
+        return []
+    if not keywords:
+        return []
+    try:
+        return [keyword.strip() for keyword in keywords.split(",")]
+    except AttributeError:
+        return []
+
+
+class LeaderboardAggregator:
+    """Aggregate the leaderboards of every product, time and breakdown in one pass over pre-joined rows.
+
+    The rules of each product follow the *_index_terms and sum_*_helper functions above, but
+    profiles, locations, org names and conversion rates are looked up once per run in memory
+    instead of per row.
+
+    """
 
-        if product in ['all', 'grants']:
-            # get grants
-            grants = Contribution.objects.filter(subscription__network='mainnet')
-            # iterate
-            for gc in grants:
+    def __init__(self):
+        self.ranks = {product: default_ranks() for product in PRODUCTS}
+        self.counts = {product: default_ranks() for product in PRODUCTS}
+        self.profiles = {}
+        self.org_names = {}
+        self.usdt_rates = {}
+        self.github_org_or_repo_names = {}
+        self.cutoffs = [
+            (WEEKLY, WEEKLY_CUTOFF),
+            (MONTHLY, MONTHLY_CUTOFF),
+            (QUARTERLY, QUARTERLY_CUTOFF),
+            (YEARLY, YEARLY_CUTOFF),
+        ]
+
+    def load_profiles(self, handles):
+        """Load the profile and latest login location of each handle not loaded yet."""
+        handles = set(handle.lower() for handle in handles if handle) - set(self.profiles.keys())
+        for chunk in chunks(handles, CHUNK_SIZE):
+            for handle in chunk:
+                self.profiles[handle] = None
+
+            profiles_by_pk = {}
+            profiles = Profile.objects.filter(handle__in=chunk).order_by('pk').values(
+                'pk', 'handle', 'suppress_leaderboard', 'hide_profile', 'keywords'
+            )
+            for profile in profiles:
+                # the latest profile wins when a handle is duplicated
+                profile['locations'] = []
+                self.profiles[profile['handle']] = profile
+                profiles_by_pk[profile['pk']] = profile
+
+            logins = UserAction.objects.filter(profile_id__in=profiles_by_pk.keys(), action='Login').order_by(
+                'profile_id', '-created_on'
+            ).distinct('profile_id').values('pk', 'profile_id', 'location_data', 'ip_address')
+            for login in logins:
+                location_data = login['location_data']
+                if not location_data:
+                    location_data = get_location_from_ip(login['ip_address'])
+                    UserAction.objects.filter(pk=login['pk']).update(location_data=location_data)
+                profiles_by_pk[login['profile_id']]['locations'] = [location_data]
+
+    def should_suppress_leaderboard(self, handle):
+        if not handle:
+            return True
+        profile = self.profiles.get(handle.lower())
+        return bool(profile and (profile['suppress_leaderboard'] or profile['hide_profile']))
+
+    def locations(self, *handles):
+        locations = []
+        for handle in handles:
+            profile = self.profiles.get(handle.lower()) if handle else None
+            if profile:
+                locations += profile['locations']
+        return locations
+
+    def geo_terms(self, locations):
+        return (
+            list(set(ele['country_name'] for ele in locations if ele and ele.get('country_name'))),
+            list(set(ele['city'] for ele in locations if ele and ele.get('city'))),
+            list(set(ele['continent_name'] for ele in locations if ele and ele.get('continent_name'))),
+        )
+
+    def org_name(self, url):
+        if url not in self.org_names:
+            try:
+                self.org_names[url] = org_name(url)
+            except Exception:
+                self.org_names[url] = None
+        return self.org_names[url]
+
+    def value_in_usdt_now(self, amount, token_name):
+        """See SendCryptoAsset.value_in_usdt_now, with the conversion rate looked up once per token."""
+        if token_name in settings.STABLE_COINS:
+            return float(amount)
+        if token_name not in self.usdt_rates:
+            try:
+                self.usdt_rates[token_name] = float(convert_amount(1, token_name, 'USDT'))
+            except ConversionRateNotFoundError:
                 try:
-                    index_terms = grant_index_terms(gc)
-                    sum_grants(gc, index_terms)
-                except Exception as e:
-                    print(gc.id)
-                    print(e)
-
-        if product in ['all', 'bounties']:
-            # get bounties
-            bounties = Bounty.objects.current().filter(network='mainnet')
-
-            # iterate
-            for b in bounties:
-                if not b._val_usd_db:
+                    self.usdt_rates[token_name] = float(convert_amount(convert_amount(1, token_name, 'ETH'), 'ETH', 'USDT'))
+                except ConversionRateNotFoundError:
+                    self.usdt_rates[token_name] = None
+        if self.usdt_rates[token_name] is None:
+            return None
+        return round(float(amount) * self.usdt_rates[token_name], 2)
+
+    def is_github_org_or_repo_name(self, index_term):
+        if index_term not in self.github_org_or_repo_names:
+            self.github_org_or_repo_names[index_term] = Bounty.objects.filter(
+                github_url__icontains=f'https://github.com/{index_term}'
+            ).exists() or Bounty.objects.filter(github_url__icontains=f'/{index_term}/').exists()
+        return self.github_org_or_repo_names[index_term]
+
+    def add(self, product, created_on, val_usd, elements):
+        """Add a row's (breakdown, index_term) elements to every time window it falls in, for its product and all."""
+        times = [ALL] + [time for time, cutoff in self.cutoffs if created_on > cutoff]
+        amount = round(float(val_usd), 2)
+        for _product in set([product, ALL]):
+            ranks = self.ranks[_product]
+            counts = self.counts[_product]
+            for breakdown, index_term in elements:
+                if not index_term:
+                    continue
+                index_term = index_term.replace('@', '')
+                if not index_term or index_term == "None":
                     continue
+                for time in times:
+                    key = f'{time}_{breakdown}'
+                    ranks[key][index_term] = ranks[key].get(index_term, 0) + amount
+                    counts[key][index_term] = counts[key].get(index_term, 0) + 1
+
+    def grant_elements(self, row):
+        contributor = row['subscription__contributor_profile__handle']
+        admin = row['subscription__grant__admin_profile__handle']
+        if not contributor or not admin:
+            return []
+        grant_org_name = self.org_name(row['subscription__grant__reference_url'])
+        token = row['subscription__token_symbol']
+        countries, cities, continents = self.geo_terms(self.locations(contributor, admin))
 
-                index_terms = bounty_index_terms(b)
-                sum_bounties(b, index_terms)
+        index_terms = []
+        if not self.should_suppress_leaderboard(contributor):
+            index_terms.append(contributor.lower())
+        if not self.should_suppress_leaderboard(admin):
+            index_terms.append(admin.lower())
+        if not self.should_suppress_leaderboard(grant_org_name):
+            index_terms.append(grant_org_name.lower())
+        if not self.should_suppress_leaderboard(token):
+            index_terms.append(token)
+        index_terms += countries + cities + continents
+
+        elements = []
+        for index_term in index_terms:
+            elements += [(ALL, index_term), (FULFILLED, index_term)]
+            if admin.lower() == index_term and index_term not in IGNORE_EARNERS:
+                elements.append((EARNERS, index_term))
+            if contributor.lower() == index_term:
+                elements.append((PAYERS, index_term))
+            if grant_org_name and grant_org_name.lower() == index_term:
+                elements.append((ORGS, index_term))
+            if token == index_term:
+                elements.append((TOKENS, index_term))
+            elements += self.geo_elements(index_term, countries, cities, continents)
+        return elements
+
+    def bounty_elements(self, row, fulfillments):
+        owner = row['bounty_owner_github_username']
+        bounty_org_name = self.org_name(row['github_url'])
+        token = row['token_name']
+        keywords = keywords_list(row['metadata'])
+        fulfiller_handles = [handle for _, handle in fulfillments]
+        countries, cities, continents = self.geo_terms(self.locations(owner, *fulfiller_handles))
 
-        if product in ['all', 'tips']:
-            # get tips
-            tips = Tip.objects.send_success().filter(network='mainnet')
+        index_terms = []
+        if not self.should_suppress_leaderboard(owner):
+            index_terms.append(owner.lower())
+        if bounty_org_name:
+            index_terms.append(bounty_org_name.lower())
+        for fulfiller_github_username, _ in fulfillments:
+            if not self.should_suppress_leaderboard(fulfiller_github_username):
+                index_terms.append(fulfiller_github_username.lower())
+        index_terms.append(token)
+        index_terms += cities + continents + countries
+        index_terms += [keyword.lower() for keyword in keywords]
+
+        elements = []
+        lowered_keywords = [keyword.lower() for keyword in keywords]
+        for index_term in index_terms:
+            if not index_term:
+                continue
+            elements += [(ALL, index_term), (FULFILLED, index_term)]
+            if index_term == owner and index_term not in IGNORE_PAYERS:
+                elements.append((PAYERS, index_term))
+            if index_term == bounty_org_name and index_term not in IGNORE_PAYERS:
+                elements.append((ORGS, index_term))
+            if index_term in fulfiller_handles and index_term not in IGNORE_EARNERS:
+                elements.append((EARNERS, index_term))
+            if index_term == token:
+                elements.append((TOKENS, index_term))
+            elements += self.geo_elements(index_term, countries, cities, continents)
+            if index_term.lower() in lowered_keywords and not self.is_github_org_or_repo_name(index_term):
+                elements.append((KEYWORDS, index_term.lower()))
+        return elements
+
+    def tip_elements(self, row):
+        username = row['username']
+        from_username = row['from_username']
+        token = row['tokenName']
+        tip_org_name = self.org_name(row['github_url'])
+        countries, cities, continents = self.geo_terms(self.locations(username, from_username))
 
-            # iterate
-            for t in tips:
-                if not t.value_in_usdt_now:
+        index_terms = []
+        if not self.should_suppress_leaderboard(username):
+            index_terms.append(username.lower())
+        if not self.should_suppress_leaderboard(from_username):
+            index_terms.append(from_username.lower())
+        if not self.should_suppress_leaderboard(tip_org_name):
+            index_terms.append(tip_org_name.lower())
+        if not self.should_suppress_leaderboard(token):
+            index_terms.append(token)
+        index_terms += countries + cities + continents
+
+        elements = []
+        for index_term in index_terms:
+            elements += [(ALL, index_term), (FULFILLED, index_term)]
+            if username == index_term and index_term not in IGNORE_EARNERS:
+                elements.append((EARNERS, index_term))
+            if from_username == index_term:
+                elements.append((PAYERS, index_term))
+            if tip_org_name == index_term:
+                elements.append((ORGS, index_term))
+            if token == index_term:
+                elements.append((TOKENS, index_term))
+            elements += self.geo_elements(index_term, countries, cities, continents)
+        return elements
+
+    def geo_elements(self, index_term, countries, cities, continents):
+        elements = []
+        if index_term in countries:
+            elements.append((COUNTRIES, index_term))
+        if index_term in cities:
+            elements.append((CITIES, index_term))
+        if index_term in continents:
+            elements.append((CONTINENTS, index_term))
+        return elements
+
+    def aggregate_grants(self):
+        contributions = Contribution.objects.filter(subscription__network='mainnet').values(
+            'created_on',
+            'subscription__amount_per_period_usdt',
+            'subscription__token_symbol',
+            'subscription__contributor_profile__handle',
+            'subscription__grant__admin_profile__handle',
+            'subscription__grant__reference_url',
+        )
+        for chunk in chunks(contributions.iterator(), CHUNK_SIZE):
+            self.load_profiles(
+                [row['subscription__contributor_profile__handle'] for row in chunk] +
+                [row['subscription__grant__admin_profile__handle'] for row in chunk] +
+                [self.org_name(row['subscription__grant__reference_url']) for row in chunk] +
+                [row['subscription__token_symbol'] for row in chunk]
+            )
+            for row in chunk:
+                if row['subscription__amount_per_period_usdt'] is None:
+                    continue
+                self.add('grants', row['created_on'], row['subscription__amount_per_period_usdt'], self.grant_elements(row))
+
+    def aggregate_bounties(self):
+        bounties = Bounty.objects.current().filter(network='mainnet', idx_status='done').exclude(_val_usd_db=0).values(
+            'pk', 'created_on', '_val_usd_db', 'bounty_owner_github_username', 'github_url', 'token_name', 'metadata'
+        )
+        for chunk in chunks(bounties.iterator(), CHUNK_SIZE):
+            fulfillments = {}
+            accepted_fulfillments = BountyFulfillment.objects.filter(
+                bounty_id__in=[row['pk'] for row in chunk], accepted=True
+            ).values_list('bounty_id', 'fulfiller_github_username', 'profile__handle')
+            for bounty_id, fulfiller_github_username, handle in accepted_fulfillments:
+                fulfillments.setdefault(bounty_id, []).append((fulfiller_github_username, handle))
+
+            self.load_profiles(
+                [row['bounty_owner_github_username'] for row in chunk] +
+                [ele for bounty_fulfillments in fulfillments.values() for fulfillment in bounty_fulfillments for ele in fulfillment]
+            )
+            for row in chunk:
+                if not row['_val_usd_db']:
                     continue
-                index_terms = tip_index_terms(t)
-                sum_tips(t, index_terms)
+                self.add('bounties', row['created_on'], row['_val_usd_db'], self.bounty_elements(row, fulfillments.get(row['pk'], [])))
+
+    def aggregate_tips(self):
+        tips = Tip.objects.send_success().filter(network='mainnet').values(
+            'created_on', 'amount', 'tokenName', 'username', 'from_username', 'github_url'
+        )
+        for chunk in chunks(tips.iterator(), CHUNK_SIZE):
+            self.load_profiles(
+                [row['username'] for row in chunk] +
+                [row['from_username'] for row in chunk] +
+                [self.org_name(row['github_url']) for row in chunk] +
+                [row['tokenName'] for row in chunk]
+            )
+            for row in chunk:
+                val_usd = self.value_in_usdt_now(row['amount'], row['tokenName'])
+                if not val_usd:
+                    continue
+                self.add('tips', row['created_on'], val_usd, self.tip_elements(row))
+
+    def aggregate_kudos(self):
+        kudos_transfers = KudosTransfer.objects.send_success().filter(
+            network='mainnet', kudos_token_cloned_from__isnull=False
+        ).values('created_on', 'amount', 'tokenName', 'kudos_token_cloned_from_id', 'kudos_token_cloned_from__name')
+        for row in kudos_transfers.iterator():
+            val_usd = self.value_in_usdt_now(row['amount'], row['tokenName'])
+            if val_usd is None:
+                continue
+            url = Token(pk=row['kudos_token_cloned_from_id'], name=row['kudos_token_cloned_from__name']).url
+            self.add('kudos', row['created_on'], val_usd, [(KUDOS, url), (ALL, url), (FULFILLED, url)])
+
+    def aggregate(self):
+        self.aggregate_grants()
+        self.aggregate_bounties()
+        self.aggregate_tips()
+        self.aggregate_kudos()
+
+    def leaderboard_ranks(self, product, created_on):
+        """Build the unsaved LeaderboardRank objects of a product."""
+        ranks = self.ranks[product]
+        counts = self.counts[product]
+        self.load_profiles([index_term for rankings in ranks.values() for index_term in rankings.keys()])
+
+        leaderboard_ranks = []
+        for key, rankings in ranks.items():
+            rank = 1
+            for index_term, amount in sorted(rankings.items(), key=lambda x: x[1], reverse=True):
+                profile = self.profiles.get(index_term.lower())
+                leaderboard_ranks.append(LeaderboardRank(
+                    count=counts[key][index_term],
+                    active=True,
+                    amount=amount,
+                    rank=rank,
+                    leaderboard=key,
+                    github_username=index_term,
+                    product=product,
+                    created_on=created_on,
+                    profile_id=profile['pk'] if profile else None,
+                    tech_keywords=profile['keywords'] if profile else [],
+                ))
+                rank += 1
+        return leaderboard_ranks
+
+
+def next_leaderboard_generation(product):
+    """Return a generation number no LeaderboardRank of the product has used yet."""
+    latest = LeaderboardRank.objects.filter(product=product).aggregate(Max('generation'))['generation__max']
+    current = LeaderboardGeneration.objects.filter(product=product).values_list('generation', flat=True).first()
+    return max(latest or 0, current or 0) + 1
+
+
+def prune_leaderboard_generations(product, generation, batch_size=PRUNE_BATCH_SIZE):
+    """Delete the LeaderboardRank objects of every other generation of a product, one batch at a time."""
+    stale_ranks = LeaderboardRank.objects.filter(product=product).exclude(generation=generation)
+    deleted = 0
+    while True:
+        pks = list(stale_ranks.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += LeaderboardRank.objects.filter(pk__in=pks).delete()[0]
+
 
-        if product in ['all', 'kudos']:
-            # kudos'
-            for kt in KudosTransfer.objects.send_success().filter(network='mainnet'):
-                sum_kudos(kt)
+def do_leaderboard():
+    aggregator = LeaderboardAggregator()
+    aggregator.aggregate()
 
-        # set old LR as inactive
+    for product in PRODUCTS:
         created_on = timezone.now()
+        generation = next_leaderboard_generation(product)
+        leaderboard_ranks = aggregator.leaderboard_ranks(product, created_on)
+        for leaderboard_rank in leaderboard_ranks:
+            leaderboard_rank.generation = generation
+
+        # save the new generation in DB; it is not served until the pointer is flipped
+        LeaderboardRank.objects.bulk_create(leaderboard_ranks, batch_size=1000)
+
+        # serve the new generation
         with transaction.atomic():
-            lrs = LeaderboardRank.objects.active().filter(product=product)
-            lrs.update(active=False)
-
-            # save new LR in DB
-            for key, rankings in ranks.items():
-                rank = 1
-                for index_term, amount in sorted(rankings.items(), key=lambda x: x[1], reverse=True):
-                    count = counts[key][index_term]
-                    lbr_kwargs = {
-                        'count': count,
-                        'active': True,
-                        'amount': amount,
-                        'rank': rank,
-                        'leaderboard': key,
-                        'github_username': index_term,
-                        'product': product,
-                        'created_on': created_on,
-                    }
-
-                    try:
-                        profile = Profile.objects.get(handle=index_term.lower())
-                        lbr_kwargs['profile'] = profile
-                        lbr_kwargs['tech_keywords'] = profile.keywords
-                    except Profile.MultipleObjectsReturned:
-                        profile = Profile.objects.filter(handle=index_term.lower()).latest('id')
-                        lbr_kwargs['profile'] = profile
-                        lbr_kwargs['tech_keywords'] = profile.keywords
-                        print(f'Multiple profiles found for username: {index_term}')
-                    except Profile.DoesNotExist:
-                        print(f'No profiles found for username: {index_term}')
-
-                    # TODO: Bucket LeaderboardRank objects and .bulk_create
-                    LeaderboardRank.objects.create(**lbr_kwargs)
-                    rank += 1
-                    print(key, index_term, amount, count, rank, product)
+            LeaderboardGeneration.objects.update_or_create(product=product, defaults={'generation': generation})
+
+        pruned = prune_leaderboard_generations(product, generation)
+        print(f'{product}: {len(leaderboard_ranks)} leaderboard ranks, {pruned} pruned')
 
 
 class Command(BaseCommand):
@@ -17,17 +17,24 @@
 '''
 from django.core.management.base import BaseCommand
 
+from avatar.batch import AVATAR_BATCH_SIZE, AVATAR_RENDER_WORKERS, make_random_avatars
+from avatar.models import CustomAvatar
+from dashboard.models import Profile
+
 
 class Command(BaseCommand):
 
-    help = 'stub for local testing'
+    help = 'gives a random avatar to every user without a custom avatar'
 
-    def handle(self, *args, **options):
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=AVATAR_RENDER_WORKERS, help='processes rendering avatars')
+        parser.add_argument('--batch-size', type=int, default=AVATAR_BATCH_SIZE, help='profiles handled per batch')
 
-        from django.contrib.auth.models import User
-        for user in User.objects.all():
-            if hasattr(user, 'profile'):
-                profile = user.profile
-                if not profile.has_custom_avatar():
-                    profile.build_random_avatar()
-                    print(profile.handle)
+    def handle(self, *args, **options):
+        with_custom_avatar = CustomAvatar.objects.filter(active=True).values('profile')
+        profiles = Profile.objects.filter(user__isnull=False).exclude(pk__in=with_custom_avatar)
+        stats = make_random_avatars(profiles.iterator(), workers=options['workers'], batch_size=options['batch_size'])
+        print(
+            f"made {stats['profiles']} avatars from {stats['rendered']} unique renders ({stats['failed']} without png) "
+            f"in {stats['seconds']:.1f}s, {stats['avatars_per_second']:.1f} avatars/sec"
+        )
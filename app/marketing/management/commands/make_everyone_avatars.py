@@ -15,26 +15,22 @@
     along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 '''
-from django.conf import settings
 from django.core.management.base import BaseCommand
 
+from avatar.batch import make_random_avatars
+from avatar.models import CustomAvatar
+from dashboard.models import Profile
+
 
 class Command(BaseCommand):
 
     help = 'stub for local testing'
 
     def handle(self, *args, **options):
-
-        from django.contrib.auth.models import User
-        from dashboard.models import Profile
-        from avatar.models import CustomAvatar
-
-        for user in User.objects.filter(username__iexact="kamescg"):
-            if hasattr(user, 'profile'):
-                profile = user.profile
-                if profile.has_custom_avatar():
-                    for avatar in CustomAvatar.objects.filter(active=True, autogenerated=True, profile=profile):
-                        avatar.delete()
-                if not profile.has_custom_avatar():
-                    profile.build_random_avatar()
-                    print(profile.handle)
+        profiles = list(Profile.objects.filter(user__username__iexact="kamescg"))
+        CustomAvatar.objects.filter(active=True, autogenerated=True, profile__in=profiles).delete()
+        profiles = [profile for profile in profiles if not profile.has_custom_avatar()]
+        stats = make_random_avatars(profiles)
+        for profile in profiles:
+            print(profile.handle)
+        print(f"made {stats['profiles']} avatars in {stats['seconds']:.1f}s")
@@ -15,16 +15,19 @@
     along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 '''
+import json
 import logging
 import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connection
 from django.utils import timezone
 
 from dashboard.models import Bounty
-from marketing.mails import new_bounty_daily
+from marketing.mails import get_sendable_subscribers, new_bounty_daily
 from marketing.models import EmailSubscriber
 from townsquare.utils import is_email_townsquare_enabled
 
@@ -32,6 +35,11 @@ warnings.filterwarnings("ignore")
 
 override_in_dev = True
 
+# how old the other open bounties listed in the emails can be
+ALL_BOUNTIES_DAYS_BACK = 60
+NEW_BOUNTIES_EMAIL_WORKERS = 8
+NEW_BOUNTIES_EMAIL_CHUNK_SIZE = 200
+
 def validate_email(email):
 
     import re
@@ -40,24 +48,81 @@ def validate_email(email):
         return True
     return False
 
-def get_bounties_for_keywords(keywords, hours_back):
-    new_bounties_pks = []
-    all_bounties_pks = []
+def get_bounty_keyword_text(title, issue_description, issue_keywords):
+    """Get the fields of a bounty matched by keywords, uppercased the way icontains compares them."""
+    if issue_keywords is not None and not isinstance(issue_keywords, str):
+        issue_keywords = json.dumps(issue_keywords)
+    return [(field or '').upper() for field in [title, issue_description, issue_keywords]]
+
+
+def build_bounty_keyword_index(keywords, hours_back):
+    """Map keywords to the open bounties matching them.
+
+    The open bounties are read with a single query and each keyword is matched against them in memory,
+    with the same substring semantics as BountyQuerySet.keyword.
+
+    Args:
+        keywords (iterable of str): The keywords to index.
+        hours_back (int): How recent the new bounties are.
+
+    Returns:
+        dict: The (pk, web3_created) of the bounties matching each keyword.
+
+    """
+    cutoff = min(
+        timezone.now() - timezone.timedelta(hours=hours_back),
+        timezone.now() - timezone.timedelta(days=ALL_BOUNTIES_DAYS_BACK),
+    )
+    bounties = Bounty.objects.current().filter(
+        network='mainnet',
+        idx_status__in=['open'],
+        web3_created__gt=cutoff,
+    ).exclude(bounty_reserved_for_user__isnull=False).values_list(
+        'pk', 'web3_created', 'title', 'issue_description', 'metadata'
+    )
+    bounties = [
+        (pk, web3_created, get_bounty_keyword_text(title, issue_description, (metadata or {}).get('issueKeywords')))
+        for pk, web3_created, title, issue_description, metadata in bounties
+    ]
+
+    index = {}
+    for keyword in set(keywords):
+        upper_keyword = keyword.upper()
+        index[keyword] = [
+            (pk, web3_created) for pk, web3_created, fields in bounties
+            if any(upper_keyword in field for field in fields)
+        ]
+    return index
+
+
+def get_bounties_for_keywords(keywords, hours_back, index=None):
+    """Get the new and other open bounties matching any of the keywords.
+
+    Args:
+        keywords (iterable of str): The keywords.
+        hours_back (int): How recent the new bounties are.
+        index (dict): The index built by build_bounty_keyword_index for these keywords. Built if None.
+
+    Returns:
+        tuple: The QuerySets of the new and of the other bounties.
+
+    """
+    if index is None:
+        index = build_bounty_keyword_index(keywords, hours_back)
 
     new_bounty_cutoff = (timezone.now() - timezone.timedelta(hours=hours_back))
-    all_bounty_cutoff = (timezone.now() - timezone.timedelta(days=60))
+    all_bounty_cutoff = (timezone.now() - timezone.timedelta(days=ALL_BOUNTIES_DAYS_BACK))
 
+    new_bounties_pks = set()
+    all_bounties_pks = set()
     for keyword in keywords:
-        relevant_bounties = Bounty.objects.current().filter(
-            network='mainnet',
-            idx_status__in=['open'],
-        ).keyword(keyword).exclude(bounty_reserved_for_user__isnull=False)
-        for bounty in relevant_bounties.filter(web3_created__gt=new_bounty_cutoff):
-            new_bounties_pks.append(bounty.pk)
-        for bounty in relevant_bounties.filter(web3_created__gt=all_bounty_cutoff):
-            all_bounties_pks.append(bounty.pk)
-    new_bounties = Bounty.objects.filter(pk__in=new_bounties_pks).order_by('-_val_usd_db')
-    all_bounties = Bounty.objects.filter(pk__in=all_bounties_pks).exclude(pk__in=new_bounties_pks).order_by('-_val_usd_db')
+        for pk, web3_created in index[keyword]:
+            if web3_created > new_bounty_cutoff:
+                new_bounties_pks.add(pk)
+            if web3_created > all_bounty_cutoff:
+                all_bounties_pks.add(pk)
+    new_bounties = Bounty.objects.filter(pk__in=new_bounties_pks)
+    all_bounties = Bounty.objects.filter(pk__in=all_bounties_pks - new_bounties_pks)
 
     new_bounties = new_bounties.order_by('-admin_mark_as_remarket_ready')
     all_bounties = all_bounties.order_by('-admin_mark_as_remarket_ready')
@@ -65,54 +130,95 @@ def get_bounties_for_keywords(keywords, hours_back):
     return new_bounties, all_bounties
 
 
-class Command(BaseCommand):
+def send_new_bounty_emails(subscribers, hours_back, index, featured_bounties):
+    """Send the new bounty emails of a chunk of subscribers.
 
-    help = 'sends new_bounty_daily _emails'
+    Subscribers with the same keywords share the bounty lists found for them.
 
-    def handle(self, *args, **options):
-        if settings.DEBUG and not override_in_dev:
-            print("not active in non prod environments")
-            return
-        hours_back = 24
-        eses = EmailSubscriber.objects.filter(active=True).distinct('email')
-        counter_grant_total = 0
-        counter_total = 0
-        counter_sent = 0
-        start_time = time.time()
-        total_count = eses.count()
-        print("got {} emails".format(total_count))
-        for es in eses:
+    Args:
+        subscribers (list of tuple): The email and keywords of each subscriber.
+        hours_back (int): How recent the new bounties are.
+        index (dict): The keyword index of the open bounties.
+        featured_bounties (list of Bounty): The featured bounties of the run.
+
+    Returns:
+        dict: The number of subscribers evaluated, enabled and sent to.
+
+    """
+    counts = {'evaluated': 0, 'enabled': 0, 'sent': 0}
+    bounties_by_keywords = {}
+    try:
+        sendable = get_sendable_subscribers([to_email for to_email, _ in subscribers], 'new_bounty_notifications')
+        for to_email, keywords in subscribers:
             try:
-                # prep
-                now = timezone.now()
-                counter_grant_total += 1
-                to_email = es.email
-                keywords = es.keywords
+                counts['evaluated'] += 1
+                keywords = keywords or []
                 town_square_enabled = is_email_townsquare_enabled(to_email)
                 should_eval = keywords or town_square_enabled
                 if not should_eval:
                     continue
                 if not validate_email(to_email):
                     continue
-                counter_total += 1
-                new_bounties, all_bounties = get_bounties_for_keywords(keywords, hours_back)
-                featured_bounties = Bounty.objects.current().filter(
-                    network='mainnet', idx_status='open',
-                    expires_date__gt=now).order_by('metadata__hyper_tweet_counter')[:2]
+                counts['enabled'] += 1
+                if to_email not in sendable:
+                    continue
 
-                # stats
-                speed = round((time.time() - start_time) / counter_grant_total, 2)
-                ETA = round((total_count - counter_grant_total) / speed / 3600, 1)
-                print(f"{counter_sent} sent/{counter_total} enabled/{counter_grant_total} evaluated, {speed}/s, ETA:{ETA}h, working on {to_email} ")
+                keywords_key = frozenset(keywords)
+                if keywords_key not in bounties_by_keywords:
+                    new_bounties, all_bounties = get_bounties_for_keywords(keywords_key, hours_back, index)
+                    bounties_by_keywords[keywords_key] = list(new_bounties), list(all_bounties)
+                new_bounties, all_bounties = bounties_by_keywords[keywords_key]
 
                 # send
-                should_send = new_bounties.count() or town_square_enabled
-                #should_send = new_bounties.count()
+                should_send = len(new_bounties) or town_square_enabled
                 if should_send:
-                    #print(f"sending to {to_email}")
                     new_bounty_daily(new_bounties, all_bounties, [to_email], featured_bounties)
-                    #print(f"/sent to {to_email}")
-                    counter_sent += 1
+                    counts['sent'] += 1
             except Exception as e:
                 logging.exception(e)
                 print(e)
+    finally:
+        # the connections of worker threads are not closed by Django
+        connection.close()
+    return counts
+
+
+class Command(BaseCommand):
+
+    help = 'sends new_bounty_daily _emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=NEW_BOUNTIES_EMAIL_WORKERS, help='number of threads sending emails')
+        parser.add_argument('--chunk-size', type=int, default=NEW_BOUNTIES_EMAIL_CHUNK_SIZE, help='subscribers per chunk')
+
+    def handle(self, *args, **options):
+        if settings.DEBUG and not override_in_dev:
+            print("not active in non prod environments")
+            return
+        hours_back = 24
+        eses = list(EmailSubscriber.objects.filter(active=True).distinct('email').values_list('email', 'keywords'))
+        counts = {'evaluated': 0, 'enabled': 0, 'sent': 0}
+        start_time = time.time()
+        total_count = len(eses)
+        print("got {} emails".format(total_count))
+
+        index = build_bounty_keyword_index({keyword for _, keywords in eses for keyword in keywords or []}, hours_back)
+        featured_bounties = list(Bounty.objects.current().filter(
+            network='mainnet', idx_status='open',
+            expires_date__gt=timezone.now()).order_by('metadata__hyper_tweet_counter')[:2])
+
+        chunk_size = options['chunk_size']
+        chunks = [eses[offset:offset + chunk_size] for offset in range(0, total_count, chunk_size)]
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = [
+                executor.submit(send_new_bounty_emails, chunk, hours_back, index, featured_bounties)
+                for chunk in chunks
+            ]
+            for future in as_completed(futures):
+                for key, count in future.result().items():
+                    counts[key] += count
+
+                # stats
+                speed = round(counts['evaluated'] / (time.time() - start_time), 2)
+                ETA = round((total_count - counts['evaluated']) / speed / 60, 1) if speed else 0
+                print(f"{counts['sent']} sent/{counts['enabled']} enabled/{counts['evaluated']} evaluated, {speed}/s, ETA:{ETA}m")
@@ -27,6 +27,8 @@ warnings.filterwarnings("ignore", category=DeprecationWarning)
 
 
 check_already_sent = False
+# recipients sent the roundup together
+ROUNDUP_BATCH_SIZE = 1000
 
 
 def is_already_sent_this_week(email):
@@ -71,6 +73,13 @@ class Command(BaseCommand):
             default=0,
             help="start_counter (optional)",
         )
+        parser.add_argument(
+            '--batch_size',
+            dest='batch_size',
+            type=int,
+            default=ROUNDUP_BATCH_SIZE,
+            help="recipients sent the roundup together (optional)",
+        )
 
     def handle(self, *args, **options):
 
@@ -89,22 +98,16 @@ class Command(BaseCommand):
 
         print("got {} emails".format(len(email_list)))
 
-        counter = 0
-        for to_email in email_list:
-            counter += 1
-
-            # skip any that are below the start counter
-            if counter < start_counter:
-                continue
-
-            print("-sending {} / {}".format(counter, to_email))
+        batch_size = options.get('batch_size', ROUNDUP_BATCH_SIZE)
+        email_list = email_list[max(start_counter - 1, 0):]
+        for offset in range(0, len(email_list), batch_size):
+            batch = email_list[offset:offset + batch_size]
+            print("-sending {} - {} / {}".format(offset + 1, offset + len(batch), len(email_list)))
             if options['live']:
                 try:
-                    if check_already_sent and is_already_sent_this_week(to_email):
-                        print(' -- already sent')
-                    else:
-                        weekly_roundup([to_email])
-                        time.sleep(0.05)
+                    if check_already_sent:
+                        batch = [to_email for to_email in batch if not is_already_sent_this_week(to_email)]
+                    weekly_roundup(batch)
                 except Exception as e:
                     print(e)
                     time.sleep(5)
@@ -25,6 +25,9 @@ from marketing.mails import weekly_recap
 
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
+# recipients whose subscribers are read together
+WEEKLY_RECAP_BATCH_SIZE = 100
+
 
 class Command(BaseCommand):
 
@@ -45,12 +48,13 @@ class Command(BaseCommand):
         email_list = list(set(email_list))
         print("trying to send to the following amount of receipients: "+str(len(email_list)))
 
-        for counter, to_email in enumerate(email_list):
-            print(f"- sending {counter+1} / {to_email}")
-            if options['live'] and to_email:
+        email_list = [to_email for to_email in email_list if to_email]
+        for offset in range(0, len(email_list), WEEKLY_RECAP_BATCH_SIZE):
+            batch = email_list[offset:offset + WEEKLY_RECAP_BATCH_SIZE]
+            print(f"- sending {offset + 1} - {offset + len(batch)} / {len(email_list)}")
+            if options['live']:
                 try:
-                    weekly_recap([to_email])
-                    time.sleep(1)
+                    weekly_recap(batch)
                 except Exception as e:
                     print(e)
                     time.sleep(5)
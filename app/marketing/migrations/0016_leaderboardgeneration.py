@@ -0,0 +1,47 @@
+# Generated by Django 2.2.4 on 2020-07-06 12:00
+
+from django.db import migrations, models
+import economy.models
+
+
+def seed_leaderboard_generations(apps, schema_editor):
+    """Point every product at generation 0 so the existing active ranks keep being served."""
+    LeaderboardGeneration = apps.get_model('marketing', 'LeaderboardGeneration')
+    LeaderboardRank = apps.get_model('marketing', 'LeaderboardRank')
+    products = LeaderboardRank.objects.filter(active=True).values_list('product', flat=True).distinct()
+    LeaderboardGeneration.objects.bulk_create([
+        LeaderboardGeneration(product=product, generation=0) for product in products
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing', '0015_auto_20200626_1424'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardGeneration',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(db_index=True, default=economy.models.get_time)),
+                ('modified_on', models.DateTimeField(default=economy.models.get_time)),
+                ('product', models.CharField(max_length=255, unique=True)),
+                ('generation', models.IntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='leaderboardrank',
+            name='generation',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.AlterIndexTogether(
+            name='leaderboardrank',
+            index_together={('leaderboard', 'active'), ('product', 'generation')},
+        ),
+        migrations.RunPython(seed_leaderboard_generations, migrations.RunPython.noop),
+    ]
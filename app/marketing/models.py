@@ -23,6 +23,7 @@ from secrets import token_hex
 
 from django.contrib.postgres.fields import ArrayField, JSONField
 from django.db import models
+from django.db.models import OuterRef, Subquery
 from django.db.models.signals import pre_save
 from django.dispatch import receiver
 
@@ -69,8 +70,8 @@ class EmailSubscriber(SuperModel):
         self.priv = token_hex(16)[:29]
 
     def should_send_email_type_to(self, email_type):
-        is_on_global_suppression_list = EmailSupressionList.objects.filter(email__iexact=self.email).exists()
-        if is_on_global_suppression_list:
+        from marketing.utils import is_on_global_suppression_list
+        if is_on_global_suppression_list(self.email):
             return False
 
         should_suppress = self.preferences.get('suppression_preferences', {}).get(email_type, False)
@@ -187,12 +188,25 @@ class Stat(SuperModel):
             return 0
 
 
+class LeaderboardGeneration(SuperModel):
+    """Point each product at the generation of LeaderboardRank objects currently being served."""
+
+    product = models.CharField(max_length=255, unique=True)
+    generation = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product}: {self.generation}"
+
+
 class LeaderboardRankQuerySet(models.QuerySet):
     """Handle the manager queryset for Leaderboard Ranks."""
 
     def active(self):
-        """Filter results to only active LeaderboardRank objects."""
-        return self.select_related('profile').filter(active=True)
+        """Filter results to only active LeaderboardRank objects of the current generation."""
+        current_generation = LeaderboardGeneration.objects.filter(
+            product=OuterRef('product')
+        ).values('generation')[:1]
+        return self.select_related('profile').filter(active=True, generation=Subquery(current_generation))
 
 
 class LeaderboardRank(SuperModel):
@@ -212,6 +226,7 @@ class LeaderboardRank(SuperModel):
     rank = models.IntegerField(default=0)
     product = models.CharField(max_length=255, db_index=True)
     tech_keywords = ArrayField(models.CharField(max_length=50), blank=True, default=list)
+    generation = models.IntegerField(default=0, db_index=True)
 
     objects = LeaderboardRankQuerySet.as_manager()
 
@@ -219,6 +234,7 @@ class LeaderboardRank(SuperModel):
 
         index_together = [
             ["leaderboard", "active"],
+            ["product", "generation"],
         ]
 
 
@@ -22,9 +22,10 @@ from datetime import date, datetime, timedelta
 from dashboard.models import Bounty, BountyFulfillment, Profile, Tip, UserAction
 from marketing.management.commands import assemble_leaderboards
 from marketing.management.commands.assemble_leaderboards import (
-    BREAKDOWNS, TIMES, Command, bounty_index_terms, default_ranks, sum_bounties, sum_tips, tip_index_terms,
+    BREAKDOWNS, TIMES, Command, LeaderboardAggregator, bounty_index_terms, default_ranks, sum_bounties, sum_tips,
+    tip_index_terms,
 )
-from marketing.models import LeaderboardRank
+from marketing.models import LeaderboardGeneration, LeaderboardRank
 from pytz import UTC
 from test_plus.test import TestCase
 
@@ -281,6 +282,58 @@ class TestAssembleLeaderboards(TestCase):
         for rank_type in rank_types_not_exists:
             assert not dict(assemble_leaderboards.ranks[rank_type])
 
+    def test_leaderboard_aggregator_tips(self):
+        """Test the aggregator sums tips into the tips and all products."""
+        Tip.objects.filter(pk=self.tip.pk).update(tx_status='success')
+        aggregator = LeaderboardAggregator()
+        aggregator.aggregate_tips()
+
+        for product in ['tips', 'all']:
+            for time in ['all', 'yearly', 'monthly', 'weekly']:
+                assert aggregator.ranks[product][f'{time}_payers'] == {self.tip_payer_handle: self.tip_value}
+                assert aggregator.ranks[product][f'{time}_earners'] == {self.tip_earner_handle: self.tip_value}
+                assert aggregator.ranks[product][f'{time}_tokens'] == {'USDT': self.tip_value}
+                assert aggregator.counts[product][f'{time}_payers'] == {self.tip_payer_handle: 1}
+        assert not aggregator.ranks['bounties']['all_all']
+
+    def test_leaderboard_aggregator_leaderboard_ranks(self):
+        """Test the aggregator builds ranked LeaderboardRank objects linked to profiles."""
+        Tip.objects.filter(pk=self.tip.pk).update(tx_status='success')
+        aggregator = LeaderboardAggregator()
+        aggregator.aggregate_tips()
+
+        leaderboard_ranks = aggregator.leaderboard_ranks('tips', self.tip.created_on)
+        payers = [lr for lr in leaderboard_ranks if lr.leaderboard == 'all_payers']
+        assert len(payers) == 1
+        assert payers[0].rank == 1
+        assert payers[0].profile_id == self.tip_from_username_profile.pk
+        assert payers[0].amount == self.tip_value
+
+    def test_do_leaderboard_swaps_generations(self):
+        """Test each run serves a new generation of ranks and prunes the previous one."""
+        Tip.objects.filter(pk=self.tip.pk).update(tx_status='success')
+
+        assemble_leaderboards.do_leaderboard()
+        generation = LeaderboardGeneration.objects.get(product='tips').generation
+        served = LeaderboardRank.objects.active().filter(product='tips', leaderboard='all_payers')
+        assert [lr.github_username for lr in served] == [self.tip_payer_handle]
+
+        assemble_leaderboards.do_leaderboard()
+        assert LeaderboardGeneration.objects.get(product='tips').generation == generation + 1
+        assert not LeaderboardRank.objects.filter(product='tips', generation=generation).exists()
+        assert LeaderboardRank.objects.active().filter(product='tips', leaderboard='all_payers').count() == 1
+
+    def test_prune_leaderboard_generations(self):
+        """Test stale generations are deleted in batches and the served one is kept."""
+        for generation in [1, 1, 1, 2]:
+            LeaderboardRank.objects.create(
+                github_username='gitcoinbot', leaderboard='all_payers', amount=1, active=True,
+                product='tips', generation=generation,
+            )
+
+        assert assemble_leaderboards.prune_leaderboard_generations('tips', 2, batch_size=2) == 3
+        assert list(LeaderboardRank.objects.filter(product='tips').values_list('generation', flat=True)) == [2]
+
     '''
     def test_command_handle(self):
         """Test command assemble leaderboards."""
@@ -5,7 +5,7 @@ from django.utils import timezone
 
 import pytest
 from dashboard.models import Bounty, Profile
-from marketing.management.commands.new_bounties_email import get_bounties_for_keywords
+from marketing.management.commands.new_bounties_email import build_bounty_keyword_index, get_bounties_for_keywords
 from marketing.models import Keyword
 from test_plus.test import TestCase
 
@@ -74,3 +74,13 @@ class TestNewBountiesEmail(TestCase):
         """Test get_bounties_for_keywords function to confirm a bounty reserved for a specific user is excluded."""
         new_bounties, _all_bounties = get_bounties_for_keywords('Python',24)
         assert new_bounties.count() == 1
+
+    def test_build_bounty_keyword_index(self):
+        """Test the keyword index matches keywords case insensitively in the title and description only."""
+        index = build_bounty_keyword_index(['python', 'solidity'], 24)
+        assert len(index['python']) == 1
+        assert index['solidity'] == []
+
+        new_bounties, all_bounties = get_bounties_for_keywords(['python', 'solidity'], 24, index)
+        assert new_bounties.get().title == 'Python 2 foo'
+        assert all_bounties.count() == 0
@@ -19,11 +19,12 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 from unittest.mock import patch
 
+from django.test import override_settings
 from django.utils import timezone
 
 from dashboard.models import Profile
-from marketing.mails import nth_day_email_campaign, setup_lang
-from retail.emails import render_nth_day_email_campaign
+from marketing.mails import nth_day_email_campaign, send_mail_batch, setup_lang
+from retail.emails import render_inlined_email, render_nth_day_email_campaign
 from test_plus.test import TestCase
 
 
@@ -77,3 +78,41 @@ class MarketingMailsTest(TestCase):
 
         nth_day_email_campaign(self.days[2], self.user)
         assert mock_send_mail.call_count == 1
+
+    @override_settings(SENDGRID_API_KEY='key', IS_DEBUG_ENV=False)
+    @patch('marketing.mails.SENDGRID_MAX_PERSONALIZATIONS', 2)
+    @patch('marketing.mails.get_sendgrid_client')
+    def test_send_mail_batch(self, mock_get_sendgrid_client):
+        """Test a batch email is sent with one personalization per recipient, in requests of limited size."""
+        send_mail_batch(
+            'from@gitcoin.co',
+            ['a@gitcoin.co', 'b@gitcoin.co', 'c@gitcoin.co'],
+            'subject',
+            'body -priv-',
+            substitutions={'a@gitcoin.co': {'-priv-': 'a'}},
+        )
+
+        calls = mock_get_sendgrid_client.return_value.client.mail.send.post.call_args_list
+        assert [len(call[1]['request_body']['personalizations']) for call in calls] == [2, 1]
+        assert calls[0][1]['request_body']['personalizations'][0]['substitutions'] == {'-priv-': 'a'}
+
+    @patch('retail.emails.get_email_shared_context', return_value={'inlined': {}})
+    @patch('retail.emails.premailer_transform', side_effect=lambda html: f'<p>{html}</p>')
+    @patch('retail.emails.render_to_string')
+    def test_render_inlined_email(self, mock_render_to_string, mock_premailer_transform, mock_shared_context):
+        """Test recipients sharing a layout are filled in from a skeleton inlined once."""
+        mock_render_to_string.side_effect = lambda template, params: (
+            f"{params['subscriber'].priv} {params['chats_count']} {params['title']}"
+        )
+        render = lambda priv, chats_count: render_inlined_email(
+            'emails/new_bounty.html',
+            {'title': 'new'},
+            {'subscriber.priv': priv, 'chats_count': chats_count},
+            ('layout', ),
+        )
+
+        assert render('abc', 2) == '<p>abc 2 new</p>'
+        assert render('<b>', 3) == '<p>&lt;b&gt; 3 new</p>'
+        assert mock_premailer_transform.call_count == 1
+        assert render('abc', 0) == '<p>abc 0 new</p>'
+        assert mock_premailer_transform.call_count == 2
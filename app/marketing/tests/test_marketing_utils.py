@@ -17,8 +17,11 @@ You should have received a copy of the GNU Affero General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 """
-from marketing.models import EmailSubscriber, Stat
-from marketing.utils import func_name, get_or_save_email_subscriber, get_stat, should_suppress_notification_email
+from marketing.models import EmailSubscriber, EmailSupressionList, Stat
+from marketing.utils import (
+    clear_email_suppressions, func_name, get_email_subscribers, get_or_save_email_subscriber, get_stat,
+    should_suppress_notification_email,
+)
 from test_plus.test import TestCase
 
 
@@ -95,3 +98,19 @@ class MarketingEmailUtilsTest(TestCase):
         self.assertIsNotNone(get_or_save_email_subscriber('newemail@gitcoin.co', 'mysource', send_slack_invite=False))
 
         assert EmailSubscriber.objects.filter().count() == 4
+
+    def test_get_email_subscribers(self):
+        """Test the marketing util get_email_subscribers method."""
+        clear_email_suppressions()
+        self.addCleanup(clear_email_suppressions)
+        EmailSupressionList.objects.create(email='.*@suppressed.co')
+
+        subscribers = get_email_subscribers(
+            ['EmailSubscriber1@gitcoin.co', 'newemail@gitcoin.co', 'someone@suppressed.co'], 'mysource'
+        )
+
+        assert subscribers['EmailSubscriber1@gitcoin.co'].priv == 'priv1'
+        assert subscribers['newemail@gitcoin.co'].pk
+        assert subscribers['newemail@gitcoin.co'].priv
+        assert subscribers['someone@suppressed.co'] is None
+        assert EmailSubscriber.objects.filter().count() == 4
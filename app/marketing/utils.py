@@ -19,10 +19,15 @@
 import logging
 import re
 import sys
+import threading
+import time
 from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.contrib import messages
+from django.db.models.functions import Lower
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.templatetags.static import static
 from django.utils.translation import gettext
 from django.utils.translation import gettext_lazy as _
@@ -195,6 +200,55 @@ def validate_discord_integration(webhook_url, message=None, icon_url=''):
     return result
 
 
+# EmailSupressionList changes made by other processes are picked up after at most this many seconds
+EMAIL_SUPPRESSIONS_TTL = 300
+# GDPR fallback just in case
+GDPR_SUPPRESSION = re.compile("c.*d.*v.*c@g.*com")
+
+email_suppressions = {'loaded_on': None}
+email_suppressions_lock = threading.Lock()
+
+
+def get_email_suppressions():
+    """Get the EmailSupressionList, cached in memory.
+
+    Returns:
+        dict: The compiled suppression patterns, and the lowercased suppressed emails.
+
+    """
+    with email_suppressions_lock:
+        loaded_on = email_suppressions['loaded_on']
+        if loaded_on is None or time.monotonic() - loaded_on > EMAIL_SUPPRESSIONS_TTL:
+            patterns = []
+            emails = set()
+            for email in EmailSupressionList.objects.values_list('email', flat=True):
+                emails.add(str(email).lower())
+                try:
+                    patterns.append(re.compile(str(email)))
+                except re.error as e:
+                    logger.warning(f'Invalid EmailSupressionList pattern {email}: {e}')
+            email_suppressions.update({'patterns': patterns, 'emails': frozenset(emails), 'loaded_on': time.monotonic()})
+        return email_suppressions
+
+
+@receiver(post_save, sender=EmailSupressionList, dispatch_uid="EmailSuppressionsSave")
+@receiver(post_delete, sender=EmailSupressionList, dispatch_uid="EmailSuppressionsDelete")
+def clear_email_suppressions(sender=None, **kwargs):
+    with email_suppressions_lock:
+        email_suppressions['loaded_on'] = None
+
+
+def is_email_suppressed(email):
+    """Check whether an email matches a pattern of the EmailSupressionList, and should never be synced."""
+    return bool(GDPR_SUPPRESSION.match(email)) or any(
+        pattern.match(email) for pattern in get_email_suppressions()['patterns']
+    )
+
+
+def is_on_global_suppression_list(email):
+    return email.lower() in get_email_suppressions()['emails']
+
+
 def should_suppress_notification_email(email, email_type):
     from marketing.models import EmailSubscriber
     queryset = EmailSubscriber.objects.filter(email__iexact=email)
@@ -206,13 +260,7 @@ def should_suppress_notification_email(email, email_type):
 
 def get_or_save_email_subscriber(email, source, send_slack_invite=True, profile=None):
     # Prevent syncing for those who match the suppression list
-    suppressions = EmailSupressionList.objects.all()
-    for suppression in suppressions:
-        if re.match(str(suppression.email), email):
-            return None
-
-    # GDPR fallback just in case
-    if re.match("c.*d.*v.*c@g.*com", email):
+    if is_email_suppressed(email):
         return None
 
     from marketing.models import EmailSubscriber
@@ -246,6 +294,52 @@ def get_or_save_email_subscriber(email, source, send_slack_invite=True, profile=
     return es
 
 
+def get_email_subscribers(emails, source):
+    """Get the EmailSubscribers of a batch of emails, creating the missing ones.
+
+    The batch counterpart of get_or_save_email_subscriber, with a constant number of queries. Existing
+    subscribers are left as they are.
+
+    Args:
+        emails (iterable of str): The emails.
+        source (str): The source of the created subscribers.
+
+    Returns:
+        dict: The EmailSubscriber of each email, or None for emails matching the EmailSupressionList.
+
+    """
+    from marketing.models import EmailSubscriber
+    emails = set(emails)
+    subscribers = {email: None for email in emails if is_email_suppressed(email)}
+    wanted = {email.lower(): email for email in emails if email not in subscribers}
+
+    existing = {}
+    # the latest subscriber wins when an email is stored with different cases
+    for es in EmailSubscriber.objects.annotate(email_lower=Lower('email')).filter(
+        email_lower__in=list(wanted.keys())
+    ).select_related('profile').order_by('created_on'):
+        existing[es.email_lower] = es
+
+    missing = []
+    for email_lower, email in wanted.items():
+        es = existing.get(email_lower)
+        if not es:
+            es = EmailSubscriber(email=email, source=source)
+            missing.append(es)
+        if not es.priv:
+            es.set_priv()
+            if es.pk:
+                es.save()
+        subscribers[email] = es
+
+    if missing:
+        EmailSubscriber.objects.bulk_create(missing, ignore_conflicts=True)
+        # read back the created rows, or the ones which won a concurrent insert
+        for es in EmailSubscriber.objects.filter(email__in=[es.email for es in missing]).select_related('profile'):
+            subscribers[es.email] = es
+    return subscribers
+
+
 def get_platform_wide_stats(since_last_n_days=90):
     """Get platform wide stats for quarterly stats email.
 
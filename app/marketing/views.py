@@ -834,7 +834,7 @@ def leaderboard(request, key=''):
         all_ranks = all_ranks.filter(tech_keywords__icontains=keyword_search)
 
     amount = all_ranks.values_list('amount').annotate(Max('amount')).order_by('-amount')
-    ranks = all_ranks.filter(active=True)
+    ranks = all_ranks.active()
     items = ranks.order_by('-amount')
 
     top_earners = ''
@@ -984,11 +984,11 @@ def upcoming_hackathon():
 
 def latest_activities(user):
     from retail.views import get_specific_activities
-    from townsquare.tasks import increment_view_counts
+    from townsquare.utils import buffer_view_counts
     cutoff_date = timezone.now() - timezone.timedelta(days=1)
     activities = get_specific_activities('connect', 0, user, 0)[:4]
     activities_pks = list(activities.values_list('pk', flat=True))
-    increment_view_counts.delay(activities_pks)
+    buffer_view_counts('activity', activities_pks)
     return activities
 
 @staff_member_required
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import JSONStore
+from .models import JSONStore, JSONStoreVersion
 
 
 class GeneralAdmin(admin.ModelAdmin):
@@ -9,4 +9,10 @@ class GeneralAdmin(admin.ModelAdmin):
     search_fields = ['key', 'view']
 
 
+class JSONStoreVersionAdmin(GeneralAdmin):
+
+    raw_id_fields = ['json_store']
+
+
 admin.site.register(JSONStore, GeneralAdmin)
+admin.site.register(JSONStoreVersion, JSONStoreVersionAdmin)
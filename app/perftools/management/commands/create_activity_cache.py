@@ -20,7 +20,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 
 from dashboard.models import Activity, HackathonEvent
-from perftools.models import JSONStore
+from perftools.utils import publish_json_stores
 
 
 def create_activity_cache():
@@ -38,15 +38,12 @@ def create_activity_cache():
     for hackathon in hackathons:
         tab = f'hackathon:{hackathon.pk}'
         all_tags.append([None, None, tab])
+    data_by_key = {}
     for tag in all_tags:
         keyword = tag[2]
         data = get_specific_activities(keyword, False, None, None)
-        JSONStore.objects.filter(view=view, key=keyword).all().delete()
-        JSONStore.objects.create(
-            view=view,
-            key=keyword,
-            data=list(data.order_by('-pk').values_list('pk', flat=True)[:10]),
-            )
+        data_by_key[keyword] = list(data.order_by('-pk').values_list('pk', flat=True)[:10])
+    publish_json_stores(view, data_by_key)
 
 
 class Command(BaseCommand):
@@ -16,12 +16,15 @@
 
 '''
 
-import json
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db import models, transaction
+from django.db import connection, models
 from django.db.models import Count, Q
 from django.db.models.query import QuerySet
 from django.forms.models import model_to_dict
@@ -30,15 +33,18 @@ from django.utils.encoding import force_text
 from django.utils.functional import Promise
 
 from dashboard.models import HackathonEvent, Profile
-from economy.models import EncodeAnything, SuperModel
-from perftools.models import JSONStore
+from economy.models import SuperModel
+from perftools.utils import publish_json_stores
 from retail.utils import build_stat_results, programming_languages
 
+logger = logging.getLogger(__name__)
+
 
 def create_top_grant_spenders_cache():
     from marketing.models import Stat
     from grants.views import next_round_start, round_types
     from grants.models import Grant, Contribution
+    rows = 0
     for round_type in round_types:
         contributions = Contribution.objects.filter(
             success=True,
@@ -62,6 +68,7 @@ def create_top_grant_spenders_cache():
                     key="count_" + round_type + "_" + key,
                     val=val,
                     )
+                rows += 1
 
         for key, val in sum_dict.items():
             if val:
@@ -71,7 +78,8 @@ def create_top_grant_spenders_cache():
                     key="sum_" + round_type + "_" + key,
                     val=val,
                     )
-
+                rows += 1
+    return rows
 
 
 def fetchPost(qt='2'):
@@ -87,14 +95,7 @@ def create_hidden_profiles_cache():
 
     view = 'hidden_profiles'
     keyword = 'hidden_profiles'
-    with transaction.atomic():
-        JSONStore.objects.filter(view=view).all().delete()
-        data = handles
-        JSONStore.objects.create(
-            view=view,
-            key=keyword,
-            data=data,
-            )
+    return publish_json_stores(view, {keyword: handles})
 
 
 def create_tribes_cache():
@@ -113,31 +114,19 @@ def create_tribes_cache():
 
     view = 'tribes'
     keyword = 'tribes'
-    with transaction.atomic():
-        JSONStore.objects.filter(view=view).all().delete()
-        data = tribes
-        JSONStore.objects.create(
-            view=view,
-            key=keyword,
-            data=data,
-            )
+    return publish_json_stores(view, {keyword: tribes})
 
 
 def create_post_cache():
     data = fetchPost()
     view = 'posts'
     keyword = 'posts'
-    JSONStore.objects.filter(view=view, key=keyword).all().delete()
-    data = json.loads(json.dumps(data, cls=EncodeAnything))
-    JSONStore.objects.create(
-        view=view,
-        key=keyword,
-        data=data,
-        )
+    return publish_json_stores(view, {keyword: data})
 
 
 def create_avatar_cache():
     from avatar.models import AvatarTheme, CustomAvatar
+    rows = 0
     for at in AvatarTheme.objects.all():
         at.popularity = at.popularity_cheat_by
         if at.name == 'classic':
@@ -148,6 +137,8 @@ def create_avatar_cache():
         else:
             at.popularity += CustomAvatar.objects.filter(active=True, config__theme=[at.name]).count()
         at.save()
+        rows += 1
+    return rows
 
 
 def create_activity_cache():
@@ -157,27 +148,16 @@ def create_activity_cache():
 
     print('activity.1')
     view = 'activity'
-    keyword = '24hcount'
-    data = Activity.objects.filter(created_on__gt=timezone.now() - timezone.timedelta(hours=hours)).count()
-    JSONStore.objects.filter(view=view, key=keyword).all().delete()
-    JSONStore.objects.create(
-        view=view,
-        key=keyword,
-        data=json.loads(json.dumps(data, cls=EncodeAnything)),
-        )
+    data_by_key = {}
+    data_by_key['24hcount'] = Activity.objects.filter(created_on__gt=timezone.now() - timezone.timedelta(hours=hours)).count()
 
     print('activity.2')
     from retail.views import get_specific_activities
     from townsquare.views import tags
     for tag in tags:
         keyword = tag[2]
-        data = get_specific_activities(keyword, False, None, None).filter(created_on__gt=timezone.now() - timezone.timedelta(hours=hours)).count()
-        JSONStore.objects.filter(view=view, key=keyword).all().delete()
-        JSONStore.objects.create(
-            view=view,
-            key=keyword,
-            data=json.loads(json.dumps(data, cls=EncodeAnything)),
-            )
+        data_by_key[keyword] = get_specific_activities(keyword, False, None, None).filter(created_on__gt=timezone.now() - timezone.timedelta(hours=hours)).count()
+    return publish_json_stores(view, data_by_key)
 
 def create_grants_cache():
     from grants.utils import generate_leaderboard
@@ -185,36 +165,34 @@ def create_grants_cache():
     view = 'grants'
     keyword = 'leaderboard'
     data = generate_leaderboard()
-    JSONStore.objects.create(
-        view=view,
-        key=keyword,
-        data=json.loads(json.dumps(data, cls=EncodeAnything)),
-        )
+    return publish_json_stores(view, {keyword: data})
 
 
 def create_quests_cache():
     from quests.helpers import generate_leaderboard
     from quests.views import current_round_number
+    view = 'quests'
+    data_by_key = {}
     for i in range(1, current_round_number+1):
         print(f'quests_{i}')
-        view = 'quests'
         keyword = f'leaderboard_{i}'
-        data = generate_leaderboard(round_number=i)
-        JSONStore.objects.create(
-            view=view,
-            key=keyword,
-            data=json.loads(json.dumps(data, cls=EncodeAnything)),
-            )
+        data_by_key[keyword] = generate_leaderboard(round_number=i)
+    rows = publish_json_stores(view, data_by_key)
 
     from quests.models import Quest
     for quest in Quest.objects.filter(visible=True):
         quest.save()
+        rows += 1
+    return rows
 
 
 def create_hackathon_cache():
+    rows = 0
     for hackathon in HackathonEvent.objects.filter(display_showcase=True):
         hackathon.get_total_prizes(force=True)
         hackathon.get_total_winners(force=True)
+        rows += 1
+    return rows
 
 
 def create_results_cache():
@@ -223,19 +201,12 @@ def create_results_cache():
     if settings.DEBUG:
         keywords = ['']
     view = 'results'
-    with transaction.atomic():
-        items = []
-        JSONStore.objects.filter(view=view).all().delete()
-        for keyword in keywords:
-            print(f"- executing {keyword}")
-            data = build_stat_results(keyword)
-            print("- creating")
-            items.append(JSONStore(
-                view=view,
-                key=keyword,
-                data=json.loads(json.dumps(data, cls=EncodeAnything)),
-                ))
-        JSONStore.objects.bulk_create(items)
+    data_by_key = {}
+    for keyword in keywords:
+        print(f"- executing {keyword}")
+        data_by_key[keyword] = build_stat_results(keyword)
+    print("- creating")
+    return publish_json_stores(view, data_by_key)
 
 
 def create_contributor_landing_page_context():
@@ -245,36 +216,139 @@ def create_contributor_landing_page_context():
         keywords = ['']
     view = 'contributor_landing_page'
     from retail.views import get_contributor_landing_page_context
-    with transaction.atomic():
-        items = []
-        JSONStore.objects.filter(view=view).all().delete()
-        for keyword in keywords:
-            print(f"- executing {keyword}")
-            data = get_contributor_landing_page_context(keyword)
-            print("- creating")
-            items.append(JSONStore(
-                view=view,
-                key=keyword,
-                data=json.loads(json.dumps(data, cls=EncodeAnything)),
-                ))
-        JSONStore.objects.bulk_create(items)
-
+    data_by_key = {}
+    for keyword in keywords:
+        print(f"- executing {keyword}")
+        data_by_key[keyword] = get_contributor_landing_page_context(keyword)
+    print("- creating")
+    return publish_json_stores(view, data_by_key)
+
+
+
+# name -> (builder, names of the builders it must run after); builders return the number of rows they wrote
+PAGE_CACHE_BUILDERS = OrderedDict([
+    ('results', (create_results_cache, ())),
+    ('hidden_profiles', (create_hidden_profiles_cache, ())),
+    ('tribes', (create_tribes_cache, ())),
+    ('activity', (create_activity_cache, ())),
+    ('posts', (create_post_cache, ())),
+    ('top_grant_spenders', (create_top_grant_spenders_cache, ())),
+    ('avatar', (create_avatar_cache, ())),
+    ('quests', (create_quests_cache, ())),
+    ('grants', (create_grants_cache, ())),
+    ('contributor_landing_page', (create_contributor_landing_page_context, ())),
+    ('hackathon', (create_hackathon_cache, ())),
+])
+DEBUG_PAGE_CACHE_BUILDERS = ['results']
+
+
+def run_page_cache_builder(name, builder, close_connection=False):
+    """Run a single page cache builder, isolating its failure from the others.
+
+    Args:
+        name (str): The name of the builder.
+        builder (function): The builder to run.
+        close_connection (bool): Whether to close the database connection of the calling thread afterwards.
+
+    Returns:
+        dict: The name, status, duration in seconds, number of rows written and error of the builder.
+
+    """
+    start_time = time.time()
+    result = {'name': name, 'status': 'ok', 'rows': 0, 'error': ''}
+    try:
+        result['rows'] = builder() or 0
+    except Exception as e:
+        logger.exception(f'create_page_cache: {name} failed')
+        result['status'] = 'failed'
+        result['error'] = str(e)
+    finally:
+        if close_connection:
+            connection.close()
+    result['duration'] = round(time.time() - start_time, 2)
+    return result
+
+
+def run_page_cache_builders(names, builders=PAGE_CACHE_BUILDERS, workers=1):
+    """Run the given page cache builders, running independent builders concurrently.
+
+    A builder only starts once the selected builders it depends on succeeded and is
+    skipped when one of them failed; unselected dependencies are assumed to be cached already.
+
+    Args:
+        names (list): The names of the builders to run.
+        builders (OrderedDict): The registry of builders and their dependencies.
+        workers (int): The number of builders to run at the same time.
+
+    Returns:
+        list: The result of every builder, in the order they were given.
+
+    """
+    results = {}
+    pending = list(names)
+    running = {}
+
+    def status(dependency):
+        if dependency in results:
+            return results[dependency]['status']
+        if dependency in pending or dependency in running.values():
+            return 'waiting'
+        return 'ok'
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        while pending or running:
+            for name in list(pending):
+                statuses = [status(dependency) for dependency in builders[name][1]]
+                if 'waiting' in statuses:
+                    continue
+                pending.remove(name)
+                if any(dependency_status != 'ok' for dependency_status in statuses):
+                    results[name] = {'name': name, 'status': 'skipped', 'rows': 0, 'error': '', 'duration': 0}
+                elif workers > 1:
+                    running[executor.submit(run_page_cache_builder, name, builders[name][0], True)] = name
+                else:
+                    results[name] = run_page_cache_builder(name, builders[name][0])
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+
+    return [results[name] for name in names]
 
 
 class Command(BaseCommand):
 
     help = 'generates some /results data'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'builders',
+            nargs='*',
+            help=f"the page cache builders to run ({', '.join(PAGE_CACHE_BUILDERS.keys())}), defaults to all of them",
+        )
+        parser.add_argument(
+            '--workers',
+            default=1,
+            type=int,
+            help='the number of page cache builders to run concurrently',
+        )
+
     def handle(self, *args, **options):
-        create_results_cache()
-        if not settings.DEBUG:
-            create_hidden_profiles_cache()
-            create_tribes_cache()
-            create_activity_cache()
-            create_post_cache()
-            create_top_grant_spenders_cache()
-            create_avatar_cache()
-            create_quests_cache()
-            create_grants_cache()
-            create_contributor_landing_page_context()
-            create_hackathon_cache()
+        names = options['builders']
+        if not names:
+            names = DEBUG_PAGE_CACHE_BUILDERS if settings.DEBUG else list(PAGE_CACHE_BUILDERS.keys())
+        unknown = [name for name in names if name not in PAGE_CACHE_BUILDERS]
+        if unknown:
+            raise CommandError(f"unknown page cache builders: {', '.join(unknown)}")
+
+        results = run_page_cache_builders(names, workers=options['workers'])
+        for result in results:
+            print(f"{result['name']}: {result['status']} in {result['duration']}s, {result['rows']} rows {result['error']}")
+
+        publish_json_stores('create_page_cache', {
+            'builders': {'created_on': timezone.now().isoformat(), 'results': results},
+        })
+
+        failed = [result['name'] for result in results if result['status'] != 'ok']
+        if failed:
+            raise CommandError(f"page cache builders did not complete: {', '.join(failed)}")
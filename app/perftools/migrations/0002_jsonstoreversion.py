@@ -0,0 +1,29 @@
+# Generated by Django 2.2.4 on 2020-07-08 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import economy.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('perftools', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JSONStoreVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(db_index=True, default=economy.models.get_time)),
+                ('modified_on', models.DateTimeField(default=economy.models.get_time)),
+                ('view', models.CharField(blank=True, default='', max_length=255)),
+                ('key', models.CharField(blank=True, default='', max_length=255)),
+                ('json_store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='perftools.JSONStore')),
+            ],
+            options={
+                'unique_together': {('view', 'key')},
+            },
+        ),
+    ]
@@ -18,3 +18,18 @@ class JSONStore(SuperModel):
         if not self:
             return "none"
         return f" {self.view} / {self.key} "
+
+
+class JSONStoreVersion(SuperModel):
+    """Point a view and key at the JSONStore version currently being served."""
+
+    view = models.CharField(max_length=255, default='', blank=True)
+    key = models.CharField(max_length=255, default='', blank=True)
+    json_store = models.ForeignKey(JSONStore, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+
+        unique_together = ['view', 'key']
+
+    def __str__(self):
+        return f" {self.view} / {self.key}: {self.json_store_id} "
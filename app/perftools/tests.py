@@ -1,3 +1,113 @@
-from django.test import TestCase
+# -*- coding: utf-8 -*-
+"""Handle perftools related tests.
 
-# Create your tests here.
+Copyright (C) 2020 Gitcoin Core
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+from collections import OrderedDict
+from unittest import mock
+
+from perftools.management.commands.create_page_cache import run_page_cache_builders
+from perftools.models import JSONStore, JSONStoreVersion
+from perftools.utils import get_json_store, get_json_store_data, publish_json_stores
+from test_plus.test import TestCase
+
+
+def broken_builder():
+    raise Exception('broken')
+
+
+class RunPageCacheBuildersTest(TestCase):
+    """Define tests for the create_page_cache job runner."""
+
+    def setUp(self):
+        """Perform setup for the testcase."""
+        self.builders = OrderedDict([
+            ('first', (lambda: 3, ())),
+            ('broken', (broken_builder, ())),
+            ('after_first', (lambda: 2, ('first', ))),
+            ('after_broken', (lambda: 1, ('broken', ))),
+        ])
+
+    def test_run_page_cache_builders(self):
+        """Test a failing builder only skips the builders depending on it."""
+        for workers in [1, 2]:
+            results = run_page_cache_builders(list(self.builders.keys()), builders=self.builders, workers=workers)
+
+            assert [(result['name'], result['status'], result['rows']) for result in results] == [
+                ('first', 'ok', 3),
+                ('broken', 'failed', 0),
+                ('after_first', 'ok', 2),
+                ('after_broken', 'skipped', 0),
+            ]
+            assert results[1]['error'] == 'broken'
+
+    def test_run_page_cache_builders_subset(self):
+        """Test only the selected builders run, without waiting on unselected dependencies."""
+        results = run_page_cache_builders(['after_broken'], builders=self.builders)
+
+        assert [(result['name'], result['status'], result['rows']) for result in results] == [('after_broken', 'ok', 1)]
+
+
+class JSONStoreVersionTest(TestCase):
+    """Define tests for publishing and reading versioned JSONStore objects."""
+
+    def test_publish_json_stores(self):
+        """Test publishing switches every key to its new version and deletes the old ones."""
+        publish_json_stores('results', {'': {'audience': 1}, 'python': {'audience': 2}})
+        publish_json_stores('results', {'': {'audience': 3}})
+
+        assert get_json_store_data('results', '') == {'audience': 3}
+        assert get_json_store_data('results', 'python') == {'audience': 2}
+        assert JSONStore.objects.filter(view='results').count() == 2
+        assert JSONStoreVersion.objects.get(view='results', key='').json_store.data == {'audience': 3}
+
+    def test_publish_json_stores_only_deletes_superseded_version(self):
+        """Test publishing only deletes the version the pointer targeted, not rows written meanwhile."""
+        publish_json_stores('activity', {'everywhere': [1]})
+        other = JSONStore.objects.create(view='activity', key='everywhere', data=[2])
+        publish_json_stores('activity', {'everywhere': [3]})
+
+        assert get_json_store_data('activity', 'everywhere') == [3]
+        assert JSONStore.objects.filter(pk=other.pk).exists()
+        assert JSONStore.objects.filter(view='activity', key='everywhere').count() == 2
+
+    def test_get_json_store_returns_a_copy(self):
+        """Test changes made by a reader are not seen by the next one."""
+        publish_json_stores('results', {'': {'audience': 1, 'ranks': [1]}})
+
+        with self.assertNumQueries(2):
+            json_store = get_json_store('results', '')
+        json_store.data['updated'] = True
+        json_store.data['ranks'].append(2)
+        with self.assertNumQueries(1):
+            assert get_json_store('results', '').data == {'audience': 1, 'ranks': [1]}
+
+    def test_get_json_store_superseded_version(self):
+        """Test a version deleted by a concurrent publish is read again from the new pointer."""
+        publish_json_stores('results', {'': {'audience': 1}})
+        json_store = JSONStore.objects.get(view='results', key='')
+
+        with mock.patch('perftools.utils._get_json_store_version', side_effect=[JSONStore.DoesNotExist, json_store]):
+            assert get_json_store_data('results', '') == {'audience': 1}
+
+    def test_get_json_store_unpublished(self):
+        """Test keys which were never published fall back to their latest JSONStore."""
+        JSONStore.objects.create(view='activity', key='everywhere', data=[1])
+        JSONStore.objects.create(view='activity', key='everywhere', data=[2])
+
+        assert get_json_store_data('activity', 'everywhere') == [2]
+        assert get_json_store_data('activity', 'kudos', []) == []
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Define the JSONStore access utilities.
+
+Copyright (C) 2020 Gitcoin Core
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+import copy
+import json
+from functools import lru_cache
+
+from django.db import connection, transaction
+
+from economy.models import EncodeAnything
+from perftools.models import JSONStore, JSONStoreVersion
+
+# number of decoded JSONStore versions kept in memory by each process
+JSONSTORE_CACHE_SIZE = 256
+# times the pointer of a key is read again when its version was deleted by a concurrent publish
+JSONSTORE_READ_RETRIES = 3
+
+
+def publish_json_stores(view, data_by_key):
+    """Publish a new version of the given keys of a view.
+
+    Publishers of a view are serialized by a transaction level advisory lock. The new
+    versions are written, the pointers of every key are switched to them and the
+    versions they pointed to are deleted in a single transaction, so readers always
+    see exactly one version of each key.
+
+    Args:
+        view (str): The view the keys belong to.
+        data_by_key (dict): The data to publish, by key.
+
+    Returns:
+        int: The number of JSONStore objects published.
+
+    """
+    if not data_by_key:
+        return 0
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [f'jsonstore:{view}'])
+
+        versions = {
+            version.key: version
+            for version in JSONStoreVersion.objects.select_for_update().filter(view=view, key__in=data_by_key.keys())
+        }
+        json_stores = JSONStore.objects.bulk_create([
+            JSONStore(view=view, key=key, data=json.loads(json.dumps(data, cls=EncodeAnything)))
+            for key, data in data_by_key.items()
+        ])
+        for json_store in json_stores:
+            version = versions.get(json_store.key)
+            if version:
+                JSONStoreVersion.objects.filter(pk=version.pk).update(json_store=json_store)
+            else:
+                JSONStoreVersion.objects.create(view=view, key=json_store.key, json_store=json_store)
+
+        superseded = JSONStore.objects.filter(pk__in=[version.json_store_id for version in versions.values()])
+        unpublished_keys = [key for key in data_by_key if key not in versions]
+        if unpublished_keys:
+            # the rows written before the key was first published
+            superseded |= JSONStore.objects.filter(view=view, key__in=unpublished_keys).exclude(
+                pk__in=[json_store.pk for json_store in json_stores]
+            )
+        superseded.delete()
+    return len(json_stores)
+
+
+@lru_cache(maxsize=JSONSTORE_CACHE_SIZE)
+def _get_json_store_version(view, key, version):
+    return JSONStore.objects.get(pk=version, view=view, key=key)
+
+
+def get_json_store(view, key):
+    """Get the JSONStore currently published for a view and key.
+
+    Published versions are immutable, so they are decoded once per process and
+    then served from memory; only the pointer to the current version is read
+    from the database. Keys which were never published fall back to their
+    latest JSONStore.
+
+    Args:
+        view (str): The view of the JSONStore.
+        key (str): The key of the JSONStore.
+
+    Returns:
+        JSONStore: A copy of the JSONStore, which callers may modify, or None if there is none.
+
+    """
+    for _ in range(JSONSTORE_READ_RETRIES):
+        version = JSONStoreVersion.objects.filter(view=view, key=key).values_list('json_store_id', flat=True).first()
+        if version is None:
+            break
+        try:
+            json_store = _get_json_store_version(view, key, version)
+        except JSONStore.DoesNotExist:
+            # the version was superseded and deleted between reading the pointer and the row
+            continue
+        json_store = copy.copy(json_store)
+        json_store.data = copy.deepcopy(json_store.data)
+        return json_store
+
+    return JSONStore.objects.filter(view=view, key=key).order_by('-pk').first()
+
+
+def get_json_store_data(view, key, default=None):
+    """Get the data currently published for a view and key.
+
+    Args:
+        view (str): The view of the JSONStore.
+        key (str): The key of the JSONStore.
+        default: The value returned if there is no JSONStore.
+
+    Returns:
+        The data of the JSONStore, or the default if there is none.
+
+    """
+    json_store = get_json_store(view, key)
+    if json_store is None:
+        return default
+    return json_store.data
+
+
+def clear_json_store_cache():
+    """Drop every decoded JSONStore version held in memory by this process."""
+    _get_json_store_version.cache_clear()
@@ -18,8 +18,11 @@
 '''
 import datetime
 import logging
+import threading
+import time
 from datetime import date, timedelta
 from functools import partial
+from types import SimpleNamespace
 
 from django.conf import settings
 from django.contrib import messages
@@ -29,7 +32,8 @@ from django.shortcuts import redirect
 from django.template.loader import render_to_string
 from django.template.response import TemplateResponse
 from django.urls import reverse
-from django.utils import timezone
+from django.utils import timezone, translation
+from django.utils.html import conditional_escape
 from django.utils.translation import gettext as _
 
 import cssutils
@@ -81,12 +85,152 @@ NOTIFICATION_EMAILS = [
 ALL_EMAILS = MARKETING_EMAILS + TRANSACTIONAL_EMAILS + NOTIFICATION_EMAILS
 
 
+# blocks shared by every email of a run are computed again after this many seconds
+EMAIL_SHARED_CONTEXT_TTL = 600
+# inlined email skeletons kept in memory, dropped along with the shared context they were rendered from
+INLINED_EMAIL_CACHE_SIZE = 256
+
+email_shared_context = {'loaded_on': None}
+email_shared_context_lock = threading.Lock()
+
+
 def premailer_transform(html):
     cssutils.log.setLevel(logging.CRITICAL)
     p = premailer.Premailer(html, base_url=settings.BASE_URL)
     return p.transform()
 
 
+def get_upcoming_events(upcoming_hackathon, upcoming_dates):
+    upcoming_events = []
+    for hackathon in upcoming_hackathon:
+        upcoming_events = upcoming_events + [{
+            'event': hackathon,
+            'title': f"Hackathon Start: {hackathon.name}",
+            'image_url': hackathon.logo.url if hackathon.logo else f'{settings.STATIC_URL}v2/images/emails/hackathons-neg.png',
+            'url': hackathon.url,
+            'date': hackathon.start_date.strftime("%Y-%m-%d")
+        }]
+    for hackathon in upcoming_hackathon:
+        upcoming_events = upcoming_events + [{
+            'event': hackathon,
+            'title': f"Hackathon End: {hackathon.name}",
+            'image_url': hackathon.logo.url if hackathon.logo else f'{settings.STATIC_URL}v2/images/emails/hackathons-neg.png',
+            'url': hackathon.url,
+            'date': hackathon.end_date.strftime("%Y-%m-%d")
+        }]
+    for ele in upcoming_dates:
+        upcoming_events = upcoming_events + [{
+            'event': ele,
+            'title': ele.title,
+            'image_url': ele.img_url,
+            'url': ele.url,
+            'date': ele.date.strftime("%Y-%m-%d")
+        }]
+    return sorted(upcoming_events, key=lambda ele: ele['date'])
+
+
+def get_email_shared_context():
+    """Get the blocks shared by every email of a run, computed once per EMAIL_SHARED_CONTEXT_TTL seconds.
+
+    Returns:
+        dict: The quest of the day, upcoming grant, hackathons and events, announcements and trending avatar,
+            and the cache of the email skeletons rendered with them.
+
+    """
+    from marketing.views import (
+        email_announcements, quest_of_the_day, trending_avatar, upcoming_dates, upcoming_grant, upcoming_hackathon,
+    )
+    with email_shared_context_lock:
+        loaded_on = email_shared_context['loaded_on']
+        if loaded_on is None or time.monotonic() - loaded_on > EMAIL_SHARED_CONTEXT_TTL:
+            hackathons = list(upcoming_hackathon())
+            dates = list(upcoming_dates())
+            email_shared_context.update({
+                'quest_of_the_day': quest_of_the_day(),
+                'upcoming_grant': upcoming_grant(),
+                'upcoming_hackathon': hackathons,
+                'upcoming_dates': dates,
+                'upcoming_events': get_upcoming_events(hackathons, dates),
+                'email_announcements': email_announcements(),
+                'trending_avatar': trending_avatar(),
+                'inlined': {},
+                'loaded_on': time.monotonic(),
+            })
+        return email_shared_context
+
+
+def clear_email_shared_context():
+    with email_shared_context_lock:
+        email_shared_context['loaded_on'] = None
+
+
+def get_email_placeholder(path):
+    return f"-email_{path.replace('.', '_')}-"
+
+
+def build_placeholder_params(recipient_params):
+    """Build the params standing in for the values of a recipient in an email skeleton.
+
+    Args:
+        recipient_params (dict): The values of the recipient, by dotted path (e.g. subscriber.priv).
+
+    Returns:
+        dict: The nested params, with a placeholder for each truthy value and the falsy values as they are.
+
+    """
+    params = {}
+    for path, value in recipient_params.items():
+        *parents, name = path.split('.')
+        node = params
+        for parent in parents:
+            if isinstance(node, dict):
+                node = node.setdefault(parent, SimpleNamespace())
+            else:
+                if not hasattr(node, parent):
+                    setattr(node, parent, SimpleNamespace())
+                node = getattr(node, parent)
+        placeholder = get_email_placeholder(path) if value else value
+        if isinstance(node, dict):
+            node[name] = placeholder
+        else:
+            setattr(node, name, placeholder)
+    return params
+
+
+def render_inlined_email(template_name, params, recipient_params, layout_key):
+    """Render an email from a skeleton inlined once, filling in the values specific to the recipient.
+
+    The skeleton is rendered and inlined with premailer once per layout, with a placeholder for each value
+    of the recipient. The template may only print these values or test their truthiness.
+
+    Args:
+        template_name (str): The html template.
+        params (dict): The params shared by the recipients of the layout.
+        recipient_params (dict): The values of the recipient, by dotted path (e.g. subscriber.priv).
+        layout_key (tuple): The key identifying the params, equal for recipients sharing them.
+
+    Returns:
+        str: The inlined html of the email.
+
+    """
+    inlined = get_email_shared_context()['inlined']
+    key = (
+        template_name, translation.get_language(), layout_key,
+        tuple((path, bool(value)) for path, value in sorted(recipient_params.items())),
+    )
+    html = inlined.get(key)
+    if html is None:
+        html = premailer_transform(render_to_string(template_name, {**params, **build_placeholder_params(recipient_params)}))
+        if len(inlined) >= INLINED_EMAIL_CACHE_SIZE:
+            inlined.clear()
+        inlined[key] = html
+
+    for path, value in recipient_params.items():
+        if value:
+            html = html.replace(get_email_placeholder(path), conditional_escape(str(value)))
+    return html
+
+
 def render_featured_funded_bounty(bounty):
     params = {'bounty': bounty}
     response_html = premailer_transform(render_to_string("emails/funded_featured_bounty.html", params))
@@ -567,32 +711,7 @@ def render_new_bounty(to_email, bounties, old_bounties, offset=3, quest_of_the_d
 
     notifications_count = get_notification_count(profile, days_ago, from_date)
 
-    upcoming_events = []
-    for hackathon in upcoming_hackathon:
-        upcoming_events = upcoming_events + [{
-            'event': hackathon,
-            'title': f"Hackathon Start: {hackathon.name}",
-            'image_url': hackathon.logo.url if hackathon.logo else f'{settings.STATIC_URL}v2/images/emails/hackathons-neg.png',
-            'url': hackathon.url,
-            'date': hackathon.start_date.strftime("%Y-%m-%d")
-        }]
-    for hackathon in upcoming_hackathon:
-        upcoming_events = upcoming_events + [{
-            'event': hackathon,
-            'title': f"Hackathon End: {hackathon.name}",
-            'image_url': hackathon.logo.url if hackathon.logo else f'{settings.STATIC_URL}v2/images/emails/hackathons-neg.png',
-            'url': hackathon.url,
-            'date': hackathon.end_date.strftime("%Y-%m-%d")
-        }]
-    for ele in upcoming_dates():
-        upcoming_events = upcoming_events + [{
-            'event': ele,
-            'title': ele.title,
-            'image_url': ele.img_url,
-            'url': ele.url,
-            'date': ele.date.strftime("%Y-%m-%d")
-        }]
-    upcoming_events = sorted(upcoming_events, key=lambda ele: ele['date'])
+    upcoming_events = get_upcoming_events(upcoming_hackathon, upcoming_dates())
 
     params = {
         'old_bounties': old_bounties,
@@ -619,6 +738,74 @@ def render_new_bounty(to_email, bounties, old_bounties, offset=3, quest_of_the_d
 
     return response_html, response_txt
 
+
+def render_new_bounty_digest(
+    subscriber, bounties, old_bounties, latest_activities, notifications_count=0, chats_count=0, show_action=False,
+    featured_bounties=[],
+):
+    """Render the new bounty email of a recipient like render_new_bounty, for campaigns.
+
+    The blocks shared by every recipient come from get_email_shared_context, and the html is filled in
+    from a skeleton inlined once for all the recipients sharing the bounties, activities and sections shown.
+
+    Args:
+        subscriber (EmailSubscriber): The subscriber of the recipient.
+        bounties (list of Bounty): The new bounties.
+        old_bounties (list of Bounty): The other open bounties.
+        latest_activities (list of Activity): The activities shown.
+        notifications_count (int): The number of unread notifications of the recipient.
+        chats_count (int): The number of unread chats of the recipient.
+        show_action (bool): Whether a townsquare action is shown.
+        featured_bounties (list of Bounty): The featured bounties.
+
+    Returns:
+        tuple: The html and text of the email.
+
+    """
+    shared = get_email_shared_context()
+    latest_activities = list(latest_activities)
+    profile = subscriber.profile if subscriber else None
+    params = {
+        'old_bounties': old_bounties,
+        'bounties': bounties,
+        'featured_bounties': featured_bounties,
+        'trending_avatar': shared['trending_avatar'],
+        'email_announcements': shared['email_announcements'],
+        'email_style': 26,
+        'email_type': 'new_bounty_notifications',
+        'base_url': settings.BASE_URL,
+        'quest_of_the_day': shared['quest_of_the_day'],
+        'upcoming_events': shared['upcoming_events'],
+        'activities': latest_activities,
+        'show_action': show_action,
+    }
+    recipient_params = {
+        'subscriber.priv': subscriber.priv if subscriber else '',
+        'subscriber.profile.preferred_payout_address': profile.preferred_payout_address if profile else '',
+        'keywords': ",".join(subscriber.keywords) if subscriber and subscriber.keywords else '',
+        'notifications_count': notifications_count,
+        'chats_count': chats_count,
+    }
+    layout_key = (
+        tuple(bounty.pk for bounty in bounties),
+        tuple(bounty.pk for bounty in old_bounties or []),
+        tuple(activity.pk for activity in latest_activities),
+        tuple(bounty.pk for bounty in featured_bounties),
+        show_action,
+    )
+
+    response_html = render_inlined_email("emails/new_bounty.html", params, recipient_params, layout_key)
+    response_txt = render_to_string("emails/new_bounty.txt", {
+        **params,
+        'subscriber': subscriber,
+        'keywords': recipient_params['keywords'],
+        'notifications_count': notifications_count,
+        'chats_count': chats_count,
+    })
+
+    return response_html, response_txt
+
+
 def render_unread_notification_email_weekly_roundup(to_email, from_date=date.today(), days_ago=7):
     subscriber = get_or_save_email_subscriber(to_email, 'internal')
     from dashboard.models import Profile
@@ -644,8 +831,8 @@ def render_unread_notification_email_weekly_roundup(to_email, from_date=date.tod
 
     return response_html, response_txt, subject
 
-def render_weekly_recap(to_email, from_date=date.today(), days_back=7):
-    sub = get_or_save_email_subscriber(to_email, 'internal')
+def render_weekly_recap(to_email, from_date=date.today(), days_back=7, subscriber=None):
+    sub = subscriber or get_or_save_email_subscriber(to_email, 'internal')
     from dashboard.models import Profile
     prof = Profile.objects.filter(email__iexact=to_email).last()
     bounties = prof.bounties.all()
@@ -1196,7 +1383,7 @@ def render_start_work_applicant_expired(interest, bounty):
     return response_html, response_txt, subject
 
 
-def render_new_bounty_roundup(to_email):
+def render_new_bounty_roundup(to_email, subscriber=None):
     from dashboard.models import Bounty
     from django.conf import settings
     from marketing.models import RoundupEmail
@@ -1281,7 +1468,7 @@ def render_new_bounty_roundup(to_email):
         'invert_footer': False,
         'hide_header': False,
         'highlights': highlights,
-        'subscriber': get_or_save_email_subscriber(to_email, 'internal'),
+        'subscriber': subscriber or get_or_save_email_subscriber(to_email, 'internal'),
         'kudos_highlights': kudos_highlights,
         'sponsor': sponsor,
 		'email_type': 'roundup',
@@ -0,0 +1,100 @@
+'''
+    Copyright (C) 2020 Gitcoin Core
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import random
+import time
+import uuid
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+
+from dashboard.models import Bounty
+from retail.emails import (
+    clear_email_shared_context, get_email_shared_context, premailer_transform, render_new_bounty_digest,
+)
+
+
+def make_subscriber(i):
+    profile = SimpleNamespace(preferred_payout_address=f'0x{i:040x}' if i % 2 else '')
+    return SimpleNamespace(priv=uuid.uuid4().hex, profile=profile, keywords=['python', 'solidity'])
+
+
+class Command(BaseCommand):
+
+    help = 'benchmarks rendering the daily new bounty email for many recipients, without sending anything'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100000, help='number of digest emails to render')
+        parser.add_argument(
+            '--baseline-count', type=int, default=20,
+            help='number of emails rendered and inlined one by one, for comparison'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG:
+            raise CommandError('benchmark_email_rendering is a load test and only runs with DEBUG enabled')
+
+        bounties = list(Bounty.objects.current().filter(network='mainnet', idx_status='open').order_by('-web3_created')[:10])
+        new_bounties, old_bounties = bounties[:3], bounties[3:]
+
+        clear_email_shared_context()
+        start = time.perf_counter()
+        shared = get_email_shared_context()
+        print(f'loaded the shared context in {(time.perf_counter() - start) * 1000:.0f}ms')
+
+        timings = []
+        for i in range(options['baseline_count']):
+            subscriber = make_subscriber(i)
+            start = time.perf_counter()
+            premailer_transform(render_to_string('emails/new_bounty.html', {
+                'old_bounties': old_bounties,
+                'bounties': new_bounties,
+                'featured_bounties': [],
+                'trending_avatar': shared['trending_avatar'],
+                'email_announcements': shared['email_announcements'],
+                'subscriber': subscriber,
+                'keywords': ','.join(subscriber.keywords),
+                'email_style': 26,
+                'email_type': 'new_bounty_notifications',
+                'base_url': settings.BASE_URL,
+                'quest_of_the_day': shared['quest_of_the_day'],
+                'upcoming_events': shared['upcoming_events'],
+                'activities': [],
+                'notifications_count': random.randint(0, 3),
+                'chats_count': random.randint(0, 3),
+                'show_action': False,
+            }))
+            timings.append(time.perf_counter() - start)
+        baseline = sum(timings) / len(timings) if timings else 0
+
+        start = time.perf_counter()
+        for i in range(options['count']):
+            render_new_bounty_digest(
+                make_subscriber(i),
+                new_bounties,
+                old_bounties,
+                [],
+                notifications_count=random.randint(0, 3),
+                chats_count=random.randint(0, 3),
+            )
+        seconds = time.perf_counter() - start
+        cached = seconds / options['count'] if options['count'] else 0
+
+        print(f'baseline: {baseline * 1000:.1f}ms/email, {baseline * options["count"]:.0f}s for {options["count"]} emails')
+        print(f'inlined once: {cached * 1000:.2f}ms/email, {seconds:.0f}s for {options["count"]} emails')
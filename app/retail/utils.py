@@ -418,7 +418,7 @@ def build_stat_results(keyword=None):
     pp.profile_time('start')
     base_alumni = Alumni.objects.all().cache()
     base_bounties = Bounty.objects.current().filter(network='mainnet').cache()
-    base_leaderboard = LeaderboardRank.objects.filter(product='all').cache()
+    base_leaderboard = LeaderboardRank.objects.active().filter(product='all').cache()
 
     pp.profile_time('filters')
     if keyword:
@@ -462,12 +462,12 @@ def build_stat_results(keyword=None):
 
     # Leaderboard
     num_to_show = 30
-    context['top_funders'] = base_leaderboard.filter(active=True, leaderboard='quarterly_payers') \
+    context['top_funders'] = base_leaderboard.filter(leaderboard='quarterly_payers') \
         .order_by('rank').values_list('github_username', flat=True)[0:num_to_show]
     pp.profile_time('funders')
     context['top_orgs'] = ['ethereumclassic', 'web3foundation', 'ethereum', 'arweave', 'zilliqa']
     pp.profile_time('orgs')
-    context['top_coders'] = base_leaderboard.filter(active=True, leaderboard='quarterly_earners') \
+    context['top_coders'] = base_leaderboard.filter(leaderboard='quarterly_earners') \
         .order_by('rank').values_list('github_username', flat=True)[0:num_to_show]
     pp.profile_time('orgs')
 
@@ -51,13 +51,12 @@ from economy.models import Token
 from marketing.mails import mention_email, new_funding_limit_increase_request, new_token_request, wall_post_email
 from marketing.models import Alumni, Job, LeaderboardRank
 from marketing.utils import get_or_save_email_subscriber, invite_to_slack
-from perftools.models import JSONStore
+from perftools.utils import get_json_store
 from ratelimit.decorators import ratelimit
 from retail.emails import render_nth_day_email_campaign
 from retail.helpers import get_ip
 from townsquare.models import PinnedPost
-from townsquare.tasks import increment_view_counts
-from townsquare.utils import can_pin
+from townsquare.utils import buffer_view_counts, can_pin
 
 from .forms import FundingLimitIncreaseRequestForm
 from .utils import articles, press, programming_languages, reasons, testimonials
@@ -397,7 +396,7 @@ def contributor_bounties(request, tech_stack):
         return redirect('new_funding_short')
 
     try:
-        new_context = JSONStore.objects.get(view='contributor_landing_page', key=tech_stack).data
+        new_context = get_json_store(view='contributor_landing_page', key=tech_stack).data
 
         for key, value in new_context.items():
             context[key] = value
@@ -586,7 +585,7 @@ def about(request):
     exclude_community = ['kziemiane', 'owocki', 'mbeacom']
     community_members = [
     ]
-    leadeboardranks = LeaderboardRank.objects.filter(active=True, product='all', leaderboard='quarterly_earners').exclude(github_username__in=exclude_community).order_by('-amount').cache()[0: 15]
+    leadeboardranks = LeaderboardRank.objects.active().filter(product='all', leaderboard='quarterly_earners').exclude(github_username__in=exclude_community).order_by('-amount').cache()[0: 15]
     for lr in leadeboardranks:
         package = (lr.avatar_url, lr.github_username, lr.github_username, '')
         community_members.append(package)
@@ -913,7 +912,9 @@ def results(request, keyword=None):
     """Render the Results response."""
     if keyword and keyword not in programming_languages:
         raise Http404
-    js = JSONStore.objects.get(view='results', key=keyword)
+    js = get_json_store(view='results', key=keyword or '')
+    if not js:
+        raise Http404
     context = js.data
     context['updated'] = js.created_on
     context['is_outside'] = True
@@ -1049,7 +1050,7 @@ def activity(request):
     # increment view counts
     activities_pks = [obj.pk for obj in page]
     if len(activities_pks):
-        increment_view_counts.delay(activities_pks)
+        buffer_view_counts('activity', activities_pks)
 
     context = {
         'suppress_more_link': suppress_more_link,
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""Define the bulk indexer of SearchResults into Elasticsearch.
+
+Copyright (C) 2020 Gitcoin Core
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+import logging
+import time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from elasticsearch.helpers import streaming_bulk
+from perftools.utils import get_json_store_data, publish_json_stores
+from search.models import SEARCH_INDEX_ALIAS, SearchResult, get_elasticsearch_client
+
+logger = logging.getLogger(__name__)
+
+# rows read from the database per round trip
+SEARCH_INDEX_READ_CHUNK_SIZE = 2000
+# documents sent per bulk request; the next request is only sent once the previous one is acknowledged
+SEARCH_INDEX_BULK_CHUNK_SIZE = 500
+SEARCH_INDEX_BULK_MAX_BYTES = 10 * 1024 * 1024
+# retries of bulk requests rejected because the cluster is overloaded (HTTP 429), with exponential backoff
+SEARCH_INDEX_MAX_RETRIES = 5
+# rows modified this long before the watermark are reindexed, to catch transactions committed late
+SEARCH_INDEX_WATERMARK_OVERLAP = timezone.timedelta(minutes=5)
+# how far back the first incremental run goes
+SEARCH_INDEX_DEFAULT_LOOKBACK = timezone.timedelta(hours=1)
+
+
+def get_search_index_actions(search_results, index):
+    """Stream the bulk actions indexing the given search results.
+
+    Args:
+        search_results (SearchResultQuerySet): The results to index. Private results are skipped.
+        index (str): The index or alias to write to.
+
+    Yields:
+        dict: A bulk index action.
+
+    """
+    search_results = search_results.filter(visible_to__isnull=True).select_related('source_type')
+    for search_result in search_results.iterator(chunk_size=SEARCH_INDEX_READ_CHUNK_SIZE):
+        yield {
+            '_op_type': 'index',
+            '_index': index,
+            '_id': search_result.pk,
+            '_source': search_result.to_elasticsearch_doc(),
+        }
+
+
+def index_search_results(search_results, index=SEARCH_INDEX_ALIAS, chunk_size=SEARCH_INDEX_BULK_CHUNK_SIZE, es=None):
+    """Bulk index the given search results.
+
+    Args:
+        search_results (SearchResultQuerySet): The results to index.
+        index (str): The index or alias to write to.
+        chunk_size (int): The number of documents sent per bulk request.
+        es (Elasticsearch): The client to use. Defaults to the shared client.
+
+    Returns:
+        dict: The number of documents indexed and failed, and the indexing rate.
+
+    """
+    start = time.time()
+    stats = {'indexed': 0, 'failed': 0}
+    results = streaming_bulk(
+        es or get_elasticsearch_client(),
+        get_search_index_actions(search_results, index),
+        chunk_size=chunk_size,
+        max_chunk_bytes=SEARCH_INDEX_BULK_MAX_BYTES,
+        max_retries=SEARCH_INDEX_MAX_RETRIES,
+        raise_on_error=False,
+    )
+    for ok, item in results:
+        if ok:
+            stats['indexed'] += 1
+        else:
+            stats['failed'] += 1
+            logger.warning('Search Index - Error: (%s)', item)
+
+    stats['seconds'] = time.time() - start
+    stats['docs_per_second'] = stats['indexed'] / stats['seconds'] if stats['seconds'] else 0
+    return stats
+
+
+def get_search_index_watermark():
+    """Get the modified_on of the last SearchResult indexed, or None if nothing was indexed yet."""
+    watermark = get_json_store_data('search_index', 'watermark')
+    return parse_datetime(watermark) if watermark else None
+
+
+def set_search_index_watermark(watermark):
+    publish_json_stores('search_index', {'watermark': watermark.isoformat()})
+
+
+def update_search_index(es=None, chunk_size=SEARCH_INDEX_BULK_CHUNK_SIZE):
+    """Index the search results modified since the last run.
+
+    Args:
+        es (Elasticsearch): The client to use. Defaults to the shared client.
+        chunk_size (int): The number of documents sent per bulk request.
+
+    Returns:
+        dict: The indexing stats.
+
+    """
+    watermark = get_search_index_watermark()
+    since = watermark - SEARCH_INDEX_WATERMARK_OVERLAP if watermark else timezone.now() - SEARCH_INDEX_DEFAULT_LOOKBACK
+    search_results = SearchResult.objects.filter(modified_on__gt=since)
+
+    # fix the upper bound so rows modified while indexing are left for the next run
+    new_watermark = search_results.order_by('-modified_on').values_list('modified_on', flat=True).first()
+    if not new_watermark:
+        return {'indexed': 0, 'failed': 0, 'seconds': 0, 'docs_per_second': 0}
+
+    stats = index_search_results(search_results.filter(modified_on__lte=new_watermark), es=es, chunk_size=chunk_size)
+    set_search_index_watermark(new_watermark)
+    return stats
+
+
+def rebuild_search_index(es=None, chunk_size=SEARCH_INDEX_BULK_CHUNK_SIZE):
+    """Index every search result into a new index and atomically point the alias at it.
+
+    Args:
+        es (Elasticsearch): The client to use. Defaults to the shared client.
+        chunk_size (int): The number of documents sent per bulk request.
+
+    Returns:
+        dict: The indexing stats, and the name of the new index.
+
+    """
+    es = es or get_elasticsearch_client()
+    started_on = timezone.now()
+    index = f"{SEARCH_INDEX_ALIAS}-{started_on.strftime('%Y%m%d%H%M%S')}"
+
+    # refreshing and replicating while loading only slows the load down
+    es.indices.create(index=index, body={'settings': {'refresh_interval': '-1', 'number_of_replicas': 0}})
+    stats = index_search_results(SearchResult.objects.all(), index=index, es=es, chunk_size=chunk_size)
+    es.indices.put_settings(index=index, body={'refresh_interval': None, 'number_of_replicas': None})
+    es.indices.refresh(index=index)
+
+    old_indices = list(es.indices.get_alias(name=SEARCH_INDEX_ALIAS, ignore=[404]).keys())
+    old_indices = [old_index for old_index in old_indices if old_index not in ['status', 'error']]
+    actions = [{'remove': {'index': old_index, 'alias': SEARCH_INDEX_ALIAS}} for old_index in old_indices]
+    if es.indices.exists(index=SEARCH_INDEX_ALIAS) and not es.indices.exists_alias(name=SEARCH_INDEX_ALIAS):
+        # a concrete index still holds the name of the alias
+        actions.append({'remove_index': {'index': SEARCH_INDEX_ALIAS}})
+    actions.append({'add': {'index': index, 'alias': SEARCH_INDEX_ALIAS}})
+    es.indices.update_aliases(body={'actions': actions})
+
+    for old_index in old_indices:
+        es.indices.delete(index=old_index, ignore=[404])
+    set_search_index_watermark(started_on)
+
+    stats['index'] = index
+    return stats
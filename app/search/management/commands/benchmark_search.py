@@ -0,0 +1,84 @@
+'''
+    Copyright (C) 2020 Gitcoin Core
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import random
+import time
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from search.models import SearchResult
+from search.views import SEARCH_RESULTS_PER_PAGE
+
+SYLLABLES = ['git', 'coin', 'eth', 'kud', 'os', 'gra', 'nt', 'bo', 'un', 'ty', 'que', 'st', 'ha', 'ck', 'ath', 'on']
+DEFAULT_TERMS = ['gi', 'gitcoin', 'eth', 'kudos bo', 'hackathon', 'zzzz']
+
+
+def random_words(count):
+    return ' '.join(
+        ''.join(random.choice(SYLLABLES) for _ in range(random.randint(1, 4))) for _ in range(count)
+    )
+
+
+def percentile(timings, fraction):
+    timings = sorted(timings)
+    return timings[min(int(len(timings) * fraction), len(timings) - 1)]
+
+
+class Command(BaseCommand):
+
+    help = 'benchmarks the navbar search against a generated fixture, which is rolled back afterwards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='number of search results to generate')
+        parser.add_argument('--repeat', type=int, default=20, help='number of times each term is searched')
+        parser.add_argument('terms', nargs='*', default=DEFAULT_TERMS, help='terms to search for')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG:
+            raise CommandError('benchmark_search writes a large fixture and only runs with DEBUG enabled')
+
+        source_type = ContentType.objects.get(app_label='dashboard', model='profile')
+        with transaction.atomic():
+            for offset in range(0, options['rows'], 10000):
+                SearchResult.objects.bulk_create([
+                    SearchResult(
+                        source_type=source_type,
+                        source_id=offset + i,
+                        title=random_words(3),
+                        description=random_words(30),
+                        url=f'/benchmark/{offset + i}',
+                    ) for i in range(min(10000, options['rows'] - offset))
+                ])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE search_searchresult')
+            print(f'generated {options["rows"]} search results')
+
+            for term in options['terms']:
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    count = len(SearchResult.objects.visible_to_profile().search(term)[:SEARCH_RESULTS_PER_PAGE])
+                    timings.append((time.perf_counter() - start) * 1000)
+                print(
+                    f'{term!r}: {count} results, '
+                    f'p50 {percentile(timings, 0.5):.1f}ms, p95 {percentile(timings, 0.95):.1f}ms'
+                )
+
+            transaction.set_rollback(True)
@@ -16,9 +16,8 @@
 
 '''
 from django.core.management.base import BaseCommand
-from django.utils import timezone
 
-from search.models import SearchResult
+from search.indexer import SEARCH_INDEX_BULK_CHUNK_SIZE, rebuild_search_index, update_search_index
 
 
 class Command(BaseCommand):
@@ -26,17 +25,15 @@ class Command(BaseCommand):
     help = 'uploads latest search results into elasticsearch'
 
     def add_arguments(self, parser):
-        parser.add_argument('sync_type', type=str, choices=['create', 'update'], help='ethereum network to use')
+        parser.add_argument('sync_type', type=str, choices=['create', 'update'], help='create rebuilds the whole index, update indexes the results modified since the last run')
+        parser.add_argument('--chunk-size', type=int, default=SEARCH_INDEX_BULK_CHUNK_SIZE, help='documents per bulk request')
 
     def handle(self, *args, **options):
         sync_type = options['sync_type']
 
         if sync_type == 'create':
-            for sr in SearchResult.objects.all():
-                print(sr.pk)
-            sr.put_on_elasticsearch()
+            stats = rebuild_search_index(chunk_size=options['chunk_size'])
+            print(f"rebuilt {stats['index']}")
         elif sync_type == 'update':
-            then = timezone.now() - timezone.timedelta(hours=1)
-            for sr in SearchResult.objects.filter(modified_on__gt=then):
-                print(sr.pk)
-                sr.put_on_elasticsearch()
+            stats = update_search_index(chunk_size=options['chunk_size'])
+        print(f"indexed {stats['indexed']} docs ({stats['failed']} failed) in {stats['seconds']:.1f}s, {stats['docs_per_second']:.0f} docs/sec")
@@ -0,0 +1,51 @@
+# Generated by Django 2.2.4 on 2020-08-21 10:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR = """
+    setweight(to_tsvector('pg_catalog.simple', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('pg_catalog.simple', left(coalesce({row}description, ''), 10000)), 'B')
+"""
+
+CREATE_TRIGGER = f"""
+CREATE FUNCTION search_searchresult_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR.format(row='NEW.')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER search_searchresult_vector_update
+    BEFORE INSERT OR UPDATE ON search_searchresult
+    FOR EACH ROW EXECUTE PROCEDURE search_searchresult_vector_update();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS search_searchresult_vector_update ON search_searchresult;
+DROP FUNCTION IF EXISTS search_searchresult_vector_update();
+"""
+
+BACKFILL = f"UPDATE search_searchresult SET search_vector = {SEARCH_VECTOR.format(row='')};"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0002_auto_20200512_0022'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchresult',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='maintained by a database trigger from the title and description', null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='searchresult',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='searchresult_vector_gin'),
+        ),
+    ]
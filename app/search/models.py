@@ -1,12 +1,69 @@
+import re
+from functools import lru_cache
+
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
 from django.db import models
+from django.db.models import Case, F, IntegerField, Q, Value, When
 from django.utils import timezone
 
 from economy.models import SuperModel
 from elasticsearch import Elasticsearch
 
+# the alias the search index is served from, swapped to a new index on every full rebuild
+SEARCH_INDEX_ALIAS = 'search-index'
+
+
+def get_prefix_search_query(keyword):
+    """Build a full text query matching every word of the keyword as a prefix.
+
+    Args:
+        keyword (str): The text typed by the user.
+
+    Returns:
+        SearchQuery: The query, or None if the keyword has no words.
+
+    """
+    words = re.findall(r'\w+', keyword.lower())
+    if not words:
+        return None
+    return SearchQuery(' & '.join(f'{word}:*' for word in words), config='simple', search_type='raw')
+
+
+class SearchResultQuerySet(models.QuerySet):
+    """Handle the manager queryset for SearchResults."""
+
+    def visible_to_profile(self, profile=None):
+        """Filter results to the public ones and the ones only visible to the given profile."""
+        if profile:
+            return self.filter(Q(visible_to__isnull=True) | Q(visible_to=profile))
+        return self.filter(visible_to__isnull=True)
+
+    def search(self, keyword):
+        """Filter results matching the keyword, ordered by relevance.
+
+        Every word of the keyword is matched as a prefix against the indexed
+        search_vector, exact title matches come first, then results are ranked,
+        title matches weighing more than description ones.
+
+        Args:
+            keyword (str): The text typed by the user.
+
+        Returns:
+            SearchResultQuerySet: The matching results.
+
+        """
+        query = get_prefix_search_query(keyword)
+        if not query:
+            return self.none()
+        return self.filter(search_vector=query).annotate(
+            exact_match=Case(When(title__iexact=keyword.strip(), then=Value(1)), default=Value(0), output_field=IntegerField()),
+            rank=SearchRank(F('search_vector'), query),
+        ).order_by('-exact_match', '-rank', '-pk')
+
 
 class SearchResult(SuperModel):
     """Records SearchResult - the generic object for all search results on the platform ."""
@@ -19,19 +76,24 @@ class SearchResult(SuperModel):
     url = models.CharField(max_length=500, default='')
     img_url = models.CharField(max_length=500, default='', null=True)
     visible_to = models.ForeignKey('dashboard.Profile', related_name='search_results_visible', on_delete=models.CASCADE, db_index=True, null=True)
+    search_vector = SearchVectorField(null=True, editable=False, help_text='maintained by a database trigger from the title and description')
+
+    objects = SearchResultQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='searchresult_vector_gin'),
+        ]
 
     def __str__(self):
         return f"{self.source_type}; {self.url}"
 
 
-    def put_on_elasticsearch(self):
-        if self.visible_to:
-            return None
-
-        es = Elasticsearch([settings.ELASTIC_SEARCH_URL])
+    def to_elasticsearch_doc(self):
+        """Get the document indexing this result in the search index."""
         source_type  = str(str(self.source_type).replace('token', 'kudos')).title()
         full_search = f"{self.title}{self.description}{source_type}"
-        doc = {
+        return {
             'title': self.title,
             'description': self.description,
             'full_search': full_search,
@@ -41,14 +103,26 @@ class SearchResult(SuperModel):
             'timestamp': timezone.now(),
             'source_type': source_type,
         }
-        res = es.index(index="search-index", id=self.pk, body=doc)
+
+    def put_on_elasticsearch(self):
+        if self.visible_to:
+            return None
+
+        es = get_elasticsearch_client()
+        res = es.index(index=SEARCH_INDEX_ALIAS, id=self.pk, body=self.to_elasticsearch_doc())
+
+
+@lru_cache(maxsize=1)
+def get_elasticsearch_client():
+    """Get the Elasticsearch client shared by this process."""
+    return Elasticsearch([settings.ELASTIC_SEARCH_URL])
 
 
 def search(query):
     if not settings.ELASTIC_SEARCH_URL:
         return {}
-    es = Elasticsearch([settings.ELASTIC_SEARCH_URL])
-    res = es.search(index="search-index", body={
+    es = get_elasticsearch_client()
+    res = es.search(index=SEARCH_INDEX_ALIAS, body={
       "query": {
         "match": {
           "full_search": query,
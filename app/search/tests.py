@@ -1,3 +1,99 @@
-from django.test import TestCase
+# -*- coding: utf-8 -*-
+"""Handle search related tests.
 
-# Create your tests here.
+Copyright (C) 2020 Gitcoin Core
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+
+from dashboard.models import Profile
+from search.indexer import get_search_index_watermark, update_search_index
+from search.models import SearchResult
+from test_plus.test import TestCase
+
+
+class SearchResultSearchTest(TestCase):
+    """Define tests for the full text search over SearchResults."""
+
+    def setUp(self):
+        """Perform setup for the testcase."""
+        self.profile = Profile.objects.create(data={}, handle='searcher')
+        source_type = ContentType.objects.get(app_label='dashboard', model='profile')
+        for title, description, visible_to in [
+            ('Gitcoin Grants', 'fund open source', None),
+            ('gitcoin', '', None),
+            ('Kudos', 'awarded to gitcoin contributors', None),
+            ('Gitcoin private', '', self.profile),
+            ('Ethereum', '', None),
+        ]:
+            SearchResult.objects.create(
+                source_type=source_type, source_id=1, title=title, description=description, visible_to=visible_to
+            )
+
+    def test_search_prefix_and_ranking(self):
+        """Test words match as prefixes, with exact and title matches first."""
+        results = SearchResult.objects.visible_to_profile().search('gitc')
+
+        assert list(results.values_list('title', flat=True))[-1] == 'Kudos'
+        assert set(results.values_list('title', flat=True)) == {'Gitcoin Grants', 'gitcoin', 'Kudos'}
+        assert SearchResult.objects.visible_to_profile().search('Gitcoin').first().title == 'gitcoin'
+        assert list(SearchResult.objects.search('gitcoin gra').values_list('title', flat=True)) == ['Gitcoin Grants']
+
+    def test_search_visibility(self):
+        """Test private results are only found by the profile they are visible to."""
+        assert not SearchResult.objects.visible_to_profile().search('private').exists()
+        assert SearchResult.objects.visible_to_profile(self.profile).search('private').count() == 1
+
+    def test_search_without_words(self):
+        """Test keywords without any word match nothing."""
+        assert not SearchResult.objects.search(' :* & ').exists()
+
+
+class UpdateSearchIndexTest(TestCase):
+    """Define tests for the incremental Elasticsearch indexer."""
+
+    def setUp(self):
+        """Perform setup for the testcase."""
+        self.source_type = ContentType.objects.get(app_label='dashboard', model='profile')
+        self.profile = Profile.objects.create(data={}, handle='searcher')
+        SearchResult.objects.create(source_type=self.source_type, source_id=1, title='old')
+        SearchResult.objects.update(modified_on=timezone.now() - timezone.timedelta(days=1))
+        self.indexed = []
+
+    def streaming_bulk(self, client, actions, **kwargs):
+        for action in actions:
+            self.indexed.append(action['_source']['title'])
+            yield True, {'index': {'_id': action['_id']}}
+
+    def test_update_search_index(self):
+        """Test only the public results modified since the watermark are indexed."""
+        new = SearchResult.objects.create(source_type=self.source_type, source_id=2, title='new')
+        SearchResult.objects.create(source_type=self.source_type, source_id=3, title='private', visible_to=self.profile)
+
+        with mock.patch('search.indexer.streaming_bulk', self.streaming_bulk):
+            stats = update_search_index(es=mock.Mock())
+
+        assert self.indexed == ['new']
+        assert stats['indexed'] == 1
+        assert get_search_index_watermark() == SearchResult.objects.get(title='private').modified_on
+
+        SearchResult.objects.filter(pk=new.pk).update(modified_on=timezone.now() - timezone.timedelta(hours=1))
+        with mock.patch('search.indexer.streaming_bulk', self.streaming_bulk):
+            stats = update_search_index(es=mock.Mock())
+        assert stats['indexed'] == 0
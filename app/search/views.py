@@ -2,7 +2,6 @@ import json
 import logging
 
 from django.conf import settings
-from django.db.models import Q
 from django.http import HttpResponse
 from django.shortcuts import render
 
@@ -14,31 +13,29 @@ from .models import SearchResult, search
 
 logger = logging.getLogger(__name__)
 
+SEARCH_RESULTS_PER_PAGE = 100
+
 
 @ratelimit(key='ip', rate='30/m', method=ratelimit.UNSAFE, block=True)
 def get_search(request):
     keyword = request.GET.get('term', '')
-
-    all_result_sets = [SearchResult.objects.filter(title__icontains=keyword), SearchResult.objects.filter(title=keyword)]
-    return_results = []
-    exclude_pks = []
-    for results in all_result_sets:
-        if request.user.is_authenticated:
-            results = results.filter(Q(visible_to__isnull=True) | Q(visible_to=request.user.profile))
-        else:
-            results = results.filter(visible_to__isnull=True)
-        results = results.exclude(pk__in=exclude_pks)
-        inner_results = [
-            {
-                'title': ele.title,
-                'description': ele.description,
-                'url': ele.url,
-                'img_url': ele.img_url if ele.img_url else "/static/v2/images/helmet.svg",
-                'source_type': str(str(ele.source_type).replace('token', 'kudos')).title()
-            } for ele in results
-        ]
-        exclude_pks = exclude_pks + list(results.values_list('pk', flat=True))
-        return_results = return_results + inner_results
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+
+    profile = request.user.profile if request.user.is_authenticated and hasattr(request.user, 'profile') else None
+    results = SearchResult.objects.visible_to_profile(profile).search(keyword).select_related('source_type')
+    results = results[(page - 1) * SEARCH_RESULTS_PER_PAGE:page * SEARCH_RESULTS_PER_PAGE]
+    return_results = [
+        {
+            'title': ele.title,
+            'description': ele.description,
+            'url': ele.url,
+            'img_url': ele.img_url if ele.img_url else "/static/v2/images/helmet.svg",
+            'source_type': str(str(ele.source_type).replace('token', 'kudos')).title()
+        } for ele in results
+    ]
 
     if request.user.is_authenticated:
         SearchHistory.objects.update_or_create(
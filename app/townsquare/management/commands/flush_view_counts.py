@@ -0,0 +1,31 @@
+'''
+    Copyright (C) 2020 Gitcoin Core
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+'''
+
+from django.core.management.base import BaseCommand
+
+from townsquare.utils import VIEW_COUNT_MODELS, flush_view_counts
+
+
+class Command(BaseCommand):
+
+    help = 'writes the view counts buffered in redis to the database'
+
+    def handle(self, *args, **options):
+        for kind in VIEW_COUNT_MODELS:
+            count = flush_view_counts(kind)
+            print(f"flushed the view counts of {count} {kind} objects")
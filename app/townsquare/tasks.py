@@ -1,10 +1,7 @@
-from django.db import connection, transaction
-
 from app.services import RedisService
-from cacheops import invalidate_obj
 from celery import app
 from celery.utils.log import get_task_logger
-from dashboard.models import Activity
+from townsquare.utils import buffer_view_counts
 
 logger = get_task_logger(__name__)
 
@@ -20,21 +17,7 @@ def increment_view_counts(self, pks, retry=False):
     :param pks:
     :return:
     """
-    with redis.lock("tasks:increment_view_counts", timeout=LOCK_TIMEOUT):
-
-        if len(pks) == 0:
-            return
-        # update DB directly
-        with connection.cursor() as cursor:
-            id_as_str = ",".join(str(id) for id in pks)
-            query = f"UPDATE dashboard_activity SET view_count = view_count + 1 WHERE id in ({id_as_str});"
-            cursor.execute(query)
-            cursor.close()
-
-        # invalidate cache
-        activities = Activity.objects.filter(pk__in=pks)
-        for obj in activities:
-            invalidate_obj(obj)
+    buffer_view_counts('activity', pks)
 
 @app.shared_task(bind=True, max_retries=3)
 def increment_offer_view_counts(self, pks, retry=False):
@@ -43,16 +26,7 @@ def increment_offer_view_counts(self, pks, retry=False):
     :param pks:
     :return:
     """
-    with redis.lock("tasks:increment_offer_view_counts", timeout=LOCK_TIMEOUT):
-        if len(pks) == 0:
-            return
-        # update DB directly
-        with connection.cursor() as cursor:
-            id_as_str = ",".join(str(id) for id in pks)
-            if len(id_as_str):
-                query = f"UPDATE townsquare_offer SET view_count = view_count + 1 WHERE id in ({id_as_str});"
-                cursor.execute(query)
-            cursor.close()
+    buffer_view_counts('offer', pks)
 
 
 @app.shared_task(bind=True, max_retries=3)
@@ -1,3 +1,97 @@
-from django.test import TestCase
+# -*- coding: utf-8 -*-
+"""Handle townsquare related tests.
 
-# Create your tests here.
+Copyright (C) 2020 Gitcoin Core
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+from unittest import mock
+
+from dashboard.models import Activity, Profile
+from test_plus.test import TestCase
+from townsquare.utils import buffer_view_counts, flush_view_counts
+
+
+class FakeRedis:
+    """Define the subset of redis used by the view count buffers."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        pass
+
+    def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[str(field).encode()] = fields.get(str(field).encode(), 0) + amount
+
+    def hgetall(self, key):
+        return {field: str(value).encode() for field, value in self.hashes.get(key, {}).items()}
+
+    def exists(self, key):
+        return key in self.hashes
+
+    def rename(self, key, new_key):
+        self.hashes[new_key] = self.hashes.pop(key)
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+class ViewCountBufferTest(TestCase):
+    """Define tests for the buffered view counts."""
+
+    def setUp(self):
+        """Perform setup for the testcase."""
+        profile = Profile.objects.create(data={}, handle='viewer')
+        self.activities = [
+            Activity.objects.create(profile=profile, activity_type=activity_type)
+            for activity_type in ['new_bounty', 'new_tip']
+        ]
+        self.redis = FakeRedis()
+        patcher = mock.patch('townsquare.utils.RedisService')
+        patcher.start().return_value.redis = self.redis
+        self.addCleanup(patcher.stop)
+
+    def test_flush_view_counts(self):
+        """Test buffered views are written in one flush and the buffer is emptied."""
+        first, second = self.activities
+        buffer_view_counts('activity', [first.pk, second.pk])
+        buffer_view_counts('activity', [first.pk, first.pk])
+
+        assert flush_view_counts('activity') == 2
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert first.view_count == 2
+        assert second.view_count == 1
+        assert self.redis.hashes == {}
+        assert flush_view_counts('activity') == 0
+
+    def test_flush_view_counts_retries_failed_flush(self):
+        """Test a buffer left over by a failed flush is written before the new views."""
+        first, _ = self.activities
+        buffer_view_counts('activity', [first.pk])
+        self.redis.rename('view_counts:activity', 'view_counts:activity:flushing')
+        buffer_view_counts('activity', [first.pk])
+
+        assert flush_view_counts('activity') == 1
+        first.refresh_from_db()
+        assert first.view_count == 1
+        assert flush_view_counts('activity') == 1
+        first.refresh_from_db()
+        assert first.view_count == 2
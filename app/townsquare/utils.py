@@ -1,7 +1,20 @@
+from django.db import connection, transaction
+
+from app.services import RedisService
+from cacheops import invalidate_dict
+from dashboard.models import Activity
 from grants.models import Grant
 
 from .models import Offer
 
+# the models whose view counts are buffered in redis, by the name of their buffer
+VIEW_COUNT_MODELS = {
+    'activity': Activity,
+    'offer': Offer,
+}
+# the number of objects updated per statement when flushing view counts
+VIEW_COUNT_FLUSH_BATCH_SIZE = 5000
+
 
 def is_user_townsquare_enabled(user):
     if not user.is_authenticated:
@@ -63,3 +76,70 @@ def is_email_townsquare_enabled(email):
 
 def is_there_an_action_available():
     return Offer.objects.current().exists()
+
+
+def get_view_count_buffer_key(kind):
+    return f"view_counts:{kind}"
+
+
+def buffer_view_counts(kind, pks):
+    """Count a view of each of the given objects.
+
+    The views are accumulated in a redis hash, in a single round trip, and written
+    to the database by flush_view_counts.
+
+    Args:
+        kind (str): The name of the buffer, a key of VIEW_COUNT_MODELS.
+        pks (list of int): The primary keys of the objects viewed.
+
+    """
+    pks = set(int(pk) for pk in pks)
+    if not pks:
+        return
+
+    pipeline = RedisService().redis.pipeline(transaction=False)
+    for pk in pks:
+        pipeline.hincrby(get_view_count_buffer_key(kind), pk, 1)
+    pipeline.execute()
+
+
+def flush_view_counts(kind):
+    """Write the view counts buffered since the last flush to the database.
+
+    The buffer is renamed before being read, so views counted while flushing go to
+    a new buffer. A buffer whose flush failed is retried before a new one is taken.
+
+    Args:
+        kind (str): The name of the buffer, a key of VIEW_COUNT_MODELS.
+
+    Returns:
+        int: The number of objects updated.
+
+    """
+    redis = RedisService().redis
+    model = VIEW_COUNT_MODELS[kind]
+    buffer_key = get_view_count_buffer_key(kind)
+    flushing_key = f"{buffer_key}:flushing"
+
+    if not redis.exists(flushing_key):
+        if not redis.exists(buffer_key):
+            return 0
+        redis.rename(buffer_key, flushing_key)
+
+    deltas = [(int(pk), int(delta)) for pk, delta in redis.hgetall(flushing_key).items()]
+    with transaction.atomic(), connection.cursor() as cursor:
+        for i in range(0, len(deltas), VIEW_COUNT_FLUSH_BATCH_SIZE):
+            batch = deltas[i:i + VIEW_COUNT_FLUSH_BATCH_SIZE]
+            values = ', '.join(['(%s, %s)'] * len(batch))
+            cursor.execute(
+                f"UPDATE {model._meta.db_table} AS t SET view_count = t.view_count + v.delta "
+                f"FROM (VALUES {values}) AS v(id, delta) WHERE t.id = v.id",
+                [value for delta in batch for value in delta],
+            )
+    # only the cached querysets which may contain the flushed objects are dropped; querysets
+    # matching them on other fields keep their counts until they expire
+    for pk, _ in deltas:
+        invalidate_dict(model, {'id': pk})
+
+    redis.delete(flushing_key)
+    return len(deltas)
@@ -20,7 +20,7 @@ from dashboard.models import (
 )
 from kudos.models import Token
 from marketing.mails import comment_email, mention_email, new_action_request, tip_comment_awarded_email
-from perftools.models import JSONStore
+from perftools.utils import get_json_store_data
 from ratelimit.decorators import ratelimit
 from retail.views import get_specific_activities
 
@@ -28,8 +28,7 @@ from .models import (
     Announcement, Comment, Favorite, Flag, Like, MatchRanking, MatchRound, Offer, OfferAction, PinnedPost,
     SuggestedAction,
 )
-from .tasks import increment_offer_view_counts
-from .utils import can_pin, is_user_townsquare_enabled
+from .utils import buffer_view_counts, can_pin, is_user_townsquare_enabled
 
 redis = RedisService().redis
 
@@ -96,9 +95,8 @@ def get_amount_unread(key, request):
     if key == request.COOKIES.get('tab'):
         return 0
     posts_unread = 0
-    post_data_cache = JSONStore.objects.filter(view='activity', key=key)
-    if post_data_cache.exists():
-        data = post_data_cache.first().data
+    data = get_json_store_data('activity', key)
+    if data is not None:
         elements = []
         if isinstance(data, list):
             elements = [ele for ele in data if ele > request.session.get(key, 0)]
@@ -238,7 +236,7 @@ def get_offers(request):
             'offers': offers,
             'time': next_time_available,
         }
-    increment_offer_view_counts.delay(offer_pks)
+    buffer_view_counts('offer', offer_pks)
     return offers_by_category
 
 def get_miniclr_info(request):
@@ -375,9 +373,9 @@ def town_square(request):
         audience = redis.get(f"townsquare:audience")
         audience = str(audience.decode('utf-8')) if audience else '39102'
     except KeyError:
-        data_results = JSONStore.objects.filter(view='results', key=None).first()
+        data_results = get_json_store_data('results', '')
         if data_results:
-            audience = data_results.data['audience']
+            audience = data_results['audience']
             redis.set('townsquare:audience', audience)
 
     SHOW_DRESSING = request.GET.get('dressing', False)